@@ -418,11 +418,7 @@ def process_video(
                         obj.confidence = conf
                         obj.centroid = centroid
                         obj.frame_id = frame_id
-                        obj.centroid_history.append(centroid)
-                        obj.frame_history.append(frame_id)
-                        if len(obj.centroid_history) > HISTORY_LEN:
-                            obj.centroid_history = obj.centroid_history[-HISTORY_LEN:]
-                            obj.frame_history = obj.frame_history[-HISTORY_LEN:]
+                        obj.update_history(HISTORY_LEN)
                     else:
                         obj = TrackedObject(
                             track_id=track_id,
@@ -432,8 +428,7 @@ def process_video(
                             confidence=conf,
                             centroid=centroid,
                             frame_id=frame_id,
-                            centroid_history=[centroid],
-                            frame_history=[frame_id],
+                            history_length=HISTORY_LEN,
                         )
                         track_histories[track_id] = obj
 
@@ -1,19 +1,45 @@
 import os
-import uuid
+import secrets
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 
-from app.core.config import UPLOADS_DIR
+from app.core.config import UPLOADS_DIR_STR
 from app.services import community_service
+from app.utils.file_utils import save_upload
 
 community_api = Blueprint("community_api", __name__)
 
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
+
+@community_api.teardown_app_request
+def _close_db(exc):
+    """Close the request thread's posts.db connection (Flask runs each request on its own thread)."""
+    community_service.close_connection()
+
+
+ALLOWED_EXTENSIONS = frozenset({"png", "jpg", "jpeg", "gif", "webp"})
+_MAX_EXT_LEN = max(map(len, ALLOWED_EXTENSIONS))
 MAX_IMAGES = 4
 
 
-def _allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+def _allowed_ext(filename):
+    """Return the lowercase extension if it is an allowed image type, else None."""
+    _, dot, ext = filename.rpartition(".")
+    if not dot or len(ext) > _MAX_EXT_LEN:
+        return None
+    ext = ext.lower()
+    return ext if ext in ALLOWED_EXTENSIONS else None
+
+
+def _form_str(key):
+    """Stripped form field, or "" when missing or blank."""
+    value = request.form.get(key)
+    return value.strip() if value else ""
+
+
+def _json_str(data, key):
+    """Stripped string field from a JSON body, or "" when missing or not a string."""
+    value = data.get(key)
+    return value.strip() if value and isinstance(value, str) else ""
 
 
 @community_api.route("/posts", methods=["GET"])
@@ -27,9 +53,9 @@ def get_posts():
 
 @community_api.route("/posts", methods=["POST"])
 def create_post():
-    author_name = request.form.get("author_name", "").strip()
-    content = request.form.get("content", "").strip()
-    location = request.form.get("location", "").strip()
+    author_name = _form_str("author_name")
+    content = _form_str("content")
+    location = _form_str("location")
 
     if not content:
         return jsonify({"error": "Nội dung không được để trống"}), 400
@@ -44,10 +70,10 @@ def create_post():
     image_urls = []
     files = request.files.getlist("images")
     for f in files[:MAX_IMAGES]:
-        if f and f.filename and _allowed_file(f.filename):
-            ext = f.filename.rsplit(".", 1)[1].lower()
-            filename = f"img_{uuid.uuid4().hex[:12]}.{ext}"
-            f.save(str(UPLOADS_DIR / filename))
+        ext = _allowed_ext(f.filename) if f and f.filename else None
+        if ext:
+            filename = f"img_{secrets.token_urlsafe(9)}.{ext}"
+            save_upload(f, os.path.join(UPLOADS_DIR_STR, filename), drop_cache=True)
             image_urls.append(f"/api/static/uploads/{filename}")
 
     post = community_service.create_post(author_name, content, image_urls, location)
@@ -81,8 +107,8 @@ def dislike_post(post_id):
 @community_api.route("/posts/<post_id>/comments", methods=["POST"])
 def add_comment(post_id):
     data = request.get_json(silent=True) or {}
-    author_name = data.get("author_name", "").strip()
-    content = data.get("content", "").strip()
+    author_name = _json_str(data, "author_name")
+    content = _json_str(data, "content")
     if not content:
         return jsonify({"error": "Nội dung bình luận không được để trống"}), 400
     if not author_name:
@@ -1,17 +1,19 @@
 # API Routes Blueprint
-from flask import Blueprint, request, jsonify, send_from_directory, Response
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
+from werkzeug.utils import safe_join
 from pathlib import Path
 import os
 import logging
+from urllib.parse import quote
 
-from app.core.config import PROCESSED_DIR, STATIC_DIR, HOST, PORT
+from app.core.config import PROCESSED_DIR, PROCESSED_DIR_STR, PROCESSED_ACCEL_PREFIX, STATIC_DIR, HOST, PORT
 from app.services.ai_service import ai_service
 from app.services.task_manager import task_manager
 from app.services.traffic_service import traffic_service
 from app.services.chat_service import chat_service
 from app.services.air_quality_service import air_quality_service
-from app.models.chat_models import ChatRequest
-from app.utils.file_utils import generate_unique_filename, cleanup_file, get_file_size_mb, get_file_size_kb
+from app.models.chat_models import ChatRequest, dumps_json
+from app.utils.file_utils import generate_unique_filename, save_upload, cleanup_file, get_file_size_mb, get_file_size_kb
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +46,8 @@ def analyze_image():
         input_path = STATIC_DIR / input_filename
         output_path = PROCESSED_DIR / output_filename
 
-        print(f"Saving image to: {input_path}")
-        image_file.save(str(input_path))
+        logger.info("Saving image to: %s", input_path)
+        save_upload(image_file, input_path)
 
         def run_analysis(progress_callback):
             result = ai_service.process_image(input_path, output_path, progress_callback=progress_callback)
@@ -64,7 +66,7 @@ def analyze_image():
         return jsonify({"success": True, "task_id": task_id})
 
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.error("Error processing image: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -86,8 +88,8 @@ def analyze_video():
         input_path = STATIC_DIR / input_filename
         output_path = PROCESSED_DIR / output_filename
 
-        print(f"Saving video to: {input_path}")
-        video_file.save(str(input_path))
+        logger.info("Saving video to: %s", input_path)
+        save_upload(video_file, input_path)
 
         def run_analysis(progress_callback):
             result = ai_service.process_video(input_path, output_path, progress_callback=progress_callback)
@@ -101,15 +103,17 @@ def analyze_video():
                 json_path = PROCESSED_DIR / json_filename
                 json_path.write_text(count_result.to_json(), encoding="utf-8")
                 json_url = f"/api/static/processed/{json_filename}"
-                print(f"JSON result saved: {json_path}")
+                logger.info("JSON result saved: %s", json_path)
 
             actual_filename = result.get("output_filename", output_filename)
             media_url = f"/api/static/processed/{actual_filename}"
 
-            print(f"media_url: {media_url}")
-            print(f"Traffic: {result['traffic_status']}, Jam: {result.get('is_traffic_jam')}, "
-                  f"Accident: {result['accident_detected']}, "
-                  f"Vehicles: {result.get('vehicle_counts', {})}")
+            logger.info("media_url: %s", media_url)
+            logger.info(
+                "Traffic: %s, Jam: %s, Accident: %s, Vehicles: %s",
+                result["traffic_status"], result.get("is_traffic_jam"),
+                result["accident_detected"], result.get("vehicle_counts", {}),
+            )
 
             return {
                 "success": True,
@@ -128,11 +132,12 @@ def analyze_video():
         return jsonify({"success": True, "task_id": task_id})
 
     except Exception as e:
-        print(f"Error processing video: {e}")
+        logger.error("Error processing video: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @api.route("/analyze/status/<task_id>", methods=["GET"])
+@api.route("/chat/status/<task_id>", methods=["GET"])
 def analyze_status(task_id):
     """Poll background task progress / result."""
     task = task_manager.get_task(task_id)
@@ -176,7 +181,7 @@ def get_traffic_data():
         return jsonify(data)
 
     except Exception as e:
-        print(f"Error getting traffic data: {e}")
+        logger.error("Error getting traffic data: %s", e)
         return jsonify({"error": str(e), "zone": None, "routes": []}), 500
 
 
@@ -202,7 +207,7 @@ def get_air_quality():
         return jsonify(data)
 
     except Exception as e:
-        print(f"Error getting air quality data: {e}")
+        logger.error("Error getting air quality data: %s", e)
         return jsonify({"error": str(e), "nearest": None, "stations": []}), 500
 
 
@@ -213,44 +218,64 @@ def get_traffic_zones():
         zones = traffic_service.get_all_zones()
         return jsonify({"zones": zones})
     except Exception as e:
-        print(f"Error getting traffic zones: {e}")
+        logger.error("Error getting traffic zones: %s", e)
         return jsonify({"error": str(e), "zones": []}), 500
 
 
+# Content types for processed media, keyed by lowercase extension
+MEDIA_CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".avi": "video/x-msvideo",
+    ".mov": "video/quicktime",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".json": "application/json",
+}
+_VIDEO_EXTS = frozenset({".mp4", ".webm", ".avi", ".mov"})
+_VIDEO_STREAM_HEADERS = (
+    ("Accept-Ranges", "bytes"),
+    ("Cache-Control", "public, max-age=3600"),
+    ("Access-Control-Allow-Origin", "*"),
+)
+
+
 @api.route("/static/processed/<path:filename>")
 def serve_processed_media(filename):
-    """Serve processed media files with proper headers for browser playback."""
-    file_path = PROCESSED_DIR / filename
+    """
+    Serve processed media files with proper headers for browser playback.
 
-    if not file_path.exists():
-        print(f"File not found: {file_path}")
+    With PROCESSED_ACCEL_PREFIX set, only headers are returned and nginx
+    streams the file itself (sendfile from page cache). Otherwise send_file
+    hands the open file to the WSGI server's file_wrapper and answers
+    conditional / Range requests for video seeking. A missing file is
+    reported by send_file (or nginx) rather than a separate stat() up front.
+    """
+    file_path = safe_join(PROCESSED_DIR_STR, filename)
+    if file_path is None:
         return jsonify({"error": "File not found"}), 404
 
     # Determine content type based on extension
-    ext = file_path.suffix.lower()
-    content_types = {
-        ".mp4": "video/mp4",
-        ".webm": "video/webm",
-        ".avi": "video/x-msvideo",
-        ".mov": "video/quicktime",
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".png": "image/png",
-        ".gif": "image/gif",
-        ".json": "application/json",
-    }
+    ext = os.path.splitext(file_path)[1].lower()
+    content_type = MEDIA_CONTENT_TYPES.get(ext, "application/octet-stream")
 
-    content_type = content_types.get(ext, "application/octet-stream")
+    logger.debug("Serving file: %s with type: %s", file_path, content_type)
 
-    print(f"Serving file: {file_path} with type: {content_type}")
-
-    response = send_from_directory(str(PROCESSED_DIR), filename, mimetype=content_type)
+    if PROCESSED_ACCEL_PREFIX:
+        response = Response(mimetype=content_type)
+        response.headers["X-Accel-Redirect"] = f"{PROCESSED_ACCEL_PREFIX}/{quote(filename)}"
+    else:
+        try:
+            response = send_file(file_path, mimetype=content_type, conditional=True, etag=True)
+        except (FileNotFoundError, IsADirectoryError):
+            logger.debug("File not found: %s", file_path)
+            return jsonify({"error": "File not found"}), 404
 
     # Add headers for better video streaming support
-    if ext in [".mp4", ".webm", ".avi", ".mov"]:
-        response.headers["Accept-Ranges"] = "bytes"
-        response.headers["Cache-Control"] = "public, max-age=3600"
-        response.headers["Access-Control-Allow-Origin"] = "*"
+    if ext in _VIDEO_EXTS:
+        response.headers.update(_VIDEO_STREAM_HEADERS)
 
     return response
 
@@ -287,29 +312,93 @@ def chat():
     }
     """
     try:
-        # Parse request body
-        data = request.get_json()
-        if not data:
-            return jsonify({"success": False, "error": "Request body is required"}), 400
-
-        # Create ChatRequest from data
-        chat_request = ChatRequest.from_dict(data)
-
-        # Validate request
-        is_valid, error = chat_request.validate()
-        if not is_valid:
+        chat_request, error = _parse_chat_request()
+        if error:
             return jsonify({"success": False, "error": error}), 400
 
         # Process message through chat service
         response = chat_service.process_message_sync(chat_request)
 
-        return jsonify({"success": True, "data": response.to_dict()})
+        # Encode the dataclass response directly; skips the to_dict() copy
+        return Response(dumps_json({"success": True, "data": response}), mimetype="application/json")
 
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 
+@api.route("/chat/async", methods=["POST"])
+def chat_async():
+    """
+    Submit a chat message as a background task. Returns task_id for polling.
+
+    Same request body as /chat; poll /chat/status/<task_id>, whose result
+    holds the /chat response data.
+    """
+    try:
+        chat_request, error = _parse_chat_request()
+        if error:
+            return jsonify({"success": False, "error": error}), 400
+
+        def run_chat(progress_callback):
+            return chat_service.process_message_sync(chat_request).to_dict()
+
+        task_id = task_manager.submit(run_chat, media_type="chat", uses_models=False)
+        return jsonify({"success": True, "task_id": task_id})
+
+    except Exception as e:
+        logger.error("Error in chat async endpoint: %s", e)
+        return jsonify({"success": False, "error": "Internal server error"}), 500
+
+
+@api.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Stream a chat answer as Server-Sent Events while the LLM generates it.
+
+    Same request body as /chat. Events:
+        event: delta   data: {"text": "..."}            (one per chunk of the answer)
+        event: done    data: {"success": true, "data": ...}  (the /chat response)
+        event: error   data: {"success": false, "error": "..."}
+    """
+    try:
+        chat_request, error = _parse_chat_request()
+        if error:
+            return jsonify({"success": False, "error": error}), 400
+    except Exception as e:
+        logger.error("Error in chat stream endpoint: %s", e)
+        return jsonify({"success": False, "error": "Internal server error"}), 500
+
+    def events():
+        try:
+            for event, payload in chat_service.process_message_stream(chat_request):
+                data = {"text": payload} if event == "delta" else {"success": True, "data": payload}
+                yield b"event: " + event.encode() + b"\ndata: " + dumps_json(data) + b"\n\n"
+        except Exception as e:
+            logger.error("Error in chat stream endpoint: %s", e)
+            yield b"event: error\ndata: " + dumps_json({"success": False, "error": "Internal server error"}) + b"\n\n"
+
+    # X-Accel-Buffering: nginx would otherwise hold the chunks until the answer is done
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _parse_chat_request():
+    """Build and validate a ChatRequest from the JSON body. Returns (request, error)."""
+    data = request.get_json(silent=True)
+    if not data:
+        return None, "Request body is required"
+
+    chat_request = ChatRequest.from_dict(data)
+    is_valid, error = chat_request.validate()
+    if not is_valid:
+        return None, error
+    return chat_request, None
+
+
 @api.route("/chat/validate", methods=["POST"])
 def validate_topic():
     """
@@ -341,11 +430,8 @@ def validate_topic():
         if not message:
             return jsonify({"success": False, "error": "Message cannot be empty"}), 400
 
-        # Validate topic
-        from app.validators.topic_validator import TopicValidator
-
-        validator = TopicValidator()
-        result = validator.validate(message)
+        # Validate topic with the chat service's validator (patterns compiled once)
+        result = chat_service.topic_validator.validate(message)
 
         return jsonify(
             {
@@ -12,6 +12,11 @@ PROCESSED_DIR = STATIC_DIR / "processed"
 DATA_DIR = BASE_DIR / "data"
 UPLOADS_DIR = STATIC_DIR / "uploads"
 
+# String forms for per-request joins (os.path.join / safe_join), computed once
+STATIC_DIR_STR = str(STATIC_DIR)
+PROCESSED_DIR_STR = str(PROCESSED_DIR)
+UPLOADS_DIR_STR = str(UPLOADS_DIR)
+
 # Video Detection Module Path
 # Path structure: TechnoTraffix/web-user/backend/app/core/config.py
 # BASE_DIR = backend/app -> backend -> web-user -> TechnoTraffix (repo root)
@@ -60,15 +65,48 @@ HEAVY_TRAFFIC_SCORE = 12
 ACCIDENT_MIN_DETECTIONS = 3
 ACCIDENT_MIN_BOX_AREA = 3000
 
+# Video inference: frames per ambulance-model call (stateless, so it can be batched)
+AMBULANCE_BATCH_SIZE = int(os.getenv("AMBULANCE_BATCH_SIZE", "8"))
+# Video inference: sampled frames per accident / traffic classifier call
+CLASSIFICATION_BATCH_SIZE = int(os.getenv("CLASSIFICATION_BATCH_SIZE", "8"))
+
+# Video inference: track vehicles on every N-th frame only; frames in between
+# redraw the last boxes. 1 = every frame. Larger values (e.g. fps // 10) cut
+# detection cost ~N-fold but give ByteTrack coarser motion, so counts may drift
+VIDEO_DETECTION_INTERVAL = max(1, int(os.getenv("VIDEO_DETECTION_INTERVAL", "1")))
+
+# On CUDA machines, run the models as TensorRT FP16 engines, exported once next
+# to each .pt per batch size (delete the .engine to rebuild)
+USE_TENSORRT = os.getenv("USE_TENSORRT", "1") == "1"
+# Calibration images for INT8 classifier engines: a folder in Ultralytics
+# classification layout (train/ and val/, one subfolder per class), ~100
+# representative frames is enough. Unset = the classifiers stay FP16.
+INT8_CALIBRATION_DATA = os.getenv("INT8_CALIBRATION_DATA") or None
+
 # RAG Configuration - Thresholds for using RAG without LLM
 # Higher scores = more confident the RAG result is sufficient
 RAG_FAQ_THRESHOLD = float(os.getenv("RAG_FAQ_THRESHOLD", "3.0"))  # FAQ answers are complete Q&A pairs
 RAG_VIOLATION_THRESHOLD = float(os.getenv("RAG_VIOLATION_THRESHOLD", "4.0"))  # Violations need higher confidence
 RAG_GPLX_THRESHOLD = float(os.getenv("RAG_GPLX_THRESHOLD", "3.0"))  # License info threshold
 
+# LLM response cache: answers reused for the same (or, with sentence-transformers
+# installed, a paraphrased) question asked with the same RAG context and history
+LLM_CACHE_MAX = int(os.getenv("LLM_CACHE_MAX", "512"))  # entries, 0 = disabled
+LLM_CACHE_THRESHOLD = float(os.getenv("LLM_CACHE_THRESHOLD", "0.95"))  # cosine similarity
+LLM_CACHE_MODEL = os.getenv("LLM_CACHE_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+# LLM request batching: prompts arriving within the window are sent as one call
+# with numbered requests and a JSON reply. 1 = off (one call per prompt)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))
+LLM_BATCH_WINDOW_MS = int(os.getenv("LLM_BATCH_WINDOW_MS", "50"))
+
 # Air Quality - WAQI API (free: https://aqicn.org/data-platform/token/)
 WAQI_API_TOKEN = os.getenv("WAQI_API_TOKEN", "demo")
 WAQI_CACHE_TTL = int(os.getenv("WAQI_CACHE_TTL", "600"))  # seconds
+WAQI_CACHE_MAX_ENTRIES = int(os.getenv("WAQI_CACHE_MAX_ENTRIES", "1024"))  # LRU bound
+
+# Processed media delivery: when set (e.g. "/internal/processed"), responses carry
+# an X-Accel-Redirect to this nginx internal location and nginx sends the file
+PROCESSED_ACCEL_PREFIX = os.getenv("PROCESSED_ACCEL_PREFIX", "").rstrip("/")
 
 # Server Configuration
 HOST = os.getenv("HOST", "0.0.0.0")
@@ -4,14 +4,91 @@ Provides semantic search and retrieval for traffic violation queries
 Based on Nghị định 168/2024/NĐ-CP and Luật GTĐB 2024
 """
 
-import json
+import heapq
 import re
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-
-
-@dataclass
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, replace
+from functools import cached_property
+
+from app.models.chat_models import _DATACLASS_SLOTS
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; patterns are then checked one by one
+    ahocorasick = None
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional; stdlib json parses the same files
+    from json import loads as _json_loads
+
+try:
+    import numpy as np
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:  # Numba is optional; violations are then scored record by record in Python
+    _HAS_NUMBA = False
+
+
+# Common Vietnamese synonyms/variations, mapped to one canonical form
+NORMALIZE_REPLACEMENTS = {
+    "ô tô": "oto",
+    "xe hơi": "oto",
+    "xe con": "oto",
+    "xe máy": "xe_may",
+    "mô tô": "xe_may",
+    "xe gắn máy": "xe_may",
+    "gplx": "giấy phép lái xe",
+    "bằng lái": "giấy phép lái xe",
+    "bang lai": "giấy phép lái xe",
+}
+
+# All replacements in one left-to-right scan; longest alternatives first so
+# e.g. "mô tô" wins over its suffix "ô tô"
+_NORMALIZE_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(NORMALIZE_REPLACEMENTS, key=len, reverse=True))
+)
+
+
+def _normalize_match(match: "re.Match") -> str:
+    return NORMALIZE_REPLACEMENTS[match.group(0)]
+
+
+# Display names for the speed-limit vehicle keys (RAG context and RAG-only chat answers)
+_VEHICLE_VN_VI = {
+    "xe_may": "Xe máy",
+    "oto_con": "Ô tô con",
+    "oto_tai": "Xe tải",
+    "xe_khach": "Xe khách",
+}
+
+# Intent keywords checked against the lowercased query in search()
+_OTO_KW = ("ô tô", "oto", "xe hơi", "xe con")
+_XE_MAY_KW = ("xe máy", "xe may", "mô tô", "xe gắn máy")
+_LICENSE_KW = ("bằng", "gplx", "giấy phép")
+_POINT_KW = ("điểm", "trừ điểm", "hệ thống điểm")
+_SPEED_KW = ("tốc độ", "giới hạn", "nhanh", "chạy bao nhiêu", "km/h", "kmh")
+
+# Words for content matching: letters/digits/underscore runs, keeping "/" so
+# "km/h" and "50mg/100ml" stay whole; punctuation is dropped
+_WORD_RE = re.compile(r"[\w/]+")
+
+# Bloom-style fingerprint width. Python ints are arbitrary precision; at 64
+# bits a record's ~20 terms set so many bits that almost nothing was rejected.
+_FINGERPRINT_MASK = 1024 - 1
+
+
+def _fingerprint(terms) -> int:
+    """OR one hash-chosen bit per term; disjoint term sets usually share no bit."""
+    fingerprint = 0
+    for term in terms:
+        fingerprint |= 1 << (hash(term) & _FINGERPRINT_MASK)
+    return fingerprint
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class SearchResult:
     """Represents a search result from the knowledge base."""
 
@@ -23,6 +100,91 @@ class SearchResult:
     metadata: Dict[str, Any]
 
 
+@dataclass(**_DATACLASS_SLOTS)
+class _PreparedQuery:
+    """A query normalized and tokenized once, shared by every sub-search."""
+
+    normalized: str
+    found: Set[str]  # keyword patterns present in the query (see _find_patterns)
+    words: Tuple[str, ...]  # words longer than 2 chars, matched against record content
+    generation: int  # pattern dictionary version `found` was matched against
+    fingerprint: int  # _fingerprint of found + words, ANDed with each record's
+
+
+# Sort key for (relevance, ...) tuples
+_score_key = itemgetter(0)
+
+
+if _HAS_NUMBA:
+    @njit(cache=True)
+    def _score_kernel(found, word_counts, rec_kw_off, kw_ids, kw_word_off, kw_word_ids, rec_word_off, word_ids):
+        """_calculate_relevance for every record of a _RecordTable at once."""
+        n_records = rec_kw_off.shape[0] - 1
+        scores = np.zeros(n_records, dtype=np.float64)
+        for r in range(n_records):
+            score = 0.0
+            for k in range(rec_kw_off[r], rec_kw_off[r + 1]):
+                if found[kw_ids[k]]:
+                    score += 2.0
+                else:
+                    for j in range(kw_word_off[k], kw_word_off[k + 1]):
+                        if found[kw_word_ids[j]]:
+                            score += 1.0
+                            break
+            for c in range(rec_word_off[r], rec_word_off[r + 1]):
+                score += 0.5 * word_counts[word_ids[c]]
+            scores[r] = min(score, 10.0)
+        return scores
+
+
+class _RecordTable:
+    """
+    Prepared records with keywords and content words encoded as int ids.
+
+    Records are laid out CSR-style (per-record offsets into flat id arrays) so
+    _score_kernel can score all of them in one compiled loop.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.pattern_ids: Dict[str, int] = {}  # keyword / keyword word -> id
+        self.vocab: Dict[str, int] = {}  # content word -> id
+        rec_kw_off, kw_ids, kw_word_off, kw_word_ids = [0], [], [0], []
+        rec_word_off, word_ids = [0], []
+        for record in records:
+            for keyword, words in record["_norm_keywords"]:
+                kw_ids.append(self.pattern_ids.setdefault(keyword, len(self.pattern_ids)))
+                for word in words:
+                    kw_word_ids.append(self.pattern_ids.setdefault(word, len(self.pattern_ids)))
+                kw_word_off.append(len(kw_word_ids))
+            rec_kw_off.append(len(kw_ids))
+            for word in record["_content_words"]:
+                word_ids.append(self.vocab.setdefault(word, len(self.vocab)))
+            rec_word_off.append(len(word_ids))
+
+        self.arrays = (
+            np.array(rec_kw_off, dtype=np.int64),
+            np.array(kw_ids, dtype=np.int32),
+            np.array(kw_word_off, dtype=np.int64),
+            np.array(kw_word_ids, dtype=np.int32),
+            np.array(rec_word_off, dtype=np.int64),
+            np.array(word_ids, dtype=np.int32),
+        )
+
+    def score(self, query: _PreparedQuery) -> List[float]:
+        """Relevance of every record, in table order (same values as _calculate_relevance)."""
+        found = np.zeros(len(self.pattern_ids), dtype=np.bool_)
+        for pattern in query.found:
+            pattern_id = self.pattern_ids.get(pattern)
+            if pattern_id is not None:
+                found[pattern_id] = True
+        word_counts = np.zeros(len(self.vocab), dtype=np.float64)
+        for word in query.words:
+            word_id = self.vocab.get(word)
+            if word_id is not None:
+                word_counts[word_id] += 1.0
+        return _score_kernel(found, word_counts, *self.arrays).tolist()
+
+
 class TrafficLawKB:
     """
     Knowledge Base for Vietnamese Traffic Law.
@@ -32,68 +194,202 @@ class TrafficLawKB:
     def __init__(self):
         self.data_dir = Path(__file__).parent / "data"
         self.violations_data: Dict[str, Any] = {}
-        self.faq_data: List[Dict] = []
-        self.gplx_data: Dict[str, Any] = {}
+        # (category name, source citation, violation) rows, flattened at load
+        self._violations_flat: List[Tuple[str, str, Dict[str, Any]]] = []
+        # vehicle_type -> rows of that type plus "chung" (general) rows, in flat order
+        self._violations_by_vehicle: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
+        # Same grouping as positions into _violations_flat, for the compiled scorer
+        self._violation_idx_by_vehicle: Dict[str, List[int]] = {}
+        self._violation_table: Optional[_RecordTable] = None  # built when Numba is installed
+        self._pattern_set: Set[str] = set()
+        self._patterns: List[str] = []  # distinct normalized keywords and keyword words
+        self._pattern_generation = 0  # bumped whenever a source adds patterns
+        self._automaton = None
+        # RAG context blocks for the loaded speed_limits / license_point_system data
+        self._speed_limits_rendered = ""
+        self._point_system_rendered = ""
         self._load_data()
 
     def _load_data(self) -> None:
-        """Load all knowledge base data from JSON files."""
-        # Load violations data (NĐ 168/2024)
+        """
+        Load the violations data (NĐ 168/2024) from JSON.
+
+        FAQ and GPLX data are loaded on first use; see faq_data / gplx_data.
+        """
         nd_168_path = self.data_dir / "nd_168_2024.json"
         if nd_168_path.exists():
-            with open(nd_168_path, "r", encoding="utf-8") as f:
-                self.violations_data = json.load(f)
+            self.violations_data = _json_loads(nd_168_path.read_bytes())
 
-        # Load FAQ data
-        faq_path = self.data_dir / "faq.json"
-        if faq_path.exists():
-            with open(faq_path, "r", encoding="utf-8") as f:
-                faq_content = json.load(f)
-                self.faq_data = faq_content.get("faqs", [])
+        self._prepare_search_fields()
+
+        # Static data: render its RAG context blocks once
+        self._speed_limits_rendered = self._render_speed_limits(self.violations_data.get("speed_limits") or {})
+        self._point_system_rendered = self._render_point_system(self.violations_data.get("license_point_system") or {})
 
-        # Load GPLX data
+    @cached_property
+    def faq_data(self) -> List[Dict]:
+        """FAQ records, loaded from faq.json and indexed on first access."""
+        faq_path = self.data_dir / "faq.json"
+        faqs = _json_loads(faq_path.read_bytes()).get("faqs", []) if faq_path.exists() else []
+        for faq in faqs:
+            self._prepare_record(faq, faq.get("question", "") + " " + faq.get("answer", ""))
+        self._add_patterns(faqs)
+        return faqs
+
+    @cached_property
+    def gplx_data(self) -> Dict[str, Any]:
+        """Driver's license data, loaded from gplx.json and indexed on first access."""
         gplx_path = self.data_dir / "gplx.json"
-        if gplx_path.exists():
-            with open(gplx_path, "r", encoding="utf-8") as f:
-                self.gplx_data = json.load(f)
+        gplx = _json_loads(gplx_path.read_bytes()) if gplx_path.exists() else {}
+        license_classes = gplx.get("license_classes", [])
+        for license_class in license_classes:
+            self._prepare_record(license_class, license_class.get("description", ""))
+        self._add_patterns(license_classes)
+        return gplx
+
+    def _prepare_search_fields(self) -> None:
+        """
+        Normalize every violation's keywords and searchable text once, at load.
+
+        Stored on each record as "_norm_keywords" (list of (keyword, words))
+        and "_content_words" (set of content words), so queries only
+        normalize the query itself.
+        """
+        self._violations_flat = [
+            (category.get("name", ""), f"Nghị định 168/2024, {category.get('article', '')}", violation)
+            for category in self.violations_data.get("categories", [])
+            for violation in category.get("violations", [])
+        ]
+        for _, _, violation in self._violations_flat:
+            self._prepare_record(violation, violation.get("violation", ""))
+            self._prepare_violation_display(violation)
+
+        vehicle_types = {row[2].get("vehicle_type") for row in self._violations_flat}
+        self._violation_idx_by_vehicle = {
+            vehicle_type: [
+                i for i, row in enumerate(self._violations_flat) if row[2].get("vehicle_type") in (vehicle_type, "chung")
+            ]
+            for vehicle_type in vehicle_types | {"chung"}
+        }
+        self._violations_by_vehicle = {
+            vehicle_type: [self._violations_flat[i] for i in indices]
+            for vehicle_type, indices in self._violation_idx_by_vehicle.items()
+        }
+        if _HAS_NUMBA:
+            self._violation_table = _RecordTable([violation for _, _, violation in self._violations_flat])
+
+        self._add_patterns(violation for _, _, violation in self._violations_flat)
+
+    def _add_patterns(self, records) -> None:
+        """
+        Add the records' keywords and keyword words to the pattern dictionary.
+
+        With pyahocorasick installed the patterns are compiled into an
+        Aho-Corasick automaton, so one pass over the query finds all of them.
+        """
+        for record in records:
+            for keyword, words in record["_norm_keywords"]:
+                self._pattern_set.add(keyword)
+                self._pattern_set.update(words)
+        self._pattern_set.discard("")  # always "present"; see _find_patterns
+        self._patterns = sorted(self._pattern_set)
+        self._pattern_generation += 1
+
+        self._automaton = None
+        if ahocorasick is not None and self._patterns:
+            automaton = ahocorasick.Automaton()
+            for pattern in self._patterns:
+                automaton.add_word(pattern, pattern)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def _find_patterns(self, query_normalized: str) -> Set[str]:
+        """Return the keyword patterns that occur as substrings of the query."""
+        if self._automaton is not None:
+            found = {pattern for _, pattern in self._automaton.iter(query_normalized)}
+        else:
+            found = {pattern for pattern in self._patterns if pattern in query_normalized}
+        found.add("")
+        return found
+
+    def _prepare_record(self, record: Dict[str, Any], content: str) -> None:
+        """Attach normalized keywords and content to one record."""
+        normalized = [self._normalize_text(keyword) for keyword in record.get("keywords", [])]
+        record["_norm_keywords"] = [(keyword, keyword.split()) for keyword in normalized]
+        record["_content_words"] = frozenset(_WORD_RE.findall(self._normalize_text(content)))
+        # Every term that can score: keywords, keyword words and content words
+        terms = set(record["_content_words"])
+        for keyword, words in record["_norm_keywords"]:
+            terms.add(keyword)
+            terms.update(words)
+        record["_fingerprint"] = _fingerprint(terms)
+
+    def _prepare_violation_display(self, violation: Dict[str, Any]) -> None:
+        """Format a violation's fine, suspension and points strings once, at load."""
+        # Format fine amount
+        fine_min = violation.get("fine_min", 0)
+        fine_max = violation.get("fine_max", 0)
+        violation["_fine_str"] = f"{fine_min:,}đ - {fine_max:,}đ".replace(",", ".")
+
+        # Format license suspension
+        suspension = violation.get("license_suspension_months")
+        violation["_suspension_str"] = f"Tước GPLX {suspension[0]}-{suspension[1]} tháng" if suspension else ""
+
+        # Format points deducted
+        points = violation.get("points_deducted", 0)
+        violation["_points_str"] = f"Trừ {points} điểm GPLX" if points > 0 else ""
 
     def _normalize_text(self, text: str) -> str:
         """Normalize Vietnamese text for matching."""
-        text = text.lower().strip()
-        # Common Vietnamese synonyms/variations
-        replacements = {
-            "ô tô": "oto",
-            "xe hơi": "oto",
-            "xe con": "oto",
-            "xe máy": "xe_may",
-            "mô tô": "xe_may",
-            "xe gắn máy": "xe_may",
-            "gplx": "giấy phép lái xe",
-            "bằng lái": "giấy phép lái xe",
-            "bang lai": "giấy phép lái xe",
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        return text
+        return _NORMALIZE_RE.sub(_normalize_match, text.lower().strip())
 
-    def _calculate_relevance(self, query: str, keywords: List[str], content: str) -> float:
-        """Calculate relevance score based on keyword matching."""
+    def _prepare_query(self, query: str) -> _PreparedQuery:
+        """Normalize and tokenize a query for scoring."""
         query_normalized = self._normalize_text(query)
+        found = self._find_patterns(query_normalized)
+        words = tuple(word for word in _WORD_RE.findall(query_normalized) if len(word) > 2)
+        return _PreparedQuery(
+            normalized=query_normalized,
+            found=found,
+            words=words,
+            generation=self._pattern_generation,
+            fingerprint=_fingerprint(found) | _fingerprint(words),
+        )
+
+    def _rematch(self, query: _PreparedQuery) -> _PreparedQuery:
+        """Re-match a query prepared before a lazily loaded source added its keywords."""
+        if query.generation == self._pattern_generation:
+            return query
+        found = self._find_patterns(query.normalized)
+        return replace(
+            query,
+            found=found,
+            generation=self._pattern_generation,
+            fingerprint=_fingerprint(found) | _fingerprint(query.words),
+        )
+
+    def _calculate_relevance(self, query: _PreparedQuery, record: Dict[str, Any]) -> float:
+        """
+        Calculate relevance score based on keyword matching.
+
+        Args:
+            query: Prepared query (see _prepare_query)
+            record: Violation / FAQ / license record prepared at load time
+        """
+        found = query.found
         score = 0.0
 
         # Check keyword matches (higher weight)
-        for keyword in keywords:
-            keyword_normalized = self._normalize_text(keyword)
-            if keyword_normalized in query_normalized:
+        for keyword_normalized, keyword_words in record["_norm_keywords"]:
+            if keyword_normalized in found:
                 score += 2.0
-            elif any(word in query_normalized for word in keyword_normalized.split()):
+            elif any(word in found for word in keyword_words):
                 score += 1.0
 
         # Check content matches (lower weight)
-        content_normalized = self._normalize_text(content)
-        query_words = query_normalized.split()
-        for word in query_words:
-            if len(word) > 2 and word in content_normalized:
+        content_words = record["_content_words"]
+        for word in query.words:
+            if word in content_words:
                 score += 0.5
 
         return min(score, 10.0)  # Cap at 10.0
@@ -110,130 +406,201 @@ class TrafficLawKB:
         Returns:
             List of SearchResult objects sorted by relevance
         """
-        results = []
-
-        if not self.violations_data.get("categories"):
-            return results
-
-        for category in self.violations_data["categories"]:
-            for violation in category.get("violations", []):
-                # Filter by vehicle type if specified
-                if vehicle_type and violation.get("vehicle_type") not in [vehicle_type, "chung"]:
-                    continue
-
-                keywords = violation.get("keywords", [])
-                content = violation.get("violation", "")
-                relevance = self._calculate_relevance(query, keywords, content)
-
-                if relevance > 0:
-                    # Format fine amount
-                    fine_min = violation.get("fine_min", 0)
-                    fine_max = violation.get("fine_max", 0)
-                    fine_str = f"{fine_min:,}đ - {fine_max:,}đ".replace(",", ".")
-
-                    # Format license suspension
-                    suspension = violation.get("license_suspension_months")
-                    suspension_str = ""
-                    if suspension:
-                        suspension_str = f"Tước GPLX {suspension[0]}-{suspension[1]} tháng"
-
-                    # Format points deducted
-                    points = violation.get("points_deducted", 0)
-                    points_str = f"Trừ {points} điểm GPLX" if points > 0 else ""
-
-                    result = SearchResult(
-                        id=violation.get("id", ""),
-                        content=violation.get("violation", ""),
-                        category=category.get("name", ""),
-                        relevance_score=relevance,
-                        source=f"Nghị định 168/2024, {category.get('article', '')}",
-                        metadata={
-                            "vehicle_type": violation.get("vehicle_type_display", ""),
-                            "fine": fine_str,
-                            "license_suspension": suspension_str,
-                            "points_deducted": points_str,
-                            "fine_min": fine_min,
-                            "fine_max": fine_max,
-                        },
-                    )
-                    results.append(result)
-
-        # Sort by relevance and return top_k
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results[:top_k]
+        return [
+            self._violation_result(row, relevance)
+            for relevance, row in self._score_violations(self._prepare_query(query), vehicle_type, top_k)
+        ]
+
+    def _search_violations_dicts(
+        self, query: _PreparedQuery, vehicle_type: Optional[str] = None, top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        return [
+            self._violation_dict(row, relevance)
+            for relevance, row in self._score_violations(query, vehicle_type, top_k)
+        ]
+
+    def _score_violations(
+        self, query: _PreparedQuery, vehicle_type: Optional[str], top_k: int
+    ) -> List[Tuple[float, Tuple[str, str, Dict[str, Any]]]]:
+        """Return the top_k (relevance, row) pairs; results are built only for these."""
+        if self._violation_table is not None:
+            return heapq.nlargest(top_k, self._score_violations_compiled(query, vehicle_type), key=_score_key)
+
+        scored = []
+        # Filter by vehicle type if specified: only that type's rows and "chung" rows
+        if vehicle_type:
+            rows = self._violations_by_vehicle.get(vehicle_type, self._violations_by_vehicle["chung"])
+        else:
+            rows = self._violations_flat
+        for row in rows:
+            # Records sharing no fingerprint bit with the query can't score
+            if not row[2]["_fingerprint"] & query.fingerprint:
+                continue
+            relevance = self._calculate_relevance(query, row[2])
+            if relevance > 0:
+                scored.append((relevance, row))
+
+        # Bounded heap; same order as a stable descending sort
+        return heapq.nlargest(top_k, scored, key=_score_key)
+
+    def _score_violations_compiled(
+        self, query: _PreparedQuery, vehicle_type: Optional[str]
+    ) -> List[Tuple[float, Tuple[str, str, Dict[str, Any]]]]:
+        """Score every violation with _score_kernel; same (relevance, row) pairs as the Python loop."""
+        scores = self._violation_table.score(query)
+        flat = self._violations_flat
+        if vehicle_type:
+            by_vehicle = self._violation_idx_by_vehicle
+            indices = by_vehicle.get(vehicle_type, by_vehicle["chung"])
+        else:
+            indices = range(len(flat))
+        return [(scores[i], flat[i]) for i in indices if scores[i] > 0]
+
+    def _violation_result(self, row: Tuple[str, str, Dict[str, Any]], relevance: float) -> SearchResult:
+        """Build the SearchResult for a matched (category name, source, violation) row."""
+        category_name, source, violation = row
+        return SearchResult(
+            id=violation.get("id", ""),
+            content=violation.get("violation", ""),
+            category=category_name,
+            relevance_score=relevance,
+            source=source,
+            metadata={
+                "vehicle_type": violation.get("vehicle_type_display", ""),
+                "fine": violation["_fine_str"],
+                "license_suspension": violation["_suspension_str"],
+                "points_deducted": violation["_points_str"],
+                "fine_min": violation.get("fine_min", 0),
+                "fine_max": violation.get("fine_max", 0),
+            },
+        )
+
+    def _violation_dict(self, row: Tuple[str, str, Dict[str, Any]], relevance: float) -> Dict[str, Any]:
+        """Build the search() output dict for a matched row (SearchResult fields + metadata, flattened)."""
+        category_name, source, violation = row
+        return {
+            "id": violation.get("id", ""),
+            "content": violation.get("violation", ""),
+            "category": category_name,
+            "source": source,
+            "score": relevance,
+            "vehicle_type": violation.get("vehicle_type_display", ""),
+            "fine": violation["_fine_str"],
+            "license_suspension": violation["_suspension_str"],
+            "points_deducted": violation["_points_str"],
+            "fine_min": violation.get("fine_min", 0),
+            "fine_max": violation.get("fine_max", 0),
+        }
 
     def search_faq(self, query: str, top_k: int = 3) -> List[SearchResult]:
         """Search FAQ database for matching questions."""
-        results = []
-
-        for faq in self.faq_data:
-            keywords = faq.get("keywords", [])
-            question = faq.get("question", "")
-            answer = faq.get("answer", "")
+        return [
+            SearchResult(
+                id=faq.get("id", ""),
+                content=faq.get("answer", ""),
+                category="FAQ",
+                relevance_score=relevance,
+                source="Câu hỏi thường gặp về Luật ATGT",
+                metadata={
+                    "question": faq.get("question", ""),
+                    "category": faq.get("category", ""),
+                },
+            )
+            for relevance, faq in self._score_faq(self._prepare_query(query), top_k)
+        ]
 
-            relevance = self._calculate_relevance(query, keywords, question + " " + answer)
+    def _search_faq_dicts(self, query: _PreparedQuery, top_k: int = 3) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": faq.get("id", ""),
+                "question": faq.get("question", ""),
+                "answer": faq.get("answer", ""),
+                "score": relevance,
+            }
+            for relevance, faq in self._score_faq(query, top_k)
+        ]
 
+    def _score_faq(self, query: _PreparedQuery, top_k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return the top_k (relevance, faq) pairs."""
+        faqs = self.faq_data  # loads the FAQ on first use
+        query = self._rematch(query)
+        scored = []
+        for faq in faqs:
+            if not faq["_fingerprint"] & query.fingerprint:
+                continue
+            relevance = self._calculate_relevance(query, faq)
             if relevance > 0:
-                result = SearchResult(
-                    id=faq.get("id", ""),
-                    content=answer,
-                    category="FAQ",
-                    relevance_score=relevance,
-                    source="Câu hỏi thường gặp về Luật ATGT",
-                    metadata={
-                        "question": question,
-                        "category": faq.get("category", ""),
-                    },
-                )
-                results.append(result)
-
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results[:top_k]
+                scored.append((relevance, faq))
+        return heapq.nlargest(top_k, scored, key=_score_key)
 
     def search_gplx(self, query: str) -> List[SearchResult]:
         """Search for driver's license information."""
-        results = []
-
-        if not self.gplx_data.get("license_classes"):
-            return results
-
-        for license_class in self.gplx_data["license_classes"]:
-            keywords = license_class.get("keywords", [])
-            description = license_class.get("description", "")
+        return [
+            self._gplx_result(license_class, relevance)
+            for relevance, license_class in self._score_gplx(self._prepare_query(query))
+        ]
 
-            relevance = self._calculate_relevance(query, keywords, description)
+    def _search_gplx_dicts(self, query: _PreparedQuery) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": f"gplx-{license_class['class']}",
+                "content": self._gplx_content(license_class),
+                "class": license_class["class"],
+                "score": relevance,
+            }
+            for relevance, license_class in self._score_gplx(query)
+        ]
 
+    def _score_gplx(self, query: _PreparedQuery) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return every matching (relevance, license class) pair, best first."""
+        license_classes = self.gplx_data.get("license_classes")  # loads GPLX data on first use
+        if not license_classes:
+            return []
+
+        query = self._rematch(query)
+        scored = []
+        for license_class in license_classes:
+            if not license_class["_fingerprint"] & query.fingerprint:
+                continue
+            relevance = self._calculate_relevance(query, license_class)
             if relevance > 0:
-                vehicles = ", ".join(license_class.get("vehicles_allowed", []))
-                note = license_class.get("note", "")
-
-                content = f"Bằng {license_class['class']}: {description}. Được phép lái: {vehicles}."
-                if note:
-                    content += f" Lưu ý: {note}"
-
-                result = SearchResult(
-                    id=f"gplx-{license_class['class']}",
-                    content=content,
-                    category="Giấy phép lái xe",
-                    relevance_score=relevance,
-                    source="Quy định về GPLX Việt Nam",
-                    metadata={
-                        "class": license_class["class"],
-                        "age_requirement": license_class.get("age_requirement"),
-                        "validity_years": license_class.get("validity_years"),
-                    },
-                )
-                results.append(result)
-
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results
+                scored.append((relevance, license_class))
+
+        scored.sort(key=_score_key, reverse=True)
+        return scored
+
+    def _gplx_content(self, license_class: Dict[str, Any]) -> str:
+        """Describe a license class and the vehicles it allows."""
+        description = license_class.get("description", "")
+        vehicles = ", ".join(license_class.get("vehicles_allowed", []))
+        note = license_class.get("note", "")
+
+        content = f"Bằng {license_class['class']}: {description}. Được phép lái: {vehicles}."
+        if note:
+            content += f" Lưu ý: {note}"
+        return content
+
+    def _gplx_result(self, license_class: Dict[str, Any], relevance: float) -> SearchResult:
+        """Build the SearchResult for a matched license class."""
+        return SearchResult(
+            id=f"gplx-{license_class['class']}",
+            content=self._gplx_content(license_class),
+            category="Giấy phép lái xe",
+            relevance_score=relevance,
+            source="Quy định về GPLX Việt Nam",
+            metadata={
+                "class": license_class["class"],
+                "age_requirement": license_class.get("age_requirement"),
+                "validity_years": license_class.get("validity_years"),
+            },
+        )
 
     def search_speed_limits(self, query: str) -> Optional[Dict[str, Any]]:
         """Get speed limit information if query is about speed."""
-        speed_keywords = ["tốc độ", "giới hạn", "nhanh", "chạy bao nhiêu", "km/h", "kmh"]
-        query_lower = query.lower()
+        return self._search_speed_limits(query.lower())
 
-        if not any(kw in query_lower for kw in speed_keywords):
+    def _search_speed_limits(self, query_lower: str) -> Optional[Dict[str, Any]]:
+        if not any(kw in query_lower for kw in _SPEED_KW):
             return None
 
         return self.violations_data.get("speed_limits", {})
@@ -262,61 +629,36 @@ class TrafficLawKB:
             "has_results": False,
         }
 
+        # Normalize / tokenize once for all sub-searches
+        prepared = self._prepare_query(query)
+
         # Detect vehicle type from query
         query_lower = query.lower()
         vehicle_type = None
-        if any(kw in query_lower for kw in ["ô tô", "oto", "xe hơi", "xe con"]):
+        # "ô tô" is checked first, so it wins over "mô tô" (which contains it) and "xe máy"
+        if any(kw in query_lower for kw in _OTO_KW):
             vehicle_type = "oto"
-        elif any(kw in query_lower for kw in ["xe máy", "xe may", "mô tô", "xe gắn máy"]):
+        elif any(kw in query_lower for kw in _XE_MAY_KW):
             vehicle_type = "xe_may"
 
-        # Search violations
-        if intent in [None, "traffic_violation", "alcohol_regulation", "speed_limit"]:
-            violations = self.search_violations(query, vehicle_type)
-            results["violations"] = [
-                {
-                    "id": v.id,
-                    "content": v.content,
-                    "category": v.category,
-                    "source": v.source,
-                    "score": v.relevance_score,
-                    **v.metadata,
-                }
-                for v in violations
-            ]
+        # Search violations (output dicts are built directly, no SearchResult step)
+        if intent in (None, "traffic_violation", "alcohol_regulation", "speed_limit"):
+            results["violations"] = self._search_violations_dicts(prepared, vehicle_type)
 
         # Search FAQ
-        faq_results = self.search_faq(query)
-        results["faq"] = [
-            {
-                "id": f.id,
-                "question": f.metadata.get("question", ""),
-                "answer": f.content,
-                "score": f.relevance_score,
-            }
-            for f in faq_results
-        ]
+        results["faq"] = self._search_faq_dicts(prepared)
 
         # Search GPLX if relevant
-        if intent in [None, "license_query"] or any(kw in query_lower for kw in ["bằng", "gplx", "giấy phép"]):
-            gplx_results = self.search_gplx(query)
-            results["gplx"] = [
-                {
-                    "id": g.id,
-                    "content": g.content,
-                    "class": g.metadata.get("class"),
-                    "score": g.relevance_score,
-                }
-                for g in gplx_results
-            ]
+        if intent in (None, "license_query") or any(kw in query_lower for kw in _LICENSE_KW):
+            results["gplx"] = self._search_gplx_dicts(prepared)
 
         # Get speed limits if relevant
-        speed_info = self.search_speed_limits(query)
+        speed_info = self._search_speed_limits(query_lower)
         if speed_info:
             results["speed_limits"] = speed_info
 
         # Get point system if relevant
-        if any(kw in query_lower for kw in ["điểm", "trừ điểm", "hệ thống điểm"]):
+        if any(kw in query_lower for kw in _POINT_KW):
             results["point_system"] = self.get_point_system_info()
 
         # Check if any results found
@@ -346,68 +688,70 @@ class TrafficLawKB:
         if search_results.get("violations"):
             context_parts.append("## THÔNG TIN VI PHẠM LIÊN QUAN (NĐ 168/2024):")
             for v in search_results["violations"][:3]:  # Top 3
-                context_parts.append(f"- **{v['category']}** ({v['vehicle_type']})")
-                context_parts.append(f"  Vi phạm: {v['content']}")
-                context_parts.append(f"  Mức phạt: {v['fine']}")
-                if v.get("license_suspension"):
-                    context_parts.append(f"  {v['license_suspension']}")
-                if v.get("points_deducted"):
-                    context_parts.append(f"  {v['points_deducted']}")
-                context_parts.append(f"  Nguồn: {v['source']}")
-                context_parts.append("")
+                # One string per record; the trailing "\n" leaves the blank separator line
+                suspension = f"  {v['license_suspension']}\n" if v.get("license_suspension") else ""
+                points = f"  {v['points_deducted']}\n" if v.get("points_deducted") else ""
+                context_parts.append(
+                    f"- **{v['category']}** ({v['vehicle_type']})\n"
+                    f"  Vi phạm: {v['content']}\n"
+                    f"  Mức phạt: {v['fine']}\n"
+                    f"{suspension}{points}"
+                    f"  Nguồn: {v['source']}\n"
+                )
 
         # Format FAQ
         if search_results.get("faq"):
             context_parts.append("## CÂU HỎI THƯỜNG GẶP LIÊN QUAN:")
             for f in search_results["faq"][:2]:  # Top 2
-                context_parts.append(f"- Hỏi: {f['question']}")
-                context_parts.append(f"  Đáp: {f['answer']}")
-                context_parts.append("")
+                context_parts.append(f"- Hỏi: {f['question']}\n  Đáp: {f['answer']}\n")
 
         # Format GPLX
         if search_results.get("gplx"):
             context_parts.append("## THÔNG TIN GPLX:")
             for g in search_results["gplx"][:2]:
-                context_parts.append(f"- {g['content']}")
-                context_parts.append("")
+                context_parts.append(f"- {g['content']}\n")
 
-        # Format speed limits
+        # Format speed limits (pre-rendered when it's the KB's own data, as search() returns)
         if search_results.get("speed_limits"):
             sl = search_results["speed_limits"]
-            context_parts.append("## QUY ĐỊNH TỐC ĐỘ (Luật GTĐB 2024):")
-            context_parts.append("**Trong đô thị:**")
-            if sl.get("urban"):
-                for vehicle, speed in sl["urban"].items():
-                    vehicle_vn = {
-                        "xe_may": "Xe máy",
-                        "oto_con": "Ô tô con",
-                        "oto_tai": "Xe tải",
-                        "xe_khach": "Xe khách",
-                    }.get(vehicle, vehicle)
-                    context_parts.append(f"  - {vehicle_vn}: {speed} km/h")
-            context_parts.append("**Ngoài đô thị:**")
-            if sl.get("rural"):
-                for vehicle, speed in sl["rural"].items():
-                    vehicle_vn = {
-                        "xe_may": "Xe máy",
-                        "oto_con": "Ô tô con",
-                        "oto_tai": "Xe tải",
-                        "xe_khach": "Xe khách",
-                    }.get(vehicle, vehicle)
-                    context_parts.append(f"  - {vehicle_vn}: {speed} km/h")
-            context_parts.append("")
+            if sl is self.violations_data.get("speed_limits"):
+                context_parts.append(self._speed_limits_rendered)
+            else:
+                context_parts.append(self._render_speed_limits(sl))
 
         # Format point system
         if search_results.get("point_system"):
             ps = search_results["point_system"]
-            context_parts.append("## HỆ THỐNG TRỪ ĐIỂM GPLX (từ 01/01/2025):")
-            context_parts.append(f"- Tổng điểm: {ps.get('total_points', 12)} điểm/năm")
-            for rule in ps.get("rules", []):
-                context_parts.append(f"- {rule.get('rule', '')}")
-            context_parts.append("")
+            if ps is self.violations_data.get("license_point_system"):
+                context_parts.append(self._point_system_rendered)
+            else:
+                context_parts.append(self._render_point_system(ps))
 
         return "\n".join(context_parts) if context_parts else "Không tìm thấy thông tin liên quan trong cơ sở dữ liệu."
 
 
+    def _render_speed_limits(self, sl: Dict[str, Any]) -> str:
+        """Render the speed-limit RAG context block (ends with a blank line)."""
+        lines = ["## QUY ĐỊNH TỐC ĐỘ (Luật GTĐB 2024):", "**Trong đô thị:**"]
+        for vehicle, speed in (sl.get("urban") or {}).items():
+            lines.append(f"  - {_VEHICLE_VN_VI.get(vehicle, vehicle)}: {speed} km/h")
+        lines.append("**Ngoài đô thị:**")
+        for vehicle, speed in (sl.get("rural") or {}).items():
+            lines.append(f"  - {_VEHICLE_VN_VI.get(vehicle, vehicle)}: {speed} km/h")
+        lines.append("")
+        return "\n".join(lines)
+
+    def _render_point_system(self, ps: Dict[str, Any]) -> str:
+        """Render the license point system RAG context block (ends with a blank line)."""
+        lines = [
+            "## HỆ THỐNG TRỪ ĐIỂM GPLX (từ 01/01/2025):",
+            f"- Tổng điểm: {ps.get('total_points', 12)} điểm/năm",
+        ]
+        for rule in ps.get("rules", []):
+            lines.append(f"- {rule.get('rule', '')}")
+        lines.append("")
+        return "\n".join(lines)
+
+
 # Singleton instance for easy import
 traffic_law_kb = TrafficLawKB()
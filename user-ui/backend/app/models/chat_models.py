@@ -2,11 +2,44 @@
 Chat Models - Data structures for chat request/response.
 """
 
-from dataclasses import dataclass, field
+import json
+import sys
+from dataclasses import asdict, dataclass, field, is_dataclass
 from typing import List, Optional, Dict, Any
 from enum import Enum
 from datetime import datetime
 
+# slots=True (Python 3.10+) drops the per-instance __dict__; 3.9 keeps plain dataclasses
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; responses are then encoded with stdlib json
+    orjson = None
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode the model types json can't: enums, datetimes and dataclasses."""
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """
+    Serialize obj (which may contain the dataclasses below) to UTF-8 JSON bytes.
+
+    Dataclasses are encoded field by field, matching their to_dict() output,
+    without building the intermediate dicts when orjson is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False).encode("utf-8")
+
 
 class MessageRole(Enum):
     """Role of the message sender."""
@@ -16,7 +49,7 @@ class MessageRole(Enum):
     SYSTEM = "system"
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ChatMessage:
     """Represents a single chat message."""
 
@@ -40,7 +73,7 @@ class ChatMessage:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ChatRequest:
     """Request payload for chat endpoint."""
 
@@ -80,7 +113,7 @@ class ChatRequest:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class SourceReference:
     """Reference to a source used in the response."""
 
@@ -102,7 +135,7 @@ class SourceReference:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ChatResponse:
     """Response payload for chat endpoint."""
 
@@ -127,6 +160,10 @@ class ChatResponse:
             "error": self.error,
         }
 
+    def to_json_bytes(self) -> bytes:
+        """Serialize to JSON bytes; same content as to_dict()."""
+        return dumps_json(self)
+
     @classmethod
     def error_response(cls, error_message: str) -> "ChatResponse":
         """Create an error response."""
@@ -143,7 +180,7 @@ class ChatResponse:
         return cls(content=message, is_ai_generated=False, topic_valid=False, category=category)
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class APIResponse:
     """Standard API response wrapper."""
 
@@ -3,6 +3,8 @@ Traffic Law System Prompt - Specialized prompt for Vietnamese Traffic Law AI Ass
 Based on Nghị định 168/2024/NĐ-CP and Luật Trật tự ATGT đường bộ 2024
 """
 
+import re
+
 TRAFFIC_LAW_SYSTEM_PROMPT = """Bạn là TECHNO TRAFFIX AI - Trợ lý pháp luật an toàn giao thông đường bộ Việt Nam.
 
 ## DANH TÍNH VÀ VAI TRÒ
@@ -100,6 +102,28 @@ TRAFFIC_LAW_SYSTEM_PROMPT = """Bạn là TECHNO TRAFFIX AI - Trợ lý pháp lu
 3. Cảnh báo nghiêm khắc về hậu quả
 """
 
+# Filler for empty template fields
+_FIELD_DEFAULTS = {
+    "rag_context": "Không có thông tin bổ sung từ cơ sở dữ liệu.",
+    "chat_history": "Đây là tin nhắn đầu tiên trong cuộc hội thoại.",
+    "traffic_context": "Không có dữ liệu giao thông thời gian thực.",
+}
+
+
+def _split_template(template: str):
+    """
+    Split a str.format template into its static segments and field names, once.
+
+    The template is formatted with NUL-delimited sentinels and split on them, so
+    "{{"/"}}" escapes are already resolved. segments[i] precedes fields[i].
+    """
+    sentinels = {name: f"\x00{name}\x00" for name in _FIELD_DEFAULTS}
+    parts = re.split(r"\x00(\w+)\x00", template.format(**sentinels))
+    return parts[0::2], parts[1::2]
+
+
+_PROMPT_SEGMENTS, _PROMPT_FIELDS = _split_template(TRAFFIC_LAW_SYSTEM_PROMPT)
+
 
 def build_chat_prompt(
     user_message: str,
@@ -119,14 +143,25 @@ def build_chat_prompt(
     Returns:
         Complete prompt string ready for LLM
     """
-    # Fill in the system prompt template
-    system_prompt = TRAFFIC_LAW_SYSTEM_PROMPT.format(
-        rag_context=rag_context if rag_context else "Không có thông tin bổ sung từ cơ sở dữ liệu.",
-        chat_history=chat_history if chat_history else "Đây là tin nhắn đầu tiên trong cuộc hội thoại.",
-        traffic_context=traffic_context if traffic_context else "Không có dữ liệu giao thông thời gian thực.",
-    )
-
-    return f"{system_prompt}\n\n## CÂU HỎI CỦA NGƯỜI DÙNG:\n{user_message}"
+    # Fill in the system prompt template from its pre-split segments (no str.format per call)
+    values = {
+        "rag_context": rag_context or _FIELD_DEFAULTS["rag_context"],
+        "chat_history": chat_history or _FIELD_DEFAULTS["chat_history"],
+        "traffic_context": traffic_context or _FIELD_DEFAULTS["traffic_context"],
+    }
+    parts = [_PROMPT_SEGMENTS[0]]
+    for name, segment in zip(_PROMPT_FIELDS, _PROMPT_SEGMENTS[1:]):
+        parts.append(values[name])
+        parts.append(segment)
+    parts.append("\n\n## CÂU HỎI CỦA NGƯỜI DÙNG:\n")
+    parts.append(user_message)
+    return "".join(parts)
+
+
+# Chat history speaker labels; any role other than "user" is the assistant
+_ROLE_LABELS = {"user": "Người dùng"}
+_ASSISTANT_LABEL = "Trợ lý"
+_MAX_HISTORY_CHARS = 500
 
 
 def format_chat_history(history: list, max_turns: int = 5) -> str:
@@ -148,8 +183,8 @@ def format_chat_history(history: list, max_turns: int = 5) -> str:
 
     formatted = []
     for msg in recent_history:
-        role = "Người dùng" if msg.get("role") == "user" else "Trợ lý"
-        content = msg.get("content", "")[:500]  # Truncate long messages
+        role = _ROLE_LABELS.get(msg.get("role"), _ASSISTANT_LABEL)
+        content = msg.get("content", "")[:_MAX_HISTORY_CHARS]  # Truncate long messages
         formatted.append(f"**{role}:** {content}")
 
     return "\n".join(formatted)
@@ -2,14 +2,17 @@
 # Uses 3 YOLOv8 models: vehicle detection, accident classification, traffic jam classification
 
 import gc
+import queue
 import sys
 import subprocess
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 import torch
+from itertools import islice
 from pathlib import Path
-from typing import Callable, Dict, Any, List, Optional, Tuple
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
 from app.core.config import (
     VIDEO_DETECTION_DIR,
@@ -18,6 +21,11 @@ from app.core.config import (
     ACCIDENT_CLASSIFICATION_MODEL,
     TRAFFIC_CLASSIFICATION_MODEL,
     PROCESSED_DIR,
+    AMBULANCE_BATCH_SIZE,
+    CLASSIFICATION_BATCH_SIZE,
+    USE_TENSORRT,
+    INT8_CALIBRATION_DATA,
+    VIDEO_DETECTION_INTERVAL,
 )
 
 # Add video_detection to path so pipeline sub-modules resolve correctly
@@ -29,11 +37,140 @@ from pipeline.vehicle_counter import VehicleCounter
 from tracker.bytetrack_tracker import TrackedObject
 
 
+# Frames buffered between the decode, inference and encode threads of process_video
+VIDEO_QUEUE_SIZE = 8
+
+# Vehicle model class names -> display class, and box color (BGR) per display class
+CLASS_MAP = {
+    "car": "car", "xe_oto": "car",
+    "truck": "truck", "xe_tai": "truck", "bus": "truck",
+    "motorcycle": "motorcycle", "moto": "motorcycle", "xe_may": "motorcycle",
+    "ambulance": "ambulance",
+}
+BBOX_COLORS = {
+    "car": (0, 255, 0),
+    "motorcycle": (255, 255, 0),
+    "truck": (0, 165, 255),
+    "ambulance": (255, 0, 0),
+}
+_END = object()  # end-of-stream marker on those queues
+# Predictor attributes the shared-preprocessing classifier path relies on
+_SHARED_PREDICTOR_ATTRS = ("imgsz", "transforms", "model", "preprocess", "inference")
+
+
+def _open_video(path: Path) -> cv2.VideoCapture:
+    """
+    Open a video file for decoding, with hardware decoding when available.
+
+    Uses the FFmpeg backend with CAP_PROP_HW_ACCELERATION, which falls back to
+    software decoding when no accelerator (CUDA/VA-API/D3D11...) is usable.
+    """
+    cap = cv2.VideoCapture(
+        str(path), cv2.CAP_FFMPEG, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    )
+    if not cap.isOpened():
+        # OpenCV built without FFmpeg: let it pick a backend
+        cap.release()
+        cap = cv2.VideoCapture(str(path))
+    return cap
+
+
+def _decode_frames(cap: cv2.VideoCapture, maxsize: int = VIDEO_QUEUE_SIZE) -> Iterator[np.ndarray]:
+    """
+    Yield the frames of *cap*, decoded ahead on a background thread.
+
+    Up to maxsize frames are buffered. Closing the generator stops and joins
+    the thread, so *cap* can be released right after.
+    """
+    frames: "queue.Queue" = queue.Queue(maxsize)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def read_loop():
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                # Time out now and then so a closed consumer can't leave us blocked
+                while not stop.is_set():
+                    try:
+                        frames.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            frames.put(_END)
+
+    thread = threading.Thread(target=read_loop, name="video-decode", daemon=True)
+    thread.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is _END:
+                break
+            yield frame
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+        # Make room for the reader's final _END, then wait for it
+        while True:
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                break
+        thread.join()
+
+
+class _BackgroundWriter:
+    """Feeds a cv2.VideoWriter from a bounded queue on its own thread."""
+
+    def __init__(self, writer: cv2.VideoWriter, maxsize: int = VIDEO_QUEUE_SIZE):
+        self._writer = writer
+        self._frames: "queue.Queue" = queue.Queue(maxsize)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._write_loop, name="video-encode", daemon=True)
+        self._thread.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        """Queue a frame; it must not be modified afterwards."""
+        if self._error is not None:
+            raise self._error
+        self._frames.put(frame)
+
+    def close(self) -> None:
+        """Write out the queued frames and stop the thread. Does not release the writer."""
+        self._frames.put(_END)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _write_loop(self):
+        while True:
+            frame = self._frames.get()
+            if frame is _END:
+                return
+            if self._error is None:  # after a failure keep draining, so write() never blocks
+                try:
+                    self._writer.write(frame)
+                except Exception as e:
+                    self._error = e
+
+
 class AIService:
     """Service using custom trained YOLOv8 models for traffic analysis."""
 
     _instance = None
 
+    # avc1/H264/X264 require openh264 DLL which may not be available;
+    # mp4v always works. FFmpeg (imageio-ffmpeg) handles H.264 transcoding.
+    _VIDEO_CODECS = tuple((codec, cv2.VideoWriter_fourcc(*codec)) for codec in ("mp4v", "XVID", "MJPG"))
+    # First (codec, fourcc) that opened on this machine; tried first next time
+    _working_fourcc = None
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -46,21 +183,38 @@ class AIService:
         # calls to process_image / process_video even if something bypasses
         # the TaskManager's single-worker constraint.
         self._inference_lock = threading.Lock()
+        # Runs the accident classifier next to the traffic one in process_image
+        self._classify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classify")
+        # Side CUDA streams for the accident / traffic forwards, so the two
+        # classifiers' kernels can run concurrently (see _count_positive_samples)
+        if torch.cuda.is_available():
+            self._classifier_streams = (torch.cuda.Stream(), torch.cuda.Stream())
+        else:
+            self._classifier_streams = (None, None)
 
         print("Initializing AI Models...")
 
         # Load Vehicle Detection Model (Object Detection)
         if VEHICLE_DETECTION_MODEL.exists():
             print(f"Loading vehicle detection model: {VEHICLE_DETECTION_MODEL}")
-            self.vehicle_model = YOLO(str(VEHICLE_DETECTION_MODEL))
+            self.vehicle_model = self._load_model(VEHICLE_DETECTION_MODEL)
         else:
             print(f"WARNING: Vehicle detection model not found, using default yolov8l.pt")
             self.vehicle_model = YOLO("yolov8l.pt")
+        # Class ids counted as vehicles: names mapped to a non-ambulance class in
+        # CLASS_MAP (ambulances come from the dedicated model)
+        self._vehicle_class_ids = np.array(
+            [
+                class_id for class_id, name in self.vehicle_model.names.items()
+                if CLASS_MAP.get(name.lower(), "ambulance") != "ambulance"
+            ],
+            dtype=np.int32,
+        )
 
         # Load Ambulance Detection Model (dedicated fine-tuned model)
         if AMBULANCE_DETECTION_MODEL.exists():
             print(f"Loading ambulance detection model: {AMBULANCE_DETECTION_MODEL}")
-            self.ambulance_model = YOLO(str(AMBULANCE_DETECTION_MODEL))
+            self.ambulance_model = self._load_model(AMBULANCE_DETECTION_MODEL, max_batch=AMBULANCE_BATCH_SIZE)
         else:
             print(f"WARNING: Ambulance detection model not found at {AMBULANCE_DETECTION_MODEL}")
             self.ambulance_model = None
@@ -68,7 +222,9 @@ class AIService:
         # Load Accident Classification Model
         if ACCIDENT_CLASSIFICATION_MODEL.exists():
             print(f"Loading accident classification model: {ACCIDENT_CLASSIFICATION_MODEL}")
-            self.accident_model = YOLO(str(ACCIDENT_CLASSIFICATION_MODEL))
+            self.accident_model = self._load_model(
+                ACCIDENT_CLASSIFICATION_MODEL, max_batch=CLASSIFICATION_BATCH_SIZE, int8=True
+            )
         else:
             print(f"WARNING: Accident classification model not found at {ACCIDENT_CLASSIFICATION_MODEL}")
             self.accident_model = None
@@ -76,13 +232,48 @@ class AIService:
         # Load Traffic Jam Classification Model
         if TRAFFIC_CLASSIFICATION_MODEL.exists():
             print(f"Loading traffic classification model: {TRAFFIC_CLASSIFICATION_MODEL}")
-            self.traffic_model = YOLO(str(TRAFFIC_CLASSIFICATION_MODEL))
+            self.traffic_model = self._load_model(
+                TRAFFIC_CLASSIFICATION_MODEL, max_batch=CLASSIFICATION_BATCH_SIZE, int8=True
+            )
         else:
             print(f"WARNING: Traffic classification model not found at {TRAFFIC_CLASSIFICATION_MODEL}")
             self.traffic_model = None
 
         print("AI Models initialized successfully!")
 
+    def _load_model(self, model_path: Path, max_batch: int = 1, int8: bool = False) -> YOLO:
+        """
+        Load a trained model, as a TensorRT FP16 engine when CUDA is available.
+
+        The engine is exported once next to the .pt and reused on later starts.
+        It is built with a dynamic batch dimension up to max_batch, the largest
+        number of frames this service passes to the model in one call; the file
+        name records max_batch, so raising a batch size builds a new engine.
+        int8=True builds an INT8 engine instead when INT8_CALIBRATION_DATA is
+        set; meant for the classifiers, which only use the top-1 class.
+        Falls back to the PyTorch model if TensorRT is unavailable or export fails.
+        """
+        if not (USE_TENSORRT and torch.cuda.is_available()):
+            return YOLO(str(model_path))
+
+        int8 = int8 and INT8_CALIBRATION_DATA is not None
+        engine_path = model_path.with_name(f"{model_path.stem}_b{max_batch}{'_int8' if int8 else ''}.engine")
+        if not engine_path.exists():
+            print(f"Exporting TensorRT {'INT8' if int8 else 'FP16'} engine (one-time): {engine_path}")
+            precision = {"int8": True, "data": INT8_CALIBRATION_DATA} if int8 else {"half": True}
+            try:
+                exported = Path(
+                    YOLO(str(model_path)).export(format="engine", dynamic=True, batch=max_batch, device=0, **precision)
+                )
+                if exported != engine_path:
+                    exported.replace(engine_path)
+            except Exception as e:
+                print(f"TensorRT export failed, using PyTorch model: {e}")
+                return YOLO(str(model_path))
+
+        print(f"Using TensorRT engine: {engine_path}")
+        return YOLO(str(engine_path))
+
     def _get_ffmpeg_exe(self) -> str:
         """Return absolute path to an FFmpeg executable."""
         print(f"FFmpeg: server Python = {sys.executable}")
@@ -166,49 +357,143 @@ class AIService:
                 temp_path.unlink()
             return False
 
+    def _frames_with_ambulance(self, frames: Iterable[np.ndarray], batch_size: int):
+        """
+        Yield (frame, ambulance_result) for every frame in *frames*.
+
+        Frames are read batch_size at a time and the ambulance model runs once
+        per batch, amortizing its per-call overhead. ambulance_result is None
+        when no ambulance model is loaded.
+        """
+        frames = iter(frames)
+        while True:
+            batch = list(islice(frames, batch_size))
+            if not batch:
+                return
+
+            if self.ambulance_model is not None:
+                amb_results = self.ambulance_model(batch, verbose=False, conf=0.4)
+            else:
+                amb_results = [None] * len(batch)
+            yield from zip(batch, amb_results)
+
+            if len(batch) < batch_size:
+                return
+
     def _classify_accident(self, frame: np.ndarray) -> Tuple[bool, float]:
         """
         Classify if frame contains an accident.
         Returns: (is_accident, confidence)
         """
+        return self._classify_accident_batch([frame])[0]
+
+    def _classify_accident_batch(self, frames: List[np.ndarray]) -> List[Tuple[bool, float]]:
+        """Classify several frames in one accident-model call; one (is_accident, confidence) per frame."""
         if self.accident_model is None:
-            return False, 0.0
+            return [(False, 0.0)] * len(frames)
 
-        results = self.accident_model(frame, verbose=False)
-        if results and len(results) > 0:
-            probs = results[0].probs
+        classified = []
+        for result in self.accident_model(frames, verbose=False):
+            probs = result.probs
             if probs is not None:
                 # Class 0 = accident, Class 1 = no_accident
                 top1_idx = probs.top1
                 confidence = float(probs.top1conf)
                 is_accident = top1_idx == 0  # 0 = accident class
-                return is_accident, confidence
-        return False, 0.0
+                classified.append((is_accident, confidence))
+            else:
+                classified.append((False, 0.0))
+        return classified
 
     def _classify_traffic(self, frame: np.ndarray) -> Tuple[bool, float, str]:
         """
         Classify if frame shows traffic jam.
         Returns: (is_jam, confidence, status_text)
         """
+        return self._classify_traffic_batch([frame])[0]
+
+    def _classify_traffic_batch(self, frames: List[np.ndarray]) -> List[Tuple[bool, float, str]]:
+        """Classify several frames in one traffic-model call; one (is_jam, confidence, status_text) per frame."""
         if self.traffic_model is None:
-            return False, 0.0, "Không xác định"
+            return [(False, 0.0, "Không xác định")] * len(frames)
 
-        results = self.traffic_model(frame, verbose=False)
-        if results and len(results) > 0:
-            probs = results[0].probs
+        classified = []
+        for result in self.traffic_model(frames, verbose=False):
+            probs = result.probs
             if probs is not None:
                 # Class 0 = jam, Class 1 = no_jam
                 top1_idx = probs.top1
                 confidence = float(probs.top1conf)
                 is_jam = top1_idx == 0  # 0 = jam class
+                classified.append(self._traffic_result(is_jam, confidence))
+            else:
+                classified.append((False, 0.0, "Không xác định"))
+        return classified
+
+    @staticmethod
+    def _traffic_result(is_jam: bool, confidence: float) -> Tuple[bool, float, str]:
+        """Build a (is_jam, confidence, status_text) traffic classification result."""
+        if is_jam:
+            status_text = "Tắc nghẽn"  # Traffic jam
+        else:
+            status_text = "Thông thoáng"  # Free flow
+        return is_jam, confidence, status_text
 
-                if is_jam:
-                    status_text = "Tắc nghẽn"  # Traffic jam
-                else:
-                    status_text = "Thông thoáng"  # Free flow
+    def _classifiers_share_input(self) -> bool:
+        """
+        True when one preprocessed batch can feed both classifiers.
 
-                return is_jam, confidence, status_text
-        return False, 0.0, "Không xác định"
+        Needs both predictors set up (i.e. after the first classifier call)
+        with the same input size, transforms, device and precision. These are
+        ultralytics predictor internals, so any predictor missing one of them
+        (another ultralytics version, a stand-in model) takes the plain
+        model(frames) path instead.
+        """
+        acc = getattr(self.accident_model, "predictor", None)
+        tra = getattr(self.traffic_model, "predictor", None)
+        if acc is None or tra is None:
+            return False
+        for predictor in (acc, tra):
+            if not all(hasattr(predictor, attr) for attr in _SHARED_PREDICTOR_ATTRS):
+                return False
+            if predictor.transforms is None or not all(
+                hasattr(predictor.model, attr) for attr in ("device", "fp16")
+            ):
+                return False
+        return (
+            acc.imgsz == tra.imgsz
+            and repr(acc.transforms) == repr(tra.transforms)
+            and acc.model.device == tra.model.device
+            and acc.model.fp16 == tra.model.fp16
+        )
+
+    def _count_positive_samples(self, frames: List[np.ndarray]) -> Tuple[int, int]:
+        """Run both classifiers once over a batch of sampled frames. Returns (accident_frames, jam_frames)."""
+        if not self._classifiers_share_input():
+            accident_frames = sum(is_accident for is_accident, _ in self._classify_accident_batch(frames))
+            jam_frames = sum(is_jam for is_jam, _, _ in self._classify_traffic_batch(frames))
+            return accident_frames, jam_frames
+
+        # Resize/crop/normalize and copy to the device once, then run both
+        # forward passes on the same tensor, each on its own CUDA stream when
+        # on GPU. Classifier outputs are already softmax probabilities;
+        # class 0 = accident / jam.
+        with torch.inference_mode():
+            batch = self.accident_model.predictor.preprocess(frames)
+            streams = self._classifier_streams if getattr(batch, "is_cuda", False) else (None, None)
+            top1 = []
+            for model, stream in zip((self.accident_model, self.traffic_model), streams):
+                if stream is not None:
+                    stream.wait_stream(torch.cuda.current_stream())  # batch is ready
+                with torch.cuda.stream(stream):
+                    probs = model.predictor.inference(batch)
+                    if isinstance(probs, (list, tuple)):
+                        probs = probs[0]
+                    top1.append(probs.argmax(dim=1))
+            for stream in streams:
+                if stream is not None:
+                    torch.cuda.current_stream().wait_stream(stream)
+        return int((top1[0] == 0).sum()), int((top1[1] == 0).sum())
 
     def _detect_vehicles(self, frame: np.ndarray) -> Tuple[np.ndarray, int, bool]:
         """
@@ -219,20 +504,29 @@ class AIService:
         """
         results = self.vehicle_model(frame, verbose=False, conf=0.25)
 
-        annotated_frame = frame.copy()
+        # The caller still classifies `frame`, so it's copied on first draw
+        annotated_frame = frame
         vehicle_count = 0
         ambulance_detected = False
 
         if results and len(results) > 0:
             boxes = results[0].boxes
-            if boxes is not None:
-                # Count only non-ambulance detections from general model
-                for box in boxes:
-                    class_name = self.vehicle_model.names[int(box.cls[0])]
-                    if class_name != "ambulance":
-                        vehicle_count += 1
-                # Draw annotations from general model
-                annotated_frame = results[0].plot()
+            if boxes is not None and len(boxes) > 0:
+                # Count and draw only vehicle-class detections from general model,
+                # pulling all boxes and classes off the device in one go
+                class_ids = boxes.cls.cpu().numpy().astype(np.int32)
+                is_vehicle = np.isin(class_ids, self._vehicle_class_ids)
+                vehicle_count += int(is_vehicle.sum())
+                if vehicle_count:
+                    annotated_frame = frame.copy()
+                xyxy = boxes.xyxy.cpu().numpy().astype(np.int32)[is_vehicle].tolist()
+                for (x1, y1, x2, y2), class_id in zip(xyxy, class_ids[is_vehicle].tolist()):
+                    cls_name = CLASS_MAP[self.vehicle_model.names[class_id].lower()]
+                    color = BBOX_COLORS.get(cls_name, (0, 255, 0))
+                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+                    cv2.putText(annotated_frame, cls_name,
+                                (x1, max(y1 - 8, 10)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
         # Ambulance detection using dedicated fine-tuned model (threshold: 0.4)
         if self.ambulance_model is not None:
@@ -246,6 +540,8 @@ class AIService:
                             vehicle_count += 1
                             ambulance_detected = True
                             # Draw ambulance boxes on annotated frame
+                            if annotated_frame is frame:
+                                annotated_frame = frame.copy()
                             x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
                             cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
                             conf = float(box.conf[0])
@@ -274,15 +570,18 @@ class AIService:
             # 1. Detect vehicles and annotate
             annotated_frame, vehicle_count, ambulance_detected = self._detect_vehicles(frame)
             if progress_callback:
-                progress_callback(60, "Đang phân loại tai nạn...")
-
-            # 2. Classify accident
-            is_accident, accident_conf = self._classify_accident(frame)
-            if progress_callback:
-                progress_callback(80, "Đang phân loại giao thông...")
-
-            # 3. Classify traffic jam
-            is_jam, traffic_conf, traffic_status = self._classify_traffic(frame)
+                progress_callback(60, "Đang phân loại tai nạn và giao thông...")
+
+            if vehicle_count == 0:
+                # Accidents and jams both involve vehicles: skip the classifiers
+                is_accident, accident_conf = False, 0.0
+                is_jam, traffic_conf, traffic_status = self._traffic_result(False, 0.0)
+            else:
+                # 2. + 3. Classify accident and traffic jam concurrently: separate
+                # models and predictors, and PyTorch releases the GIL during inference
+                accident_future = self._classify_executor.submit(self._classify_accident, frame)
+                is_jam, traffic_conf, traffic_status = self._classify_traffic(frame)
+                is_accident, accident_conf = accident_future.result()
 
         # Override: when ambulance detected, hardcode clear traffic & no accident
         if ambulance_detected:
@@ -338,16 +637,22 @@ class AIService:
         final_output_path = output_path.with_suffix(".mp4")
 
         # --- Setup VideoWriter ---
-        # avc1/H264/X264 require openh264 DLL which may not be available;
-        # mp4v always works. FFmpeg (imageio-ffmpeg) handles H.264 transcoding.
+        # Each failed probe builds an encoder context, so once a codec has
+        # worked, it's tried first and the others only if it stops opening
         out = None
-        for codec in ["mp4v", "XVID", "MJPG"]:
+        candidates = self._VIDEO_CODECS
+        if self._working_fourcc is not None:
+            candidates = (self._working_fourcc,) + tuple(
+                c for c in candidates if c != self._working_fourcc
+            )
+        for codec, fourcc in candidates:
             try:
-                fourcc = cv2.VideoWriter_fourcc(*codec)
                 test = cv2.VideoWriter(str(final_output_path), fourcc, fps, (width, height))
                 if test.isOpened():
                     out = test
-                    print(f"Using codec: {codec}")
+                    if self._working_fourcc != (codec, fourcc):
+                        self._working_fourcc = (codec, fourcc)
+                        print(f"Using codec: {codec}")
                     break
                 test.release()
             except Exception as e:
@@ -368,140 +673,152 @@ class AIService:
 
         # Track history for building TrackedObject with centroid history
         track_histories: Dict[int, TrackedObject] = {}
-        CLASS_MAP = {
-            "car": "car", "xe_oto": "car",
-            "truck": "truck", "xe_tai": "truck", "bus": "truck",
-            "motorcycle": "motorcycle", "moto": "motorcycle", "xe_may": "motorcycle",
-            "ambulance": "ambulance",
-        }
         HISTORY_LEN = 30
         TRACK_BUFFER = 50       # frames before a lost track is pruned
-        BBOX_COLORS = {
-            "car": (0, 255, 0),
-            "motorcycle": (255, 255, 0),
-            "truck": (0, 165, 255),
-            "ambulance": (255, 0, 0),
-        }
 
         # Classification sample interval (~0.5 s)
         sample_interval = max(1, fps // 2)
         frame_id = 0
+        # Sampled frames, including those skipped with no vehicles in view (negatives)
+        sampled_frames = 0
         accident_frames = 0
         jam_frames = 0
+        # Copies of sampled frames awaiting one batched call per classifier
+        sample_batch: List[np.ndarray] = []
+        # Vehicle boxes from the latest tracked frame, redrawn on frames in between
+        last_boxes: List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int], str]] = []
+        vehicles_in_view = False
         ambulance_detected_in_video = False
+        # Same vehicle whitelist as _detect_vehicles, so image and video counts
+        # agree (no people etc.; ambulances come from the dedicated model)
+        vehicle_classes = self._vehicle_class_ids.tolist()
 
         if progress_callback:
             progress_callback(5, "Đang khởi tạo xử lý video...")
 
-        cap = cv2.VideoCapture(str(input_path))
+        # Decoding and encoding run on their own threads, overlapping with inference
+        cap = _open_video(input_path)
+        frames = _decode_frames(cap)
+        writer = _BackgroundWriter(out)
         try:
           with self._inference_lock, torch.no_grad():
             # Reset ByteTrack's internal tracker state from any previous video
             self.vehicle_model.predictor = None
 
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # ---- ByteTrack via existing vehicle_model ----
-                results = self.vehicle_model.track(
-                    frame,
-                    persist=True,
-                    conf=0.25,
-                    iou=0.55,
-                    tracker="bytetrack.yaml",
-                    verbose=False,
-                )
-
-                annotated = frame.copy()
-                tracked_objects: List[TrackedObject] = []
-                active_ids: set = set()
-
-                boxes = results[0].boxes if results else None
-                if boxes is not None:
-                    for box in boxes:
-                        if box.id is None:
-                            continue
-                        track_id = int(box.id[0])
-                        class_id = int(box.cls[0])
-                        conf = float(box.conf[0])
-                        x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                        raw_name = self.vehicle_model.names.get(class_id, "unknown")
-                        # Skip ambulance from general model — use dedicated model
-                        if raw_name.lower() == "ambulance":
-                            continue
-                        cls_name = CLASS_MAP.get(raw_name.lower(), raw_name.lower())
-                        centroid = ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
-                        active_ids.add(track_id)
-
-                        # Update or create track history
-                        if track_id in track_histories:
-                            obj = track_histories[track_id]
-                            obj.bbox = (x1, y1, x2, y2)
-                            obj.confidence = conf
-                            obj.centroid = centroid
-                            obj.frame_id = frame_id
-                            obj.centroid_history.append(centroid)
-                            obj.frame_history.append(frame_id)
-                            if len(obj.centroid_history) > HISTORY_LEN:
-                                obj.centroid_history = obj.centroid_history[-HISTORY_LEN:]
-                                obj.frame_history = obj.frame_history[-HISTORY_LEN:]
-                        else:
-                            obj = TrackedObject(
-                                track_id=track_id,
-                                bbox=(x1, y1, x2, y2),
-                                class_id=class_id,
-                                class_name=cls_name,
-                                confidence=conf,
-                                centroid=centroid,
-                                frame_id=frame_id,
-                                centroid_history=[centroid],
-                                frame_history=[frame_id],
-                            )
-                            track_histories[track_id] = obj
+            # ByteTrack is stateful and must see frames one by one; the stateless
+            # ambulance and classification models run on batches of frames.
+            for frame, amb_result in self._frames_with_ambulance(frames, AMBULANCE_BATCH_SIZE):
+                # Each decoded frame is a fresh array that's only written out after this
+                annotated = frame
+
+                # ---- ByteTrack via existing vehicle_model (every VIDEO_DETECTION_INTERVAL-th frame) ----
+                if frame_id % VIDEO_DETECTION_INTERVAL == 0:
+                    results = self.vehicle_model.track(
+                        frame,
+                        persist=True,
+                        conf=0.25,
+                        iou=0.55,
+                        classes=vehicle_classes,
+                        tracker="bytetrack.yaml",
+                        verbose=False,
+                    )
 
-                        tracked_objects.append(obj)
+                    tracked_objects: List[TrackedObject] = []
+                    active_ids: set = set()
+                    last_boxes = []
+
+                    boxes = results[0].boxes if results else None
+                    if boxes is not None:
+                        for box in boxes:
+                            if box.id is None:
+                                continue
+                            track_id = int(box.id[0])
+                            class_id = int(box.cls[0])
+                            conf = float(box.conf[0])
+                            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+                            cls_name = CLASS_MAP[self.vehicle_model.names[class_id].lower()]
+                            centroid = ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+                            active_ids.add(track_id)
+
+                            # Update or create track history
+                            if track_id in track_histories:
+                                obj = track_histories[track_id]
+                                obj.bbox = (x1, y1, x2, y2)
+                                obj.confidence = conf
+                                obj.centroid = centroid
+                                obj.frame_id = frame_id
+                                obj.update_history(HISTORY_LEN)
+                            else:
+                                obj = TrackedObject(
+                                    track_id=track_id,
+                                    bbox=(x1, y1, x2, y2),
+                                    class_id=class_id,
+                                    class_name=cls_name,
+                                    confidence=conf,
+                                    centroid=centroid,
+                                    frame_id=frame_id,
+                                    history_length=HISTORY_LEN,
+                                )
+                                track_histories[track_id] = obj
+
+                            tracked_objects.append(obj)
+
+                            # Bounding box + label, drawn below (and on skipped frames)
+                            color = BBOX_COLORS.get(cls_name, (0, 255, 0))
+                            last_boxes.append(((x1, y1, x2, y2), color, f"{cls_name} #{track_id}"))
+
+                    # Prune stale track histories
+                    stale = [
+                        tid for tid, obj in track_histories.items()
+                        if tid not in active_ids and frame_id - obj.frame_id > TRACK_BUFFER
+                    ]
+                    for tid in stale:
+                        del track_histories[tid]
+
+                    # ---- Update vehicle counter ----
+                    counter.update(tracked_objects, frame_id)
+                    vehicles_in_view = boxes is not None and len(boxes) > 0
 
-                        # Draw bounding box + label
-                        color = BBOX_COLORS.get(cls_name, (0, 255, 0))
-                        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
-                        cv2.putText(
-                            annotated, f"{cls_name} #{track_id}",
-                            (x1, max(y1 - 8, 10)),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1,
-                        )
+                # ---- Classification sampling ----
+                # Copied before anything is drawn, since the frame is annotated in place.
+                # A sample with no vehicles in view still counts toward the jam
+                # ratio's denominator, as neither accident nor jam, without running
+                # the classifiers.
+                if frame_id % sample_interval == 0:
+                    sampled_frames += 1
+                    if vehicles_in_view:
+                        sample_batch.append(frame.copy())
+                        if len(sample_batch) >= CLASSIFICATION_BATCH_SIZE:
+                            accidents, jams = self._count_positive_samples(sample_batch)
+                            accident_frames += accidents
+                            jam_frames += jams
+                            sample_batch.clear()
+
+                for (x1, y1, x2, y2), color, label in last_boxes:
+                    cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+                    cv2.putText(
+                        annotated, label,
+                        (x1, max(y1 - 8, 10)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1,
+                    )
 
                 # Ambulance detection using dedicated fine-tuned model (threshold: 0.4)
-                if self.ambulance_model is not None:
-                    amb_results = self.ambulance_model(frame, verbose=False, conf=0.4)
-                    if amb_results and len(amb_results) > 0:
-                        amb_boxes = amb_results[0].boxes
-                        if amb_boxes is not None:
-                            for box in amb_boxes:
-                                class_name = self.ambulance_model.names[int(box.cls[0])]
-                                if class_name == "ambulance":
-                                    ambulance_detected_in_video = True
-                                    x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                                    conf = float(box.conf[0])
-                                    # Draw ambulance box
-                                    cv2.rectangle(annotated, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                                    cv2.putText(
-                                        annotated, f"ambulance {conf:.2f}",
-                                        (x1, max(y1 - 8, 10)),
-                                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 0, 0), 1,
-                                    )
-
-                # Prune stale track histories
-                stale = [
-                    tid for tid, obj in track_histories.items()
-                    if tid not in active_ids and frame_id - obj.frame_id > TRACK_BUFFER
-                ]
-                for tid in stale:
-                    del track_histories[tid]
+                amb_boxes = amb_result.boxes if amb_result is not None else None
+                if amb_boxes is not None:
+                    for box in amb_boxes:
+                        class_name = self.ambulance_model.names[int(box.cls[0])]
+                        if class_name == "ambulance":
+                            ambulance_detected_in_video = True
+                            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+                            conf = float(box.conf[0])
+                            # Draw ambulance box
+                            cv2.rectangle(annotated, (x1, y1), (x2, y2), (255, 0, 0), 2)
+                            cv2.putText(
+                                annotated, f"ambulance {conf:.2f}",
+                                (x1, max(y1 - 8, 10)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 0, 0), 1,
+                            )
 
-                # ---- Update vehicle counter ----
-                counter.update(tracked_objects, frame_id)
 
                 # ---- Draw counting line + live counts overlay ----
                 line_y = counter.line_y_coord
@@ -524,16 +841,7 @@ class AIService:
                         (8, y_off), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 1,
                     )
 
-                # ---- Classification sampling ----
-                if frame_id % sample_interval == 0:
-                    is_accident, _ = self._classify_accident(frame)
-                    is_jam, _, _ = self._classify_traffic(frame)
-                    if is_accident:
-                        accident_frames += 1
-                    if is_jam:
-                        jam_frames += 1
-
-                out.write(annotated)
+                writer.write(annotated)
                 frame_id += 1
 
                 if frame_id % 100 == 0:
@@ -548,9 +856,19 @@ class AIService:
                             f"Đang xử lý frame {frame_id}/{total_frames} ({pct:.0f}%)",
                         )
 
+            if sample_batch:
+                accidents, jams = self._count_positive_samples(sample_batch)
+                accident_frames += accidents
+                jam_frames += jams
+                sample_batch.clear()
+
         finally:
+            frames.close()
             cap.release()
-            out.release()
+            try:
+                writer.close()
+            finally:
+                out.release()
 
         # Re-encode to browser-compatible H.264/yuv420p
         if progress_callback:
@@ -559,7 +877,7 @@ class AIService:
         self._transcode_for_browser(final_output_path)
 
         # ---- Final classification results ----
-        total_samples = max(1, frame_id // sample_interval)
+        total_samples = max(1, sampled_frames)
         jam_detected = jam_frames > total_samples * 0.3
         accident_detected = accident_frames > 0
         traffic_status = "Tắc nghẽn" if jam_detected else "Thông thoáng"
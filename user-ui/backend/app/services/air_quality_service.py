@@ -3,17 +3,26 @@
 # Completely free, no API key needed: https://open-meteo.com/
 
 import time
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any, Optional
 
-from app.core.config import WAQI_CACHE_TTL
+from app.core.config import WAQI_CACHE_TTL, WAQI_CACHE_MAX_ENTRIES
 
 logger = logging.getLogger(__name__)
 
 # Open-Meteo Air Quality API
 OPEN_METEO_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
 CURRENT_PARAMS = "us_aqi,pm10,pm2_5,carbon_monoxide,nitrogen_dioxide,sulphur_dioxide,ozone,uv_index"
+# Expired cache entries are swept once every this many writes
+CACHE_SWEEP_INTERVAL = 64
+# Concurrent point requests: a 3x3 grid plus the center point
+FETCH_WORKERS = 10
 
 
 class AirQualityService:
@@ -35,25 +44,59 @@ class AirQualityService:
     ]
 
     def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # LRU order: least recently used first
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self._cache_ttl = WAQI_CACHE_TTL
+        self._cache_max_entries = WAQI_CACHE_MAX_ENTRIES
+        self._cache_writes = 0
+        self._cache_lock = threading.Lock()
+        # Upper bounds of the AQI buckets and the info returned for each
+        self._health_cuts = [level["max"] for level in self.HEALTH_LEVELS]
+        self._health_info = [
+            {"label": level["label"], "color": level["color"], "advice": level["advice"]}
+            for level in self.HEALTH_LEVELS
+        ]
+        # One pooled session so grid requests reuse TCP/TLS connections
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="aqi-fetch")
         print("🌬️ Air quality service initialized (Open-Meteo, free, no API key)")
 
     def _get_health_info(self, aqi: int) -> Dict[str, str]:
-        for level in self.HEALTH_LEVELS:
-            if aqi <= level["max"]:
-                return {"label": level["label"], "color": level["color"], "advice": level["advice"]}
+        idx = bisect_left(self._health_cuts, aqi)
+        if idx < len(self._health_info):
+            return self._health_info[idx]
         return self.HEALTH_LEVELS[-1]
 
-    def _is_cache_valid(self, key: str) -> bool:
-        if key not in self._cache:
-            return False
-        return (time.time() - self._cache[key]["_ts"]) < self._cache_ttl
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cache entry (marking it recently used), or None."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None or (time.time() - entry["_ts"]) >= self._cache_ttl:
+                return None
+            self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a cache entry, evicting the least recently used past the size bound."""
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            self._cache_writes += 1
+            if self._cache_writes % CACHE_SWEEP_INTERVAL == 0:
+                now = time.time()
+                expired = [k for k, v in self._cache.items() if now - v["_ts"] >= self._cache_ttl]
+                for k in expired:
+                    del self._cache[k]
+            while len(self._cache) > self._cache_max_entries:
+                self._cache.popitem(last=False)
 
     def _fetch_point(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """Fetch AQI data for a single coordinate from Open-Meteo."""
         try:
-            resp = requests.get(OPEN_METEO_URL, params={
+            resp = self._session.get(OPEN_METEO_URL, params={
                 "latitude": lat,
                 "longitude": lng,
                 "current": CURRENT_PARAMS,
@@ -105,23 +148,24 @@ class AirQualityService:
         grid_size=3 produces a 3x3 grid = 9 points.
         """
         cache_key = f"grid_{round(lat, 2)}_{round(lng, 2)}_{radius_km}_{grid_size}"
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]["data"]
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached["data"]
 
         # ~0.009 degrees per km
         offset = radius_km * 0.009
         step = (2 * offset) / (grid_size - 1) if grid_size > 1 else 0
 
-        points = []
-        for row in range(grid_size):
-            for col in range(grid_size):
-                p_lat = (lat - offset) + row * step
-                p_lng = (lng - offset) + col * step
-                result = self._fetch_point(p_lat, p_lng)
-                if result:
-                    points.append(result)
+        coords = [
+            ((lat - offset) + row * step, (lng - offset) + col * step)
+            for row in range(grid_size)
+            for col in range(grid_size)
+        ]
+        # Network-bound, so fetch all points at once; map() keeps grid order
+        results = self._executor.map(lambda p: self._fetch_point(*p), coords)
+        points = [result for result in results if result]
 
-        self._cache[cache_key] = {"data": points, "_ts": time.time()}
+        self._cache_put(cache_key, {"data": points, "_ts": time.time()})
         logger.info(f"AQI grid: {len(points)} points fetched around ({lat}, {lng})")
         return points
 
@@ -131,14 +175,16 @@ class AirQualityService:
         Returns the center point detail + surrounding grid points.
         """
         cache_key = f"full_{round(lat, 3)}_{round(lng, 3)}_{radius_km}"
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-        # Center point with full detail
-        center = self._fetch_point(lat, lng)
+        # Center point with full detail, fetched alongside the grid
+        center_future = self._executor.submit(self._fetch_point, lat, lng)
 
         # Grid of surrounding points
         grid = self.get_aqi_grid(lat, lng, radius_km, grid_size=3)
+        center = center_future.result()
 
         result = {
             "center": center,
@@ -154,7 +200,7 @@ class AirQualityService:
             "_ts": time.time(),
         }
 
-        self._cache[cache_key] = result
+        self._cache_put(cache_key, result)
         return result
 
 
@@ -3,8 +3,10 @@ Chat Service - Orchestrates the chatbot logic with topic validation, RAG, and LL
 """
 
 import os
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Union
 
 from app.validators.topic_validator import TopicValidator, ValidationResult, TopicCategory
 from app.models.chat_models import (
@@ -12,14 +14,31 @@ from app.models.chat_models import (
     ChatResponse,
     SourceReference,
 )
-from app.knowledge.traffic_law_kb import traffic_law_kb, TrafficLawKB
+from app.knowledge.traffic_law_kb import traffic_law_kb, TrafficLawKB, _VEHICLE_VN_VI
 from app.services.traffic_service import traffic_service
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_batcher import LLMBatcher
 from app.prompts.traffic_law_prompt import build_chat_prompt, format_chat_history
 from app.core.config import RAG_FAQ_THRESHOLD, RAG_VIOLATION_THRESHOLD, RAG_GPLX_THRESHOLD
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Sampling temperature for chat answers; only prompts at this temperature are batched
+DEFAULT_TEMPERATURE = 0.7
+
+
+@dataclass
+class _LLMTurn:
+    """A message that needs an LLM answer: the prompt plus what the response is built from."""
+    message: str
+    session_id: Optional[str]
+    validation: ValidationResult
+    sources: List[SourceReference]
+    prompt: str
+    cacheable: bool
+    cache_context: Tuple[Optional[str], str, str]  # intent, RAG context, chat history
+
 
 class ChatService:
     """
@@ -45,6 +64,8 @@ class ChatService:
         self.knowledge_base = knowledge_base or traffic_law_kb
         self.llm_provider = llm_provider
         self._llm_client = None
+        self.llm_cache = LLMResponseCache()
+        self.llm_batcher = LLMBatcher(self._complete)
 
     def _get_llm_client(self):
         """Lazy initialization of LLM client."""
@@ -85,7 +106,7 @@ class ChatService:
         self,
         prompt: str,
         max_tokens: int = 1024,
-        temperature: float = 0.7,
+        temperature: float = DEFAULT_TEMPERATURE,
     ) -> str:
         """
         Call LLM with the given prompt.
@@ -100,38 +121,72 @@ class ChatService:
         """
         client = self._get_llm_client()
 
-        if client is None:
+        if client is None or self.llm_provider not in ("openai", "anthropic"):
             # Return a mock response when no LLM is configured
             return self._generate_mock_response(prompt)
 
         try:
-            if self.llm_provider == "openai":
-                response = client.chat.completions.create(
-                    model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                )
-                return response.choices[0].message.content or ""
-
-            elif self.llm_provider == "anthropic":
-                response = client.messages.create(
-                    model=os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307"),
-                    max_tokens=max_tokens,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                return response.content[0].text if response.content else ""
-
-            else:
-                # Unknown provider, use mock response
-                return self._generate_mock_response(prompt)
+            if self.llm_batcher.enabled and temperature == DEFAULT_TEMPERATURE:
+                # Coalesced with concurrent requests into one provider call
+                return await asyncio.wrap_future(self.llm_batcher.submit(prompt, max_tokens))
+            return self._complete(prompt, max_tokens, temperature)
 
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
             return self._generate_fallback_response()
 
-        # Fallback (should not reach here)
-        return self._generate_fallback_response()
+    def _complete(self, prompt: str, max_tokens: int = 1024, temperature: float = DEFAULT_TEMPERATURE) -> str:
+        """Send one prompt to the configured provider and return the reply text (raises on failure)."""
+        client = self._get_llm_client()
+
+        if self.llm_provider == "openai":
+            response = client.chat.completions.create(
+                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            return response.choices[0].message.content or ""
+
+        response = client.messages.create(
+            model=os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307"),
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return response.content[0].text if response.content else ""
+
+    def _stream_llm(
+        self,
+        prompt: str,
+        max_tokens: int = 1024,
+        temperature: float = DEFAULT_TEMPERATURE,
+    ) -> Iterator[str]:
+        """Yield the reply to prompt in chunks as the provider generates it (raises on failure)."""
+        client = self._get_llm_client()
+
+        if client is None or self.llm_provider not in ("openai", "anthropic"):
+            yield self._generate_mock_response(prompt)
+            return
+
+        if self.llm_provider == "openai":
+            stream = client.chat.completions.create(
+                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            return
+
+        with client.messages.stream(
+            model=os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307"),
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            yield from stream.text_stream
 
     def _generate_mock_response(self, prompt: str) -> str:
         """Generate a mock response when LLM is not available."""
@@ -253,9 +308,13 @@ Bạn có thể:
         Used when RAG has high-confidence results.
         """
         response_parts = []
+        faq_results = search_results.get("faq", [])
+        violation_results = search_results.get("violations", [])
+        gplx_results = search_results.get("gplx", [])
+        sl = search_results.get("speed_limits")
+        ps = search_results.get("point_system")
 
         # Format FAQ answers (highest priority)
-        faq_results = search_results.get("faq", [])
         if faq_results:
             top_faq = faq_results[0]
             response_parts.append(f"**{top_faq.get('question', '')}**\n")
@@ -269,61 +328,46 @@ Bạn có thể:
                     response_parts.append(f"- {faq.get('question', '')}")
                 response_parts.append("")
 
-        # Format violations
-        violation_results = search_results.get("violations", [])
+        # Format violations, one block of lines per violation
         if violation_results and not faq_results:  # Only if FAQ didn't answer
             response_parts.append("**Thông tin vi phạm:**\n")
             for i, v in enumerate(violation_results[:3], 1):
-                response_parts.append(f"{i}. **{v.get('category', '')}** ({v.get('vehicle_type', '')})")
-                response_parts.append(f"   - Vi phạm: {v.get('content', '')}")
-                response_parts.append(f"   - Mức phạt: {v.get('fine', '')}")
-                if v.get("license_suspension"):
-                    response_parts.append(f"   - {v.get('license_suspension')}")
-                if v.get("points_deducted"):
-                    response_parts.append(f"   - {v.get('points_deducted')}")
-                response_parts.append("")
+                suspension = v.get("license_suspension")
+                points = v.get("points_deducted")
+                response_parts.append(
+                    f"{i}. **{v.get('category', '')}** ({v.get('vehicle_type', '')})\n"
+                    f"   - Vi phạm: {v.get('content', '')}\n"
+                    f"   - Mức phạt: {v.get('fine', '')}\n"
+                    + (f"   - {suspension}\n" if suspension else "")
+                    + (f"   - {points}\n" if points else "")
+                )
 
         # Format GPLX info
-        gplx_results = search_results.get("gplx", [])
         if gplx_results and not faq_results:  # Only if FAQ didn't answer
             response_parts.append("**Thông tin giấy phép lái xe:**\n")
-            for g in gplx_results[:2]:
-                response_parts.append(f"- {g.get('content', '')}")
+            response_parts.extend([f"- {g.get('content', '')}" for g in gplx_results[:2]])
             response_parts.append("")
 
         # Format speed limits
-        if search_results.get("speed_limits"):
-            sl = search_results["speed_limits"]
+        if sl:
             response_parts.append("**Quy định tốc độ (Luật GTĐB 2024):**\n")
             response_parts.append("*Trong đô thị:*")
-            if sl.get("urban"):
-                for vehicle, speed in sl["urban"].items():
-                    vehicle_vn = {
-                        "xe_may": "Xe máy",
-                        "oto_con": "Ô tô con",
-                        "oto_tai": "Xe tải",
-                        "xe_khach": "Xe khách",
-                    }.get(vehicle, vehicle)
-                    response_parts.append(f"- {vehicle_vn}: {speed} km/h")
+            response_parts.extend([
+                f"- {_VEHICLE_VN_VI.get(vehicle, vehicle)}: {speed} km/h"
+                for vehicle, speed in (sl.get("urban") or {}).items()
+            ])
             response_parts.append("\n*Ngoài đô thị:*")
-            if sl.get("rural"):
-                for vehicle, speed in sl["rural"].items():
-                    vehicle_vn = {
-                        "xe_may": "Xe máy",
-                        "oto_con": "Ô tô con",
-                        "oto_tai": "Xe tải",
-                        "xe_khach": "Xe khách",
-                    }.get(vehicle, vehicle)
-                    response_parts.append(f"- {vehicle_vn}: {speed} km/h")
+            response_parts.extend([
+                f"- {_VEHICLE_VN_VI.get(vehicle, vehicle)}: {speed} km/h"
+                for vehicle, speed in (sl.get("rural") or {}).items()
+            ])
             response_parts.append("")
 
         # Format point system
-        if search_results.get("point_system"):
-            ps = search_results["point_system"]
+        if ps:
             response_parts.append("**Hệ thống trừ điểm GPLX (từ 01/01/2025):**")
             response_parts.append(f"- Tổng điểm: {ps.get('total_points', 12)} điểm/năm")
-            for rule in ps.get("rules", [])[:5]:
-                response_parts.append(f"- {rule.get('rule', '')}")
+            response_parts.extend([f"- {rule.get('rule', '')}" for rule in ps.get("rules", [])[:5]])
             response_parts.append("")
 
         # Add footer note
@@ -332,27 +376,13 @@ Bạn có thể:
 
         return "\n".join(response_parts)
 
-    async def process_message(
-        self,
-        request: ChatRequest,
-    ) -> ChatResponse:
+    def _prepare_message(self, request: ChatRequest) -> Union[ChatResponse, _LLMTurn]:
         """
-        Process a chat message through the full pipeline.
+        Run the pipeline up to the LLM call.
 
-        Pipeline:
-        1. Validate request
-        2. Check topic validity
-        3. Handle greetings (no LLM needed)
-        4. Search knowledge base (RAG)
-        5. Build prompt with context
-        6. Call LLM
-        7. Return response
-
-        Args:
-            request: ChatRequest with message and optional history
-
-        Returns:
-            ChatResponse with answer and metadata
+        Returns the final ChatResponse when no LLM is needed (invalid request,
+        greeting, off-topic, traffic status, sufficient RAG results), otherwise
+        the _LLMTurn to send to the LLM.
         """
         # Step 1: Validate request
         is_valid, error = request.validate()
@@ -440,38 +470,128 @@ Bạn có thể:
             ) or ""
 
         chat_history_str = format_chat_history(request.chat_history)
-        prompt = build_chat_prompt(
-            user_message=message,
-            rag_context=rag_context,
-            chat_history=chat_history_str,
-            traffic_context=traffic_context,
+
+        return _LLMTurn(
+            message=message,
+            session_id=request.session_id,
+            validation=validation,
+            sources=sources,
+            prompt=build_chat_prompt(
+                user_message=message,
+                rag_context=rag_context,
+                chat_history=chat_history_str,
+                traffic_context=traffic_context,
+            ),
+            # Live traffic context changes between calls, so those answers aren't cached
+            cacheable=not traffic_context and self._get_llm_client() is not None,
+            cache_context=(intent, rag_context, chat_history_str),
         )
 
-        # Step 8: Call LLM
-        try:
-            llm_response = await self._call_llm(prompt)
-        except Exception as e:
-            logger.error(f"Error calling LLM: {e}")
-            llm_response = self._generate_fallback_response()
+    def _cached_answer(self, turn: _LLMTurn) -> Optional[str]:
+        """Cached answer to the same question asked in the same context, if any."""
+        if not turn.cacheable:
+            return None
+        answer = self.llm_cache.lookup(turn.message, *turn.cache_context)
+        if answer is not None:
+            logger.info("Using cached LLM response")
+        return answer
 
-        # Step 9: Return response
+    def _cache_answer(self, turn: _LLMTurn, answer: str) -> None:
+        if turn.cacheable and answer and answer != self._generate_fallback_response():
+            self.llm_cache.store(turn.message, answer, *turn.cache_context)
+
+    def _llm_response(self, turn: _LLMTurn, content: str) -> ChatResponse:
         return ChatResponse(
-            content=llm_response,
+            content=content,
             is_ai_generated=True,
             topic_valid=True,
-            session_id=request.session_id,
-            sources=sources,
-            category=validation.category.value,
-            confidence=validation.confidence,
+            session_id=turn.session_id,
+            sources=turn.sources,
+            category=turn.validation.category.value,
+            confidence=turn.validation.confidence,
         )
 
+    async def process_message(
+        self,
+        request: ChatRequest,
+    ) -> ChatResponse:
+        """
+        Process a chat message through the full pipeline.
+
+        Pipeline:
+        1. Validate request
+        2. Check topic validity
+        3. Handle greetings (no LLM needed)
+        4. Search knowledge base (RAG)
+        5. Build prompt with context
+        6. Call LLM (or reuse a cached answer)
+        7. Return response
+
+        Args:
+            request: ChatRequest with message and optional history
+
+        Returns:
+            ChatResponse with answer and metadata
+        """
+        turn = self._prepare_message(request)
+        if isinstance(turn, ChatResponse):
+            return turn
+
+        # Step 8: Reuse a cached answer to the same question in the same context
+        llm_response = self._cached_answer(turn)
+        if llm_response is None:
+            # Step 9: Call LLM
+            try:
+                llm_response = await self._call_llm(turn.prompt)
+            except Exception as e:
+                logger.error(f"Error calling LLM: {e}")
+                llm_response = self._generate_fallback_response()
+            self._cache_answer(turn, llm_response)
+
+        # Step 10: Return response
+        return self._llm_response(turn, llm_response)
+
+    def process_message_stream(self, request: ChatRequest) -> Iterator[Tuple[str, Any]]:
+        """
+        Process a chat message, streaming the LLM answer as it is generated.
+
+        Yields ("delta", text) for each chunk of the answer, then ("done",
+        ChatResponse) with the full answer. Answers that need no LLM (and
+        cached answers) arrive as a single delta.
+        """
+        turn = self._prepare_message(request)
+        if isinstance(turn, ChatResponse):
+            if turn.content:
+                yield "delta", turn.content
+            yield "done", turn
+            return
+
+        cached = self._cached_answer(turn)
+        if cached is not None:
+            yield "delta", cached
+            yield "done", self._llm_response(turn, cached)
+            return
+
+        parts: List[str] = []
+        try:
+            for text in self._stream_llm(turn.prompt):
+                parts.append(text)
+                yield "delta", text
+        except Exception as e:
+            logger.error(f"LLM stream failed: {e}")
+            # Keep a partial answer as-is; only an empty one gets the fallback
+            if not parts:
+                parts.append(self._generate_fallback_response())
+                yield "delta", parts[0]
+        else:
+            self._cache_answer(turn, "".join(parts))
+        yield "done", self._llm_response(turn, "".join(parts))
+
     def process_message_sync(self, request: ChatRequest) -> ChatResponse:
         """
         Synchronous wrapper for process_message.
         Use this for non-async contexts.
         """
-        import asyncio
-
         try:
             loop = asyncio.get_event_loop()
         except RuntimeError:
@@ -1,15 +1,24 @@
 import json
+import random
 import re
+import sqlite3
 import threading
 import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
 from app.core.config import DATA_DIR
 
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keywords are then matched by regex / one by one
+    ahocorasick = None
+
+# posts.json is the seed data, imported into posts.db when the database is created
 POSTS_FILE = DATA_DIR / "posts.json"
-_lock = threading.Lock()
+POSTS_DB = DATA_DIR / "posts.db"
 
 # ==================== CONTENT MODERATION ====================
 
@@ -65,13 +74,45 @@ TRAFFIC_COMMUNITY_KEYWORDS = [
     "công trình", "rào chắn", "phân luồng",
 ]
 
-# Pre-compile regex for sensitive keywords (word boundary matching)
+# Keywords are matched against the lowercased post, so they're lowercased once here
+# (otherwise mixed-case ones such as "CSGT" or "Hà Nội" could never match)
+_SENSITIVE_KEYWORDS_LC = [kw.lower() for kw in SENSITIVE_KEYWORDS]
+_TRAFFIC_KEYWORDS_LC = [kw.lower() for kw in TRAFFIC_COMMUNITY_KEYWORDS]
+
+# Pre-compile regex for sensitive keywords; case-sensitive since both sides are lowercase
 _sensitive_pattern = re.compile(
-    r'(?:' + '|'.join(re.escape(kw) for kw in SENSITIVE_KEYWORDS) + r')',
-    re.IGNORECASE
+    r'(?:' + '|'.join(re.escape(kw) for kw in _SENSITIVE_KEYWORDS_LC) + r')'
 )
 
 
+def _build_automaton(keywords):
+    """Compile keywords into an Aho-Corasick automaton (None without pyahocorasick)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for kw in keywords:
+        automaton.add_word(kw, kw)
+    automaton.make_automaton()
+    return automaton
+
+
+# One pass over the post finds any keyword of each list
+_sensitive_ac = _build_automaton(_SENSITIVE_KEYWORDS_LC)
+_traffic_ac = _build_automaton(_TRAFFIC_KEYWORDS_LC)
+
+
+def _has_sensitive_keyword(text):
+    if _sensitive_ac is not None:
+        return next(_sensitive_ac.iter(text), None) is not None
+    return _sensitive_pattern.search(text) is not None
+
+
+def _has_traffic_keyword(text):
+    if _traffic_ac is not None:
+        return next(_traffic_ac.iter(text), None) is not None
+    return any(kw in text for kw in _TRAFFIC_KEYWORDS_LC)
+
+
 def validate_post_content(content):
     """Validate post content for moderation.
 
@@ -80,12 +121,11 @@ def validate_post_content(content):
     text = content.lower().strip()
 
     # Check sensitive content
-    if _sensitive_pattern.search(text):
+    if _has_sensitive_keyword(text):
         return False, "Nội dung chứa từ ngữ không phù hợp. Vui lòng chỉnh sửa và thử lại."
 
     # Check traffic relevance
-    has_traffic_keyword = any(kw in text for kw in TRAFFIC_COMMUNITY_KEYWORDS)
-    if not has_traffic_keyword:
+    if not _has_traffic_keyword(text):
         return False, "Nội dung không liên quan đến giao thông. Cộng đồng này chỉ dành cho các chủ đề về giao thông, đường xá và phương tiện."
 
     return True, ""
@@ -94,32 +134,182 @@ def validate_post_content(content):
 REPORT_THRESHOLD = 3
 
 
-def _read_posts():
-    """Read posts from JSON file (must hold _lock)."""
-    if not POSTS_FILE.exists():
-        return {"posts": []}
-    with open(POSTS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Columns kept outside the JSON "data" blob: counters, flags and per-session lists
+_POST_STATE_FIELDS = (
+    "likes", "dislikes", "reports", "hidden",
+    "liked_by", "disliked_by", "reported_by", "comments",
+)
+_REACTION_LISTS = {"like": "liked_by", "dislike": "disliked_by", "report": "reported_by"}
+_REACTION_COUNTS = {"like": "likes", "dislike": "dislikes", "report": "reports"}
+
+# Run one statement at a time inside _init_db's write transaction
+# (executescript() would commit it first)
+_SCHEMA = (
+    """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    likes INTEGER NOT NULL DEFAULT 0,
+    dislikes INTEGER NOT NULL DEFAULT 0,
+    reports INTEGER NOT NULL DEFAULT 0,
+    hidden INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+)""",
+    "CREATE INDEX IF NOT EXISTS idx_posts_feed ON posts (hidden, created_at DESC)",
+    """
+CREATE TABLE IF NOT EXISTS reactions (
+    post_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    UNIQUE (post_id, session_id, kind)
+)""",
+    """
+CREATE TABLE IF NOT EXISTS comments (
+    post_id TEXT NOT NULL,
+    data TEXT NOT NULL
+)""",
+    "CREATE INDEX IF NOT EXISTS idx_comments_post ON comments (post_id)",
+)
+
+_local = threading.local()
+
 
+def _connect():
+    """
+    Return this thread's connection to posts.db, creating the schema on first use.
 
-def _write_posts(data):
-    """Write posts to JSON file (must hold _lock)."""
-    POSTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(POSTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    The connection stays open until close_connection() (called at the end of
+    each request) so one request's queries share it.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        POSTS_DB.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; writes open their own transactions (see _write_txn)
+        conn = sqlite3.connect(str(POSTS_DB), timeout=10, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            _init_db(conn)
+        _local.conn = conn
+    return conn
+
+
+def close_connection():
+    """Close this thread's posts.db connection, if it has one."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        _local.conn = None
+        conn.close()
+
+
+def _init_db(conn):
+    """Create the tables and import the posts.json seed data, once per database."""
+    conn.execute("PRAGMA journal_mode=WAL")  # persistent; not allowed inside a transaction
+    with _write_txn(conn):
+        # Checked under the database write lock: the first connection, from any
+        # thread or process, creates the schema and imports the seed data
+        if conn.execute("PRAGMA user_version").fetchone()[0] != 0:
+            return
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        if POSTS_FILE.exists():
+            with open(POSTS_FILE, "r", encoding="utf-8") as f:
+                for post in json.load(f).get("posts", []):
+                    _insert_post(conn, post)
+        conn.execute("PRAGMA user_version = 1")
+
+
+@contextmanager
+def _write_txn(conn):
+    """Run a write transaction, taking the database write lock up front."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _insert_post(conn, post):
+    data = {k: v for k, v in post.items() if k not in _POST_STATE_FIELDS}
+    conn.execute(
+        "INSERT INTO posts (id, created_at, likes, dislikes, reports, hidden, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            post["id"], post["created_at"], post.get("likes", 0), post.get("dislikes", 0),
+            post.get("reports", 0), int(post.get("hidden", False)), json.dumps(data, ensure_ascii=False),
+        ),
+    )
+    for kind, list_field in _REACTION_LISTS.items():
+        conn.executemany(
+            "INSERT OR IGNORE INTO reactions (post_id, session_id, kind) VALUES (?, ?, ?)",
+            [(post["id"], session_id, kind) for session_id in post.get(list_field, [])],
+        )
+    conn.executemany(
+        "INSERT INTO comments (post_id, data) VALUES (?, ?)",
+        [(post["id"], json.dumps(comment, ensure_ascii=False)) for comment in post.get("comments", [])],
+    )
+
+
+def _build_posts(rows, reactions, comments):
+    """Assemble post dicts from post rows plus their (post_id, ...) reaction and comment rows."""
+    posts = {}
+    for post_id, likes, dislikes, reports, hidden, data in rows:
+        post = json.loads(data)
+        post.update(
+            likes=likes, dislikes=dislikes, reports=reports, hidden=bool(hidden),
+            liked_by=[], disliked_by=[], reported_by=[], comments=[],
+        )
+        posts[post_id] = post
+    for post_id, session_id, kind in reactions:
+        posts[post_id][_REACTION_LISTS[kind]].append(session_id)
+    for post_id, data in comments:
+        posts[post_id]["comments"].append(json.loads(data))
+    return list(posts.values())
+
+
+_POST_COLUMNS = "id, likes, dislikes, reports, hidden, data"
+
+
+def _load_post(conn, post_id):
+    """Return the full post dict, or None if it doesn't exist."""
+    rows = conn.execute(f"SELECT {_POST_COLUMNS} FROM posts WHERE id = ?", (post_id,)).fetchall()
+    if not rows:
+        return None
+    reactions = conn.execute(
+        "SELECT post_id, session_id, kind FROM reactions WHERE post_id = ? ORDER BY rowid", (post_id,)
+    ).fetchall()
+    comments = conn.execute(
+        "SELECT post_id, data FROM comments WHERE post_id = ? ORDER BY rowid", (post_id,)
+    ).fetchall()
+    return _build_posts(rows, reactions, comments)[0]
 
 
 def get_posts(page=1, per_page=20, session_id=None):
     """Return paginated posts, newest first. Hidden posts are excluded."""
-    with _lock:
-        data = _read_posts()
-    posts = [p for p in data["posts"] if not p.get("hidden", False)]
-    posts = sorted(posts, key=lambda p: p["created_at"], reverse=True)
-    total = len(posts)
+    conn = _connect()
     start = (page - 1) * per_page
     end = start + per_page
+    page_ids = (
+        "SELECT id FROM posts WHERE hidden = 0 ORDER BY created_at DESC, rowid LIMIT ? OFFSET ?"
+    )
+    args = (per_page, max(start, 0))
+    # One read transaction, so the page, its reactions/comments and the total agree
+    conn.execute("BEGIN")
+    try:
+        total = conn.execute("SELECT COUNT(*) FROM posts WHERE hidden = 0").fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {_POST_COLUMNS} FROM posts WHERE id IN ({page_ids}) ORDER BY created_at DESC, rowid", args
+        ).fetchall()
+        reactions = conn.execute(
+            f"SELECT post_id, session_id, kind FROM reactions WHERE post_id IN ({page_ids}) ORDER BY rowid", args
+        ).fetchall()
+        comments = conn.execute(
+            f"SELECT post_id, data FROM comments WHERE post_id IN ({page_ids}) ORDER BY rowid", args
+        ).fetchall()
+    finally:
+        conn.execute("COMMIT")
     return {
-        "posts": posts[start:end],
+        "posts": _build_posts(rows, reactions, comments),
         "total": total,
         "page": page,
         "per_page": per_page,
@@ -147,55 +337,62 @@ def create_post(author_name, content, images=None, location=None):
         "reported_by": [],
         "hidden": False,
     }
-    with _lock:
-        data = _read_posts()
-        data["posts"].append(post)
-        _write_posts(data)
+    conn = _connect()
+    with _write_txn(conn):
+        _insert_post(conn, post)
     return post
 
 
+def _toggle_reaction(conn, post_id, session_id, kind):
+    """Toggle a session's reaction and its counter (must be in a write txn). Returns True if added."""
+    count = _REACTION_COUNTS[kind]
+    removed = conn.execute(
+        "DELETE FROM reactions WHERE post_id = ? AND session_id = ? AND kind = ?", (post_id, session_id, kind)
+    ).rowcount
+    if removed:
+        conn.execute(f"UPDATE posts SET {count} = MAX(0, {count} - 1) WHERE id = ?", (post_id,))
+        return False
+    conn.execute(
+        "INSERT INTO reactions (post_id, session_id, kind) VALUES (?, ?, ?)", (post_id, session_id, kind)
+    )
+    conn.execute(f"UPDATE posts SET {count} = {count} + 1 WHERE id = ?", (post_id,))
+    return True
+
+
+def _remove_reaction(conn, post_id, session_id, kind):
+    """Drop a session's reaction if present, decrementing its counter (must be in a write txn)."""
+    count = _REACTION_COUNTS[kind]
+    removed = conn.execute(
+        "DELETE FROM reactions WHERE post_id = ? AND session_id = ? AND kind = ?", (post_id, session_id, kind)
+    ).rowcount
+    if removed:
+        conn.execute(f"UPDATE posts SET {count} = MAX(0, {count} - 1) WHERE id = ?", (post_id,))
+
+
+def _post_exists(conn, post_id):
+    return conn.execute("SELECT 1 FROM posts WHERE id = ?", (post_id,)).fetchone() is not None
+
+
 def toggle_like(post_id, session_id):
     """Toggle like for a session. Removes dislike if present."""
-    with _lock:
-        data = _read_posts()
-        post = _find_post(data, post_id)
-        if not post:
+    conn = _connect()
+    with _write_txn(conn):
+        if not _post_exists(conn, post_id):
             return None
-
-        if session_id in post["liked_by"]:
-            post["liked_by"].remove(session_id)
-            post["likes"] = max(0, post["likes"] - 1)
-        else:
-            post["liked_by"].append(session_id)
-            post["likes"] += 1
-            if session_id in post["disliked_by"]:
-                post["disliked_by"].remove(session_id)
-                post["dislikes"] = max(0, post["dislikes"] - 1)
-
-        _write_posts(data)
-        return post
+        if _toggle_reaction(conn, post_id, session_id, "like"):
+            _remove_reaction(conn, post_id, session_id, "dislike")
+        return _load_post(conn, post_id)
 
 
 def toggle_dislike(post_id, session_id):
     """Toggle dislike for a session. Removes like if present."""
-    with _lock:
-        data = _read_posts()
-        post = _find_post(data, post_id)
-        if not post:
+    conn = _connect()
+    with _write_txn(conn):
+        if not _post_exists(conn, post_id):
             return None
-
-        if session_id in post["disliked_by"]:
-            post["disliked_by"].remove(session_id)
-            post["dislikes"] = max(0, post["dislikes"] - 1)
-        else:
-            post["disliked_by"].append(session_id)
-            post["dislikes"] += 1
-            if session_id in post["liked_by"]:
-                post["liked_by"].remove(session_id)
-                post["likes"] = max(0, post["likes"] - 1)
-
-        _write_posts(data)
-        return post
+        if _toggle_reaction(conn, post_id, session_id, "dislike"):
+            _remove_reaction(conn, post_id, session_id, "like")
+        return _load_post(conn, post_id)
 
 
 def add_comment(post_id, author_name, content):
@@ -208,13 +405,14 @@ def add_comment(post_id, author_name, content):
         "content": content,
         "created_at": now,
     }
-    with _lock:
-        data = _read_posts()
-        post = _find_post(data, post_id)
-        if not post:
+    conn = _connect()
+    with _write_txn(conn):
+        if not _post_exists(conn, post_id):
             return None
-        post["comments"].append(comment)
-        _write_posts(data)
+        conn.execute(
+            "INSERT INTO comments (post_id, data) VALUES (?, ?)",
+            (post_id, json.dumps(comment, ensure_ascii=False)),
+        )
     return comment
 
 
@@ -223,39 +421,19 @@ def report_post(post_id, session_id, reason=""):
     
     action is "reported", "unreported", or an error message.
     """
-    with _lock:
-        data = _read_posts()
-        post = _find_post(data, post_id)
-        if not post:
+    conn = _connect()
+    with _write_txn(conn):
+        if not _post_exists(conn, post_id):
             return None, "Bài viết không tồn tại"
 
-        reported_by = post.get("reported_by", [])
-        
-        if session_id in reported_by:
-            # Toggle off - unreport
-            reported_by.remove(session_id)
-            post["reported_by"] = reported_by
-            post["reports"] = max(0, post.get("reports", 0) - 1)
-            _write_posts(data)
-            return post, "unreported"
-
-        # Toggle on - report
-        reported_by.append(session_id)
-        post["reported_by"] = reported_by
-        post["reports"] = post.get("reports", 0) + 1
-
-        if post["reports"] >= REPORT_THRESHOLD:
-            post["hidden"] = True
+        if not _toggle_reaction(conn, post_id, session_id, "report"):
+            # Toggled off - unreport
+            return _load_post(conn, post_id), "unreported"
 
-        _write_posts(data)
-        return post, "reported"
-
-
-def _find_post(data, post_id):
-    for post in data["posts"]:
-        if post["id"] == post_id:
-            return post
-    return None
+        conn.execute(
+            "UPDATE posts SET hidden = 1 WHERE id = ? AND reports >= ?", (post_id, REPORT_THRESHOLD)
+        )
+        return _load_post(conn, post_id), "reported"
 
 
 _COLORS = [
@@ -264,6 +442,8 @@ _COLORS = [
 ]
 
 
+_color_choice = random.Random().choice
+
+
 def _random_color():
-    import random
-    return random.choice(_COLORS)
+    return _color_choice(_COLORS)
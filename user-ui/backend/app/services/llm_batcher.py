@@ -0,0 +1,134 @@
+"""
+LLM Request Batcher - coalesces concurrent prompts into one provider call.
+
+Prompts submitted within a short window are sent together as numbered
+requests, with the model asked to answer each one separately in a JSON
+object. Answers missing from (or unparseable in) the reply are fetched
+with individual calls, so callers always get an answer for their prompt.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import LLM_BATCH_SIZE, LLM_BATCH_WINDOW_MS
+
+logger = logging.getLogger(__name__)
+
+# Batches in flight at once; new prompts keep batching while earlier ones wait on the provider
+MAX_CONCURRENT_BATCHES = 4
+# Output token cap for a batched call (claude-3-haiku's maximum); a truncated
+# reply fails to parse and its requests are answered individually
+MAX_BATCH_TOKENS = 4096
+
+BATCH_INSTRUCTION = (
+    "Dưới đây là {count} yêu cầu độc lập, mỗi yêu cầu có hướng dẫn và ngữ cảnh riêng. "
+    "Trả lời từng yêu cầu riêng biệt, đúng như khi chỉ nhận được yêu cầu đó. "
+    "Chỉ trả về một đối tượng JSON ánh xạ số thứ tự yêu cầu sang toàn bộ câu trả lời, "
+    'ví dụ {{"1": "...", "2": "..."}}.'
+)
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    """Combine prompts into one numbered multi-request prompt."""
+    parts = [BATCH_INSTRUCTION.format(count=len(prompts))]
+    for number, prompt in enumerate(prompts, 1):
+        parts.append(f"### YÊU CẦU {number}\n{prompt}")
+    return "\n\n".join(parts)
+
+
+def parse_batch_reply(reply: str, count: int) -> Dict[int, str]:
+    """Extract {request number: answer} from a batch reply; unusable entries are left out."""
+    start, end = reply.find("{"), reply.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(reply[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    answers = {}
+    for number in range(1, count + 1):
+        answer = data.get(str(number))
+        if isinstance(answer, str) and answer.strip():
+            answers[number] = answer
+    return answers
+
+
+class LLMBatcher:
+    """
+    Groups prompts arriving within window_ms into batches of up to max_batch.
+
+    complete(prompt, max_tokens) performs one provider call and returns the
+    reply text (raising on failure). A batch of one is sent as-is.
+    """
+
+    def __init__(
+        self,
+        complete: Callable[[str, int], str],
+        max_batch: int = LLM_BATCH_SIZE,
+        window_ms: int = LLM_BATCH_WINDOW_MS,
+    ):
+        self._complete = complete
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[str, int, Future]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BATCHES, thread_name_prefix="llm-batch")
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch > 1
+
+    def submit(self, prompt: str, max_tokens: int) -> Future:
+        """Queue a prompt; the returned Future resolves to its answer."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._collect_loop, name="llm-batcher", daemon=True)
+                    self._thread.start()
+        future: Future = Future()
+        self._queue.put((prompt, max_tokens, future))
+        return future
+
+    def _collect_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[Tuple[str, int, Future]]):
+        answers: Dict[int, str] = {}
+        if len(batch) > 1:
+            prompts = [prompt for prompt, _, _ in batch]
+            try:
+                max_tokens = min(sum(tokens for _, tokens, _ in batch), MAX_BATCH_TOKENS)
+                reply = self._complete(build_batch_prompt(prompts), max_tokens)
+                answers = parse_batch_reply(reply, len(batch))
+            except Exception as e:
+                logger.error(f"Batched LLM call failed, answering individually: {e}")
+            if len(answers) < len(batch):
+                logger.warning(f"Batched LLM reply covered {len(answers)}/{len(batch)} requests")
+
+        for number, (prompt, max_tokens, future) in enumerate(batch, 1):
+            if number in answers:
+                future.set_result(answers[number])
+                continue
+            try:
+                future.set_result(self._complete(prompt, max_tokens))
+            except Exception as e:
+                future.set_exception(e)
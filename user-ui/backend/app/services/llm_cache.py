@@ -0,0 +1,147 @@
+"""
+LLM Response Cache - reuses answers for repeated or paraphrased questions.
+
+Entries are grouped by everything else that goes into the prompt (intent,
+RAG context, chat history), so a cached answer is only reused when the LLM
+would have seen the same context. Within a group, questions match by cosine
+similarity of sentence embeddings when sentence-transformers is installed,
+otherwise by exact match on the normalized question.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # sentence-transformers is optional; questions then match exactly
+    SentenceTransformer = None
+
+from app.core.config import LLM_CACHE_MAX, LLM_CACHE_THRESHOLD, LLM_CACHE_MODEL
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+# Question embeddings computed by lookup() kept for the store() that follows a miss
+_PENDING_EMBEDDINGS_MAX = 64
+
+
+def _normalize_question(message: str) -> str:
+    """Lowercase and keep only the words, so punctuation/spacing don't matter."""
+    return " ".join(_WORD_RE.findall(message.lower()))
+
+
+def _context_key(*parts: Optional[str]) -> str:
+    """Hash the non-question parts of a prompt into one group key."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """
+    In-process LRU cache of LLM answers with semantic question matching.
+
+    Holds at most max_entries answers; the least recently used is evicted
+    first (a hit counts as a use). max_entries <= 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX,
+        threshold: float = LLM_CACHE_THRESHOLD,
+        model_name: str = LLM_CACHE_MODEL,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._use_embeddings = SentenceTransformer is not None
+        # normalized question -> embedding from a lookup that missed, LRU order
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # (context key, normalized question) -> (embedding or None, answer), LRU order
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[np.ndarray], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of the question, or None without an embedding model."""
+        if not self._use_embeddings:
+            return None
+        if self._model is None:
+            # Loaded once, even when the first requests arrive together
+            with self._model_lock:
+                if self._model is None and self._use_embeddings:
+                    try:
+                        self._model = SentenceTransformer(self.model_name)
+                    except Exception as e:
+                        logger.warning(f"LLM cache embedding model unavailable, using exact matching: {e}")
+                        self._use_embeddings = False
+            if self._model is None:
+                return None
+        return self._model.encode(question, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, message: str, *context: Optional[str]) -> Optional[str]:
+        """Return the cached answer for *message* asked in *context*, or None."""
+        if not self.enabled:
+            return None
+        group = _context_key(*context)
+        question = _normalize_question(message)
+        with self._lock:
+            entry = self._entries.get((group, question))
+            if entry is not None:
+                self._entries.move_to_end((group, question))
+                return entry[1]
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if key[0] == group and entry[0] is not None
+            ]
+        if not candidates:
+            return None
+
+        # Paraphrase: closest question asked in the same context
+        embedding = self._embed(question)
+        if embedding is None:
+            return None
+        scores = np.stack([entry[0] for _, entry in candidates]) @ embedding
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            with self._lock:
+                self._pending[question] = embedding
+                self._pending.move_to_end(question)
+                if len(self._pending) > _PENDING_EMBEDDINGS_MAX:
+                    self._pending.popitem(last=False)
+            return None
+        key, entry = candidates[best]
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry[1]
+
+    def store(self, message: str, answer: str, *context: Optional[str]) -> None:
+        """Cache *answer* for *message* asked in *context*."""
+        if not self.enabled:
+            return
+        question = _normalize_question(message)
+        key = (_context_key(*context), question)
+        # Reuse the embedding from the lookup that missed instead of encoding again
+        with self._lock:
+            embedding = self._pending.pop(question, None)
+        if embedding is None:
+            embedding = self._embed(question)
+        with self._lock:
+            self._entries[key] = (embedding, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
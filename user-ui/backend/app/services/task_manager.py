@@ -1,6 +1,7 @@
 # Background Task Manager — runs AI inference in a thread pool
 # so Flask can respond to polling / health-check requests immediately.
 
+import os
 import uuid
 import time
 import threading
@@ -36,13 +37,21 @@ class TaskManager:
         # which holds internal ByteTrack state). Concurrent inference on the same model
         # objects causes segfaults or corrupted results. Serialize all inference work.
         self._executor = ThreadPoolExecutor(max_workers=1)
+        # Work that never touches the models (e.g. chat, waiting on the LLM API)
+        # gets its own small pool so it doesn't queue behind a long video.
+        self._io_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
         self._tasks: Dict[str, Task] = {}
         self._lock = threading.Lock()
 
     # ---- public API ----
 
-    def submit(self, fn: Callable, media_type: str = "image") -> str:
-        """Submit *fn* for background execution. Returns a task_id."""
+    def submit(self, fn: Callable, media_type: str = "image", uses_models: bool = True) -> str:
+        """
+        Submit *fn* for background execution. Returns a task_id.
+
+        Set *uses_models* to False for work that doesn't run YOLO inference;
+        it then runs concurrently instead of on the serialized model worker.
+        """
         task_id = uuid.uuid4().hex[:12]
         task = Task(task_id=task_id, status="pending", progress_message="Đang chờ xử lý...")
 
@@ -65,7 +74,8 @@ class TaskManager:
                 import traceback
                 traceback.print_exc()
 
-        self._executor.submit(_wrapper)
+        executor = self._executor if uses_models else self._io_executor
+        executor.submit(_wrapper)
         # Garbage-collect old finished tasks
         self._cleanup_old_tasks()
         return task_id
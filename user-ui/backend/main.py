@@ -2,6 +2,7 @@
 # Serves both API and Frontend on the same port
 
 from pathlib import Path
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -15,7 +16,7 @@ from werkzeug.exceptions import RequestEntityTooLarge
 
 from app.api.routes import api
 from app.api.community_routes import community_api
-from app.core.config import HOST, PORT, DEBUG, UPLOADS_DIR
+from app.core.config import HOST, PORT, DEBUG, UPLOADS_DIR_STR
 
 # Path to frontend folder
 FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
@@ -48,7 +49,7 @@ def create_app():
     # Serve uploaded files
     @app.route("/api/static/uploads/<path:filename>")
     def serve_upload(filename):
-        return send_from_directory(str(UPLOADS_DIR), filename)
+        return send_from_directory(UPLOADS_DIR_STR, filename)
 
     # Serve frontend index.html at root
     @app.route("/")
@@ -98,6 +99,9 @@ if __name__ == "__main__":
     print("  TECHNO TRAFFIX - AI Traffic Monitoring System")
     print("=" * 60)
 
+    # Route handlers log through `logging`; INFO keeps per-request debug lines quiet
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
     app = create_app()
 
     print(f"\n  Server: http://127.0.0.1:{PORT}")
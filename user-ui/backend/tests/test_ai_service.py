@@ -0,0 +1,96 @@
+"""Tests for AIService classification paths that don't need the trained models."""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+cv2 = pytest.importorskip("cv2")
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.ai_service import AIService
+
+
+class _NoBoxesModel:
+    """Vehicle model stand-in that detects nothing."""
+
+    names = {0: "car", 1: "person"}
+
+    def __call__(self, frame, **kwargs):
+        return [SimpleNamespace(boxes=None)]
+
+
+class _UnusedModel:
+    """Classifier stand-in that fails the test if it is ever called."""
+
+    predictor = None
+
+    def __call__(self, *args, **kwargs):
+        raise AssertionError("classifier should not run")
+
+
+def _bare_service(**models) -> AIService:
+    """AIService with stand-in models, skipping the singleton's model loading."""
+    service = object.__new__(AIService)
+    service._inference_lock = threading.Lock()
+    service._classify_executor = ThreadPoolExecutor(max_workers=1)
+    service._classifier_streams = (None, None)
+    service._vehicle_class_ids = np.array([0], dtype=np.int32)
+    service.vehicle_model = _NoBoxesModel()
+    service.ambulance_model = None
+    service.accident_model = None
+    service.traffic_model = None
+    for name, model in models.items():
+        setattr(service, name, model)
+    return service
+
+
+def test_process_image_without_vehicles(tmp_path):
+    """Test an image with no vehicles skips the classifiers but keeps the result shape."""
+    service = _bare_service(accident_model=_UnusedModel(), traffic_model=_UnusedModel())
+    input_path = tmp_path / "empty_road.png"
+    cv2.imwrite(str(input_path), np.zeros((48, 64, 3), dtype=np.uint8))
+
+    result = service.process_image(input_path, tmp_path / "out.png")
+
+    is_jam, traffic_conf, traffic_status = AIService._traffic_result(False, 0.0)
+    assert result == {
+        "traffic_status": traffic_status,
+        "is_traffic_jam": is_jam,
+        "traffic_confidence": traffic_conf,
+        "accident_detected": False,
+        "accident_confidence": 0.0,
+    }
+
+
+class _FixedClassifier:
+    """Classifier stand-in predicting one class for every frame, without predictor internals."""
+
+    def __init__(self, top1: int):
+        self.predictor = SimpleNamespace()  # set up, but lacks preprocess/inference etc.
+        self.top1 = top1
+        self.calls = 0
+
+    def __call__(self, frames, **kwargs):
+        self.calls += 1
+        probs = SimpleNamespace(top1=self.top1, top1conf=0.9)
+        return [SimpleNamespace(probs=probs) for _ in frames]
+
+
+def test_count_positive_samples_fallback():
+    """Test predictors without the shared-input internals fall back to plain model calls."""
+    accident_model, traffic_model = _FixedClassifier(top1=1), _FixedClassifier(top1=0)
+    service = _bare_service(accident_model=accident_model, traffic_model=traffic_model)
+    frames = [np.zeros((48, 64, 3), dtype=np.uint8)] * 3
+
+    assert not service._classifiers_share_input()
+    assert service._count_positive_samples(frames) == (0, 3)
+    assert accident_model.calls == traffic_model.calls == 1
@@ -6,6 +6,8 @@ import sys
 import io
 from pathlib import Path
 
+import pytest
+
 # Fix encoding for Windows
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
@@ -16,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.validators.topic_validator import TopicValidator, TopicCategory
 from app.models.chat_models import ChatRequest, ChatResponse
 from app.services.chat_service import ChatService
+from app.services.llm_cache import LLMResponseCache
 
 
 def test_topic_validator():
@@ -190,6 +193,39 @@ def test_knowledge_base_search():
             print(f"  Fine: {v.get('fine', 'N/A')}")
 
 
+def test_violation_scorer_matches_python():
+    """Test the compiled violation scorer ranks exactly like _calculate_relevance."""
+    from app.knowledge.traffic_law_kb import TrafficLawKB
+
+    compiled = TrafficLawKB()
+    if compiled._violation_table is None:
+        pytest.skip("numba not installed: only the Python scorer exists")
+    python = TrafficLawKB()
+    python._violation_table = None
+
+    queries = [
+        "vượt đèn đỏ",
+        "xe máy vượt đèn đỏ phạt bao nhiêu",
+        "ô tô vượt đèn đỏ",
+        "nồng độ cồn",
+        "uống rượu bia lái ô tô",
+        "chạy quá tốc độ 20km/h",
+        "không đội mũ bảo hiểm",
+        "đi ngược chiều xe máy",
+        "dừng đỗ xe sai quy định",
+        "không có bằng lái",
+        "sử dụng điện thoại khi lái xe",
+        "chở quá số người",
+        "xyz không liên quan",
+    ]
+    intents = [None, "traffic_violation", "alcohol_regulation", "speed_limit"]
+    for query in queries:
+        for intent in intents:
+            assert compiled.search(query, intent)["violations"] == python.search(query, intent)["violations"], (
+                query, intent,
+            )
+
+
 def test_rag_priority():
     """Test RAG priority - should use RAG without LLM for high-quality matches."""
     print("\n" + "=" * 60)
@@ -286,6 +322,26 @@ def test_rag_priority():
     return failed == 0
 
 
+def test_llm_cache():
+    """Test LLMResponseCache matching, context separation and LRU eviction."""
+    cache = LLMResponseCache(max_entries=2)
+    cache._use_embeddings = False  # exact matching, no model download
+
+    cache.store("Phạt vượt đèn đỏ bao nhiêu?", "answer-1", "violation", "ctx-a", "")
+    assert cache.lookup("phạt vượt đèn đỏ bao nhiêu", "violation", "ctx-a", "") == "answer-1"
+    assert cache.lookup("Phạt vượt đèn đỏ bao nhiêu?", "violation", "ctx-b", "") is None
+
+    cache.store("Nồng độ cồn?", "answer-2", "violation", "ctx-a", "")
+    cache.lookup("Phạt vượt đèn đỏ bao nhiêu?", "violation", "ctx-a", "")  # mark as recently used
+    cache.store("Bằng B2?", "answer-3", "gplx", "ctx-c", "")
+    assert cache.lookup("Nồng độ cồn?", "violation", "ctx-a", "") is None
+    assert cache.lookup("Phạt vượt đèn đỏ bao nhiêu?", "violation", "ctx-a", "") == "answer-1"
+
+    disabled = LLMResponseCache(max_entries=0)
+    disabled.store("Nồng độ cồn?", "answer", "violation", "ctx-a", "")
+    assert disabled.lookup("Nồng độ cồn?", "violation", "ctx-a", "") is None
+
+
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("CHAT MODULE TESTS")
@@ -0,0 +1,138 @@
+"""Tests for the SQLite-backed community post store."""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import community_service
+
+
+def _seed_post(index, **fields):
+    post = {
+        "id": f"post_{index}",
+        "author_name": f"Author {index}",
+        "content": f"Kẹt xe tại nút giao số {index}",
+        "created_at": f"2026-02-0{index}T08:00:00.000Z",
+        "likes": 0,
+        "dislikes": 0,
+        "liked_by": [],
+        "disliked_by": [],
+        "comments": [],
+        "reports": 0,
+        "reported_by": [],
+    }
+    post.update(fields)
+    return post
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the store at a fresh database seeded from a temporary posts.json."""
+    seed = [
+        _seed_post(1, likes=2, liked_by=["s1", "s2"], comments=[{"id": "c1", "content": "Cảm ơn"}]),
+        _seed_post(2, hidden=True),
+        _seed_post(3),
+        _seed_post(4, dislikes=1, disliked_by=["s3"]),
+    ]
+    posts_file = tmp_path / "posts.json"
+    posts_file.write_text(json.dumps({"posts": seed}, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(community_service, "POSTS_FILE", posts_file)
+    monkeypatch.setattr(community_service, "POSTS_DB", tmp_path / "posts.db")
+    community_service.close_connection()
+    yield community_service
+    community_service.close_connection()
+
+
+def test_seed_import(store):
+    """Test posts.json is imported once, keeping counters, reactions and comments."""
+    posts = {p["id"]: p for p in store.get_posts()["posts"]}
+    assert set(posts) == {"post_1", "post_3", "post_4"}  # post_2 is hidden
+    assert posts["post_1"]["likes"] == 2
+    assert posts["post_1"]["liked_by"] == ["s1", "s2"]
+    assert posts["post_1"]["comments"] == [{"id": "c1", "content": "Cảm ơn"}]
+    assert posts["post_4"]["disliked_by"] == ["s3"]
+    assert posts["post_3"]["author_name"] == "Author 3"
+
+    # Reopening the database doesn't import the seed again
+    store.close_connection()
+    assert store.get_posts()["total"] == 3
+
+
+def test_get_posts_pagination_and_order(store):
+    """Test pages are newest first and has_more/total count visible posts only."""
+    first = store.get_posts(page=1, per_page=2)
+    assert [p["id"] for p in first["posts"]] == ["post_4", "post_3"]
+    assert first["total"] == 3 and first["has_more"] is True
+
+    second = store.get_posts(page=2, per_page=2)
+    assert [p["id"] for p in second["posts"]] == ["post_1"]
+    assert second["has_more"] is False
+
+    created = store.create_post("Lan", "Đường thông thoáng")
+    assert store.get_posts(per_page=1)["posts"][0]["id"] == created["id"]
+
+
+def test_like_dislike_mutually_exclusive(store):
+    """Test liking removes a dislike (and vice versa) and toggling twice undoes it."""
+    post = store.toggle_like("post_4", "s3")
+    assert (post["likes"], post["dislikes"]) == (1, 0)
+    assert post["liked_by"] == ["s3"] and post["disliked_by"] == []
+
+    post = store.toggle_dislike("post_4", "s3")
+    assert (post["likes"], post["dislikes"]) == (0, 1)
+    assert post["liked_by"] == [] and post["disliked_by"] == ["s3"]
+
+    post = store.toggle_dislike("post_4", "s3")
+    assert (post["likes"], post["dislikes"]) == (0, 0)
+
+    assert store.toggle_like("missing", "s3") is None
+
+
+def test_report_threshold_hides_post(store):
+    """Test a post is hidden at REPORT_THRESHOLD reports and a report can be withdrawn."""
+    sessions = [f"r{i}" for i in range(store.REPORT_THRESHOLD)]
+    for session_id in sessions[:-1]:
+        post, action = store.report_post("post_3", session_id)
+        assert action == "reported" and post["hidden"] is False
+
+    post, action = store.report_post("post_3", sessions[0])
+    assert action == "unreported"
+    assert post["reports"] == store.REPORT_THRESHOLD - 2
+    assert sessions[0] not in post["reported_by"]
+
+    store.report_post("post_3", sessions[0])
+    post, action = store.report_post("post_3", sessions[-1])
+    assert action == "reported"
+    assert post["reports"] == store.REPORT_THRESHOLD and post["hidden"] is True
+    assert "post_3" not in [p["id"] for p in store.get_posts()["posts"]]
+
+    assert store.report_post("missing", "r0") == (None, "Bài viết không tồn tại")
+
+
+def test_add_comment(store):
+    """Test comments are appended in order and missing posts are rejected."""
+    comment = store.add_comment("post_1", "Hoa", "Đã tránh được, cảm ơn!")
+    comments = {p["id"]: p for p in store.get_posts()["posts"]}["post_1"]["comments"]
+    assert comments[-1] == comment
+    assert len(comments) == 2
+
+    assert store.add_comment("missing", "Hoa", "...") is None
+
+
+def test_close_connection(store):
+    """Test close_connection closes this thread's connection and the next call reopens."""
+    store.get_posts()
+    conn = store._local.conn
+    store.close_connection()
+    assert store._local.conn is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+    store.close_connection()  # no connection: nothing to do
+    assert store.get_posts()["total"] == 3
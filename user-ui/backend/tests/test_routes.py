@@ -46,3 +46,53 @@ def test_traffic_data_endpoint(client):
     data = response.get_json()
     # API returns a list of traffic routes
     assert isinstance(data, list)
+
+
+def test_serve_processed_media_conditional(client):
+    """Test processed media supports ETag revalidation and rejects traversal."""
+    from app.core.config import PROCESSED_DIR
+
+    path = PROCESSED_DIR / "test_serve_processed.json"
+    path.write_text("{}", encoding="utf-8")
+    try:
+        response = client.get('/api/static/processed/test_serve_processed.json')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        etag = response.headers['ETag']
+
+        response = client.get(
+            '/api/static/processed/test_serve_processed.json',
+            headers={'If-None-Match': etag},
+        )
+        assert response.status_code == 304
+    finally:
+        path.unlink()
+
+    response = client.get('/api/static/processed/../../core/config.py')
+    assert response.status_code == 404
+
+
+def test_chat_async_requires_body(client):
+    """Test async chat rejects an empty request before queueing a task."""
+    response = client.post('/api/chat/async', json={})
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data['success'] is False
+    assert 'task_id' not in data
+
+
+def test_chat_stream_bad_body_returns_json_error(client):
+    """Test a non-object JSON body gets the JSON 500, not Flask's HTML error page."""
+    response = client.post('/api/chat/stream', json=["not", "an", "object"])
+    assert response.status_code == 500
+    assert response.get_json() == {"success": False, "error": "Internal server error"}
+
+
+def test_chat_stream_events(client):
+    """Test the stream sends the answer as delta events, then a done event."""
+    response = client.post('/api/chat/stream', json={"message": "xin chào"})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    frames = [f for f in response.get_data(as_text=True).split("\n\n") if f]
+    assert frames[0].startswith("event: delta\n")
+    assert frames[-1].startswith("event: done\n")
@@ -24,9 +24,11 @@ from enum import Enum
 from collections import deque
 import math
 
+import numpy as np
+
 from tracker.bytetrack_tracker import TrackedObject
 from speed_estimation.speed_estimator import SpeedInfo
-from utils.geometry import calculate_iou, calculate_distance
+from utils.geometry import calculate_distance, calculate_distance_array, calculate_iou_matrix
 
 
 logger = logging.getLogger(__name__)
@@ -324,9 +326,10 @@ class AccidentDetector:
 
     def _get_vehicle_state(self, track_id: int) -> VehicleState:
         """Get or create vehicle state."""
-        if track_id not in self._vehicle_states:
-            self._vehicle_states[track_id] = VehicleState(track_id=track_id)
-        return self._vehicle_states[track_id]
+        state = self._vehicle_states.get(track_id)
+        if state is None:
+            state = self._vehicle_states[track_id] = VehicleState(track_id=track_id)
+        return state
 
     def _is_parallel_movement(
         self,
@@ -361,52 +364,67 @@ class AccidentDetector:
 
     # ========== STAGE 1: Proximity Detection ==========
 
+    def _pairwise_metrics(self, tracked_objects: List[TrackedObject]) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute (N, N) IOU and centroid-distance matrices for this frame."""
+        n = len(tracked_objects)
+        if n == 0:
+            empty = np.zeros((0, 0))
+            return empty, empty
+
+        bboxes = np.array([obj.bbox for obj in tracked_objects], dtype=np.float64)
+        centroids = np.array([obj.centroid for obj in tracked_objects], dtype=np.float64)
+
+        iou = calculate_iou_matrix(bboxes)
+        distance = calculate_distance_array(centroids[:, None, :], centroids[None, :, :])
+        return iou, distance
+
     def _detect_proximity(
-        self, tracked_objects: List[TrackedObject], speed_infos: Dict[int, SpeedInfo], frame_id: int
+        self,
+        tracked_objects: List[TrackedObject],
+        speed_infos: Dict[int, SpeedInfo],
+        frame_id: int,
+        iou_matrix: np.ndarray,
+        distance_matrix: np.ndarray,
     ) -> None:
         """Stage 1: Detect proximity events between vehicles."""
-        n = len(tracked_objects)
         active_pairs = set()
 
-        for i in range(n):
-            for j in range(i + 1, n):
-                obj1 = tracked_objects[i]
-                obj2 = tracked_objects[j]
-                pair_key = self._get_pair_key(obj1.track_id, obj2.track_id)
-
-                # Calculate proximity metrics
-                iou = calculate_iou(obj1.bbox, obj2.bbox)
-                distance = calculate_distance(obj1.centroid, obj2.centroid)
-
-                in_proximity = iou >= self.proximity_iou_threshold or distance <= self.proximity_distance_threshold
-
-                if in_proximity:
-                    active_pairs.add(pair_key)
-
-                    if pair_key not in self._proximity_events:
-                        # New proximity event
-                        state1 = self._get_vehicle_state(obj1.track_id)
-                        state2 = self._get_vehicle_state(obj2.track_id)
-                        speed_info1 = speed_infos.get(obj1.track_id)
-                        speed_info2 = speed_infos.get(obj2.track_id)
-
-                        self._proximity_events[pair_key] = ProximityEvent(
-                            track_id_1=obj1.track_id,
-                            track_id_2=obj2.track_id,
-                            start_frame=frame_id,
-                            max_iou=iou,
-                            frames_in_contact=1,
-                            speed_1_before=speed_info1.current_speed if speed_info1 else 0,
-                            speed_2_before=speed_info2.current_speed if speed_info2 else 0,
-                            heading_1_before=speed_info1.current_heading if speed_info1 else 0,
-                            heading_2_before=speed_info2.current_heading if speed_info2 else 0,
-                        )
-                    else:
-                        # Update existing proximity event
-                        event = self._proximity_events[pair_key]
-                        event.frames_in_contact += 1
-                        if iou > event.max_iou:
-                            event.max_iou = iou
+        in_proximity = (iou_matrix >= self.proximity_iou_threshold) | (
+            distance_matrix <= self.proximity_distance_threshold
+        )
+        # Upper triangle only: each unordered pair once, no self-pairs
+        for i, j in np.argwhere(np.triu(in_proximity, k=1)):
+            obj1 = tracked_objects[i]
+            obj2 = tracked_objects[j]
+            pair_key = self._get_pair_key(obj1.track_id, obj2.track_id)
+            iou = float(iou_matrix[i, j])
+
+            active_pairs.add(pair_key)
+
+            event = self._proximity_events.get(pair_key)
+            if event is None:
+                # New proximity event
+                state1 = self._get_vehicle_state(obj1.track_id)
+                state2 = self._get_vehicle_state(obj2.track_id)
+                speed_info1 = speed_infos.get(obj1.track_id)
+                speed_info2 = speed_infos.get(obj2.track_id)
+
+                self._proximity_events[pair_key] = ProximityEvent(
+                    track_id_1=obj1.track_id,
+                    track_id_2=obj2.track_id,
+                    start_frame=frame_id,
+                    max_iou=iou,
+                    frames_in_contact=1,
+                    speed_1_before=speed_info1.current_speed if speed_info1 else 0,
+                    speed_2_before=speed_info2.current_speed if speed_info2 else 0,
+                    heading_1_before=speed_info1.current_heading if speed_info1 else 0,
+                    heading_2_before=speed_info2.current_heading if speed_info2 else 0,
+                )
+            else:
+                # Update existing proximity event
+                event.frames_in_contact += 1
+                if iou > event.max_iou:
+                    event.max_iou = iou
 
         # Clean up old proximity events
         stale = [k for k in self._proximity_events if k not in active_pairs]
@@ -613,7 +631,12 @@ class AccidentDetector:
     # ========== Trajectory Anomaly Detection (Sideswipe) ==========
 
     def _detect_trajectory_anomaly(
-        self, tracked_objects: List[TrackedObject], speed_infos: Dict[int, SpeedInfo], frame_id: int
+        self,
+        tracked_objects: List[TrackedObject],
+        speed_infos: Dict[int, SpeedInfo],
+        frame_id: int,
+        iou_matrix: np.ndarray,
+        distance_matrix: np.ndarray,
     ) -> List[AccidentEvent]:
         """Detect sideswipe/glancing collisions via trajectory anomaly."""
         if not self.enable_trajectory_detection:
@@ -621,7 +644,7 @@ class AccidentDetector:
 
         events = []
 
-        for obj in tracked_objects:
+        for i, obj in enumerate(tracked_objects):
             speed_info = speed_infos.get(obj.track_id)
             if speed_info is None:
                 continue
@@ -643,21 +666,16 @@ class AccidentDetector:
             if heading_change < self.trajectory_heading_threshold:
                 continue
 
-            # Find nearby vehicles
-            nearby_vehicles = []
-            for other in tracked_objects:
-                if other.track_id == obj.track_id:
-                    continue
-
-                dist = calculate_distance(obj.centroid, other.centroid)
-                if dist <= self.trajectory_proximity:
-                    nearby_vehicles.append((other, dist))
-
-            if not nearby_vehicles:
+            # Find closest nearby vehicle
+            distances = distance_matrix[i].copy()
+            distances[i] = np.inf
+            closest = int(np.argmin(distances))
+            closest_dist = float(distances[closest])
+            if closest_dist > self.trajectory_proximity:
                 continue
 
             # Check if this is synchronous turning (both vehicles turning together = curve)
-            closest_obj, closest_dist = min(nearby_vehicles, key=lambda x: x[1])
+            closest_obj = tracked_objects[closest]
             other_speed_info = speed_infos.get(closest_obj.track_id)
 
             if other_speed_info:
@@ -671,7 +689,7 @@ class AccidentDetector:
                     continue  # This is synchronized turning, not a collision
 
             # Check for physical contact
-            iou = calculate_iou(obj.bbox, closest_obj.bbox)
+            iou = float(iou_matrix[i, closest])
 
             # For trajectory anomaly, require either IOU or very close proximity
             if iou < 0.05 and closest_dist > 80:
@@ -748,8 +766,11 @@ class AccidentDetector:
         # Run detection stages
         all_events = []
 
+        # Pairwise IOU / distance shared by proximity and trajectory stages
+        iou_matrix, distance_matrix = self._pairwise_metrics(tracked_objects)
+
         # Stage 1: Proximity detection
-        self._detect_proximity(tracked_objects, speed_infos, frame_id)
+        self._detect_proximity(tracked_objects, speed_infos, frame_id, iou_matrix, distance_matrix)
 
         # Stage 2: Collision candidate detection
         self._detect_collision_candidates(tracked_objects, speed_infos, frame_id)
@@ -761,7 +782,9 @@ class AccidentDetector:
         all_events.extend(self._confirm_accidents(frame_id))
 
         # Additional: Trajectory anomaly detection
-        all_events.extend(self._detect_trajectory_anomaly(tracked_objects, speed_infos, frame_id))
+        all_events.extend(
+            self._detect_trajectory_anomaly(tracked_objects, speed_infos, frame_id, iou_matrix, distance_matrix)
+        )
 
         # Cleanup old vehicle states (not seen for 60+ frames)
         active_ids = {obj.track_id for obj in tracked_objects}
@@ -17,6 +17,7 @@ import yaml
 import numpy as np
 
 from video_io.video_reader import VideoReader, FrameInfo
+from video_io.shared_memory_reader import SharedMemoryVideoReader
 from tracker.bytetrack_tracker import ByteTrackTracker, TrackedObject
 from speed_estimation.speed_estimator import SpeedEstimator, SpeedInfo
 from accident_detection.rule_based import AccidentDetector, AccidentEvent
@@ -87,6 +88,8 @@ class PipelineConfig:
     resize_width: Optional[int] = 1920  # Increased for better detection
     resize_height: Optional[int] = 1080
     target_fps: Optional[float] = None
+    batch_size: int = 1  # Frames pulled from the reader per loop iteration
+    prefetch: int = 0  # >0 = decode in a child process with this many shared-memory frame slots
 
     # Vehicle counting settings
     counting_line_position: float = 0.5      # 0.0 = top, 1.0 = bottom
@@ -98,6 +101,7 @@ class PipelineConfig:
     draw_bboxes: bool = True
     draw_tracks: bool = True
     draw_accidents: bool = True
+    annotate_scale: float = 1.0  # Render annotations on a resized copy (e.g. 0.5 for a 960x540 preview)
 
     @classmethod
     def from_yaml(cls, config_path: str) -> "PipelineConfig":
@@ -177,6 +181,8 @@ class PipelineConfig:
         if "video_io" in data:
             config.resize_width = data["video_io"].get("resize_width", config.resize_width)
             config.resize_height = data["video_io"].get("resize_height", config.resize_height)
+            config.batch_size = data["video_io"].get("batch_size", config.batch_size)
+            config.prefetch = data["video_io"].get("prefetch", config.prefetch)
 
         return config
 
@@ -222,12 +228,14 @@ class InferencePipeline:
         else:
             self.config = PipelineConfig()
 
-        self.tracker: Optional[ByteTrackTracker] = None
-        self.speed_estimator: Optional[SpeedEstimator] = None
-        self.accident_detector: Optional[AccidentDetector] = None
-        self.vehicle_counter: Optional[VehicleCounter] = None
+        self.tracker: ByteTrackTracker
+        self.speed_estimator: SpeedEstimator
+        self.accident_detector: AccidentDetector
+        self.vehicle_counter: VehicleCounter
 
-        self._initialized = False
+        # Build components eagerly so process_frame needs no per-frame
+        # readiness checks; run() re-initializes with the real fps/size.
+        self.initialize()
 
         logger.info("InferencePipeline created")
 
@@ -293,7 +301,6 @@ class InferencePipeline:
             fps=fps,
         )
 
-        self._initialized = True
         logger.info("Pipeline components initialized")
 
     def process_frame(
@@ -311,15 +318,6 @@ class InferencePipeline:
         Returns:
             FrameResult with all detection info
         """
-        if not self._initialized:
-            self.initialize()
-
-        # Type assertions for type checker
-        assert self.tracker is not None
-        assert self.speed_estimator is not None
-        assert self.accident_detector is not None
-        assert self.vehicle_counter is not None
-
         start_time = time.time()
 
         # Step 1: Run tracking
@@ -339,7 +337,7 @@ class InferencePipeline:
         # Step 4: Annotate frame if requested
         annotated_frame = None
         if annotate:
-            annotated_frame = self._annotate_frame(frame.copy(), tracked_objects, speed_infos, accident_events)
+            annotated_frame = self._annotate_frame(frame, tracked_objects, speed_infos, accident_events)
 
         return FrameResult(
             frame_id=frame_id,
@@ -351,6 +349,26 @@ class InferencePipeline:
             annotated_frame=annotated_frame,
         )
 
+    def process_batch(self, batch: List[FrameInfo], annotate: bool = True) -> List[FrameResult]:
+        """
+        Process a batch of frames in order.
+
+        Tracking, speed and accident state are sequential, so frames are
+        still fed through the stateful stages one at a time.
+
+        Args:
+            batch: Frames from VideoReader.frames_batched()
+            annotate: Whether to annotate the output frames
+
+        Returns:
+            FrameResult for each frame, in input order
+        """
+        process_frame = self.process_frame
+        return [
+            process_frame(frame_info.frame, frame_info.frame_id, frame_info.timestamp, annotate=annotate)
+            for frame_info in batch
+        ]
+
     def _annotate_frame(
         self,
         frame: np.ndarray,
@@ -358,12 +376,23 @@ class InferencePipeline:
         speed_infos: Dict[int, SpeedInfo],
         accident_events: List[AccidentEvent],
     ) -> np.ndarray:
-        """Draw annotations on frame."""
+        """
+        Draw annotations on a copy of frame.
+
+        With annotate_scale != 1.0 the copy is downscaled once up front and
+        all coordinates are scaled to match, so drawing and preview touch
+        fewer pixels. Detection always runs on the full-size frame.
+        """
+        scale = self.config.annotate_scale
+        if scale != 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy()
 
         # Draw tracked objects
         if self.config.draw_bboxes:
             for obj in tracked_objects:
-                x1, y1, x2, y2 = obj.bbox
+                x1, y1, x2, y2 = (int(v * scale) for v in obj.bbox)
 
                 # Choose color based on class
                 color = (0, 255, 0)  # Default green
@@ -390,8 +419,8 @@ class InferencePipeline:
         # Draw track trails
         if self.config.draw_tracks:
             for obj in tracked_objects:
-                if len(obj.centroid_history) > 1:
-                    points = np.array(obj.centroid_history, dtype=np.int32)
+                if obj.history_count > 1:
+                    points = (obj.centroid_history * scale).astype(np.int32)
                     cv2.polylines(frame, [points], False, (255, 0, 255), 2)
 
         # Draw accident markers
@@ -399,11 +428,11 @@ class InferencePipeline:
             for event in accident_events:
                 # Flash red rectangles for accident locations
                 for bbox in event.bboxes:
-                    x1, y1, x2, y2 = bbox
+                    x1, y1, x2, y2 = (int(v * scale) for v in bbox)
                     cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 4)
 
                 # Draw accident text
-                cx, cy = int(event.location[0]), int(event.location[1])
+                cx, cy = int(event.location[0] * scale), int(event.location[1] * scale)
                 cv2.putText(
                     frame,
                     f"ACCIDENT: {event.event_type.value}",
@@ -415,28 +444,27 @@ class InferencePipeline:
                 )
 
         # Draw counting line and live vehicle counts
-        if self.vehicle_counter is not None:
-            line_y = self.vehicle_counter.line_y_coord
-            frame_w = frame.shape[1]
-            cv2.line(frame, (0, line_y), (frame_w, line_y), (0, 255, 255), 2)
-            cv2.putText(
-                frame, "COUNT LINE", (8, line_y - 6),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1,
-            )
+        line_y = int(self.vehicle_counter.line_y_coord * scale)
+        frame_w = frame.shape[1]
+        cv2.line(frame, (0, line_y), (frame_w, line_y), (0, 255, 255), 2)
+        cv2.putText(
+            frame, "COUNT LINE", (8, line_y - 6),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1,
+        )
 
-            counts = self.vehicle_counter.get_counts()
-            total = self.vehicle_counter.get_total()
-            y_offset = 24
+        counts = self.vehicle_counter.get_counts()
+        total = self.vehicle_counter.get_total()
+        y_offset = 24
+        cv2.putText(
+            frame, f"Vehicles: {total}",
+            (8, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (0, 255, 255), 2,
+        )
+        for cls_name, cnt in counts.items():
+            y_offset += 22
             cv2.putText(
-                frame, f"Vehicles: {total}",
-                (8, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (0, 255, 255), 2,
+                frame, f"  {cls_name}: {cnt}",
+                (8, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 1,
             )
-            for cls_name, cnt in counts.items():
-                y_offset += 22
-                cv2.putText(
-                    frame, f"  {cls_name}: {cnt}",
-                    (8, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 1,
-                )
 
         return frame
 
@@ -461,13 +489,26 @@ class InferencePipeline:
         """
         logger.info(f"Starting pipeline on: {video_source}")
 
-        # Create video reader
-        reader = VideoReader(
-            source=video_source,
-            resize_width=self.config.resize_width,
-            resize_height=self.config.resize_height,
-            target_fps=self.config.target_fps,
-        )
+        batch_size = max(1, self.config.batch_size)
+        if max_frames:
+            batch_size = min(batch_size, max_frames)
+
+        # Create video reader (shared-memory decoder process needs fixed frame dimensions)
+        if self.config.prefetch > 0 and self.config.resize_width and self.config.resize_height:
+            reader = SharedMemoryVideoReader(
+                source=video_source,
+                resize_width=self.config.resize_width,
+                resize_height=self.config.resize_height,
+                target_fps=self.config.target_fps,
+                prefetch=max(self.config.prefetch, batch_size),
+            )
+        else:
+            reader = VideoReader(
+                source=video_source,
+                resize_width=self.config.resize_width,
+                resize_height=self.config.resize_height,
+                target_fps=self.config.target_fps,
+            )
 
         if not reader.open():
             logger.error(f"Failed to open video source: {video_source}")
@@ -494,47 +535,50 @@ class InferencePipeline:
         all_accidents = []
         frame_count = 0
         start_ts = time.time()
+        annotate = show_preview or callback is not None
+        stop = False
 
         try:
-            for frame_info in reader.frames():
-                # Process frame
-                result = self.process_frame(
-                    frame_info.frame,
-                    frame_info.frame_id,
-                    frame_info.timestamp,
-                    annotate=show_preview or callback is not None,
-                )
-
-                # Collect accidents
-                all_accidents.extend(result.accident_events)
-
-                # Call callback if provided
-                if callback:
-                    if not callback(result):
-                        logger.info("Pipeline stopped by callback")
-                        break
-
-                # Show preview
-                if show_preview and result.annotated_frame is not None:
-                    cv2.imshow("Video Detection", result.annotated_frame)
-                    if cv2.waitKey(1) & 0xFF == ord("q"):
-                        logger.info("Pipeline stopped by user (q pressed)")
-                        break
-
-                frame_count += 1
-
-                # Log progress periodically
-                if frame_count % 100 == 0:
-                    counts = self.vehicle_counter.get_counts() if self.vehicle_counter else {}
-                    logger.info(
-                        f"Processed {frame_count} frames | "
-                        f"accidents={len(all_accidents)} | "
-                        f"vehicles={counts}"
-                    )
+            for batch in reader.frames_batched(batch_size):
+                if max_frames:
+                    batch = batch[: max_frames - frame_count]
+
+                for result in self.process_batch(batch, annotate=annotate):
+                    # Collect accidents
+                    all_accidents.extend(result.accident_events)
+
+                    # Call callback if provided
+                    if callback:
+                        if not callback(result):
+                            logger.info("Pipeline stopped by callback")
+                            stop = True
+                            break
+
+                    # Show preview
+                    if show_preview and result.annotated_frame is not None:
+                        cv2.imshow("Video Detection", result.annotated_frame)
+                        if cv2.waitKey(1) & 0xFF == ord("q"):
+                            logger.info("Pipeline stopped by user (q pressed)")
+                            stop = True
+                            break
+
+                    frame_count += 1
+
+                    # Log progress periodically
+                    if frame_count % 100 == 0:
+                        counts = self.vehicle_counter.get_counts()
+                        logger.info(
+                            f"Processed {frame_count} frames | "
+                            f"accidents={len(all_accidents)} | "
+                            f"vehicles={counts}"
+                        )
 
                 # Check max frames
                 if max_frames and frame_count >= max_frames:
                     logger.info(f"Reached max frames: {max_frames}")
+                    stop = True
+
+                if stop:
                     break
 
         finally:
@@ -546,7 +590,6 @@ class InferencePipeline:
         logger.info(f"Pipeline complete: {frame_count} frames, {len(all_accidents)} accidents")
 
         # Build final count result
-        assert self.vehicle_counter is not None
         count_result = self.vehicle_counter.build_result(
             video_source=video_source,
             total_frames=frame_count,
@@ -558,10 +601,7 @@ class InferencePipeline:
 
     def reset(self) -> None:
         """Reset pipeline state."""
-        if self.tracker:
-            self.tracker.reset()
-        if self.accident_detector:
-            self.accident_detector.reset()
-        if self.vehicle_counter:
-            self.vehicle_counter.reset()
+        self.tracker.reset()
+        self.accident_detector.reset()
+        self.vehicle_counter.reset()
         logger.info("Pipeline reset")
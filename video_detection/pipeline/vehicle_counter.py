@@ -158,7 +158,7 @@ class VehicleCounter:
         # Unique-track counting: register any track with enough history
         for obj in tracked_objects:
             if obj.track_id not in self._unique_track_classes:
-                if len(obj.centroid_history) >= self.min_track_length:
+                if obj.history_count >= self.min_track_length:
                     self._unique_track_classes[obj.track_id] = obj.class_name
                     self._unique_counts[obj.class_name] = (
                         self._unique_counts.get(obj.class_name, 0) + 1
@@ -169,7 +169,7 @@ class VehicleCounter:
             cx, cy = obj.centroid
 
             # Skip tracks that are too short — likely noise / false positives
-            if len(obj.centroid_history) < self.min_track_length:
+            if obj.history_count < self.min_track_length:
                 self._prev_centroids[track_id] = (cx, cy)
                 continue
 
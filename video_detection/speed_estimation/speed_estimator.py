@@ -7,9 +7,20 @@ Provides:
 """
 
 import logging
-from typing import Dict, Optional, Tuple, List
-from dataclasses import dataclass, field
-import math
+from typing import Deque, Dict, Iterable, Optional, Sequence, Tuple, List
+from dataclasses import dataclass
+from itertools import islice
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; kernels then run as plain NumPy
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
 from tracker.bytetrack_tracker import TrackedObject
 
@@ -18,12 +29,22 @@ logger = logging.getLogger(__name__)
 
 
 def normalize_angle(angle: float) -> float:
-    """Normalize angle to [-180, 180] degrees."""
-    while angle > 180:
-        angle -= 360
-    while angle < -180:
-        angle += 360
-    return angle
+    """
+    Normalize angle to [-180, 180] degrees.
+
+    Positive odd multiples of 180 map to +180 and negative ones to -180, as
+    with subtracting/adding 360 until the angle is in range.
+    """
+    wrapped = (angle + 180.0) % 360.0 - 180.0
+    if wrapped == -180.0 and angle > 0:
+        return 180.0
+    return wrapped
+
+
+def normalize_angle_np(angles: np.ndarray) -> np.ndarray:
+    """Normalize an array of angles to [-180, 180] degrees, like normalize_angle."""
+    wrapped = (angles + 180.0) % 360.0 - 180.0
+    return np.where((wrapped == -180.0) & (angles > 0), 180.0, wrapped)
 
 
 def angle_difference(angle1: float, angle2: float) -> float:
@@ -32,14 +53,44 @@ def angle_difference(angle1: float, angle2: float) -> float:
     return normalize_angle(diff)
 
 
-def moving_average(values: List[float], window: int = 3) -> float:
+def _recent(values: Deque[float], window: int) -> Iterable[float]:
+    """Iterate over the last `window` items of a deque without slicing it."""
+    return islice(values, max(len(values) - window, 0), None)
+
+
+def moving_average(values: Deque[float], window: int = 3) -> float:
     """Calculate moving average of recent values."""
     if not values:
         return 0.0
-    recent = values[-window:]
+    recent = list(_recent(values, window))
     return sum(recent) / len(recent)
 
 
+@njit(cache=True)
+def _segment_kinematics(
+    deltas: np.ndarray, distances: np.ndarray, frame_diffs: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-frame speed and heading of the newest segment of every track.
+
+    Compiled with Numba when it is installed, plain NumPy otherwise.
+
+    Heading convention (degrees): 0 = right (+x), 90 = down (+y),
+    180/-180 = left (-x), -90 = up (-y).
+
+    Args:
+        deltas: (N, 2) segment vectors (dx, dy)
+        distances: (N,) segment lengths in pixels
+        frame_diffs: (N,) frames elapsed over each segment (float)
+
+    Returns:
+        (speeds in pixels/frame, headings in degrees)
+    """
+    speeds = distances / np.maximum(frame_diffs, 1.0)
+    headings = np.degrees(np.arctan2(deltas[:, 1], deltas[:, 0]))
+    return speeds, headings
+
+
 @dataclass
 class SpeedInfo:
     """Container for speed, heading, and acceleration information."""
@@ -54,7 +105,7 @@ class SpeedInfo:
     # Heading/Direction information
     current_heading: float  # angle in degrees (-180 to 180), 0 = right, 90 = down
     heading_change: float  # change in heading since last frame (degrees)
-    heading_history: List[float] = field(default_factory=list)  # recent headings
+    heading_history: Sequence[float] = ()  # recent headings (read-only snapshot)
 
     # NEW: Acceleration information (for collision detection)
     acceleration: float = 0.0  # pixels per frame^2 (positive = speeding up, negative = braking)
@@ -71,6 +122,10 @@ class SpeedEstimator:
     - Tracks heading history for sudden direction change detection
     - Calculates acceleration for collision impact detection
     - Applies smoothing to reduce tracking noise
+
+    Speed/heading histories live in preallocated (rows, H) ring buffers. Each
+    track claims a row on first sighting and frees it in cleanup_stale_tracks,
+    so a frame's updates are a handful of fancy-indexed array writes.
     """
 
     def __init__(
@@ -82,6 +137,7 @@ class SpeedEstimator:
         heading_history_length: int = 20,  # Increased for better analysis
         acceleration_window: int = 5,  # Frames for acceleration calculation
         smooth_window: int = 3,  # Moving average window for noise reduction
+        max_tracks: int = 256,  # Initial buffer rows (doubled when exhausted)
     ):
         """
         Initialize SpeedEstimator.
@@ -94,6 +150,7 @@ class SpeedEstimator:
             heading_history_length: Number of frames to keep heading history
             acceleration_window: Frames to use for acceleration calculation
             smooth_window: Window size for moving average smoothing
+            max_tracks: Number of track rows to preallocate
         """
         self.fps = fps
         self.pixels_per_meter = pixels_per_meter
@@ -103,160 +160,198 @@ class SpeedEstimator:
         self.acceleration_window = acceleration_window
         self.smooth_window = smooth_window
 
-        # Store previous data for change detection
-        self._previous_speeds: Dict[int, float] = {}
-        self._previous_headings: Dict[int, float] = {}
-        self._heading_histories: Dict[int, List[float]] = {}
-        self._speed_histories: Dict[int, List[float]] = {}  # NEW: for acceleration
+        # Moving averages cover the newest smooth_len entries of a row
+        self._smooth_len = max(1, min(smooth_window, heading_history_length))
+
+        # track_id -> buffer row, plus a stack of free rows
+        self._rows: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+        self._capacity = 0
+
+        # Per-row state, sized by _grow()
+        self._speed_buf = np.zeros((0, heading_history_length), dtype=np.float64)  # NEW: for acceleration
+        self._heading_buf = np.zeros((0, heading_history_length), dtype=np.float64)
+        self._heads = np.zeros(0, dtype=np.intp)  # next slot to write
+        self._counts = np.zeros(0, dtype=np.intp)  # entries held (<= H)
+        self._speed_sums = np.zeros(0, dtype=np.float64)  # running sums for smoothing
+        self._heading_sums = np.zeros(0, dtype=np.float64)
+        self._accelerations = np.zeros(0, dtype=np.float64)  # latest acceleration
+        self._grow(max(1, max_tracks))
+
+        # Per-track {window: wrapped heading diffs}; dropped when a heading is appended
+        self._heading_diff_cache: Dict[int, Dict[int, np.ndarray]] = {}
 
         logger.info(
             f"SpeedEstimator initialized: fps={fps}, heading_history={heading_history_length}, "
             f"accel_window={acceleration_window}, smooth_window={smooth_window}"
         )
 
-    def _calculate_distance(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-        """Calculate Euclidean distance between two points."""
-        return math.sqrt((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2)
-
-    def _calculate_heading(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-        """
-        Calculate heading (direction angle) from p1 to p2.
-
-        Returns angle in degrees:
-        - 0 = moving right (+x)
-        - 90 = moving down (+y)
-        - 180/-180 = moving left (-x)
-        - -90 = moving up (-y)
-        """
-        dx = p2[0] - p1[0]
-        dy = p2[1] - p1[1]
-
-        # atan2 returns radians from -pi to pi
-        angle_rad = math.atan2(dy, dx)
-        angle_deg = math.degrees(angle_rad)
-
-        return angle_deg
+    def _grow(self, capacity: int) -> None:
+        """Resize every per-row buffer to `capacity` rows, keeping existing rows."""
+        old = self._capacity
+        for name in (
+            "_speed_buf", "_heading_buf", "_heads", "_counts",
+            "_speed_sums", "_heading_sums", "_accelerations",
+        ):
+            buf = getattr(self, name)
+            grown = np.zeros((capacity,) + buf.shape[1:], dtype=buf.dtype)
+            grown[:old] = buf
+            setattr(self, name, grown)
+
+        # Reversed so pop() hands out the lowest free row first
+        self._free_rows.extend(range(capacity - 1, old - 1, -1))
+        self._capacity = capacity
+
+    def _row_for(self, track_id: int) -> int:
+        """Get the buffer row of a track, claiming a free one on first sighting."""
+        row = self._rows.get(track_id)
+        if row is None:
+            if not self._free_rows:
+                self._grow(self._capacity * 2)
+            row = self._free_rows.pop()
+            self._rows[track_id] = row
+        return row
+
+    def _ordered_slots(self, row: int, window: Optional[int] = None) -> np.ndarray:
+        """Ring indices of the newest `window` entries of a row (all if None), oldest first."""
+        count = int(self._counts[row])
+        if window is not None:
+            count = min(count, max(window, 0))
+        return (self._heads[row] - count + np.arange(count)) % self.heading_history_length
 
     def estimate_speed(self, tracked_object: TrackedObject) -> Optional[SpeedInfo]:
         """
         Estimate speed, heading, AND acceleration for a single tracked object.
 
+        Thin wrapper over estimate_speeds() with a batch of one.
+
         Args:
             tracked_object: TrackedObject with centroid history
 
         Returns:
             SpeedInfo if enough history, None otherwise
         """
-        history = tracked_object.centroid_history
-        frame_history = tracked_object.frame_history
-        track_id = tracked_object.track_id
-
-        # Need minimum history for calculation
-        if len(history) < self.min_history:
-            return None
+        return self.estimate_speeds([tracked_object]).get(tracked_object.track_id)
 
-        # === SPEED CALCULATION ===
-        current_distance = self._calculate_distance(history[-1], history[-2])
-        frame_diff = frame_history[-1] - frame_history[-2]
-        frame_diff = max(1, frame_diff)
-        current_speed = current_distance / frame_diff
+    def estimate_speeds(self, tracked_objects: List[TrackedObject]) -> Dict[int, SpeedInfo]:
+        """
+        Estimate speeds and headings for multiple tracked objects.
 
-        # Average speed over history
-        total_distance = 0.0
-        for i in range(1, len(history)):
-            total_distance += self._calculate_distance(history[i], history[i - 1])
+        Args:
+            tracked_objects: List of TrackedObject
 
-        total_frames = frame_history[-1] - frame_history[0]
-        total_frames = max(1, total_frames)
-        average_speed = total_distance / total_frames
+        Returns:
+            Dict mapping track_id to SpeedInfo
+        """
+        eligible = [obj for obj in tracked_objects if obj.history_count >= self.min_history]
+        if not eligible:
+            return {}
+
+        # Newest segment of every track, handed to one kernel call instead of
+        # one atan2 per track. TrackedObject.update_history already computed
+        # each (dx, dy) and its length in a single pass.
+        deltas = np.array([obj.last_segment_delta for obj in eligible], dtype=np.float64)
+        distances = np.array([obj.last_segment_distance for obj in eligible], dtype=np.float64)
+        frame_diffs = np.array([obj.last_frame_gap for obj in eligible], dtype=np.float64)
+
+        current_speeds, motion_headings = _segment_kinematics(deltas, distances, frame_diffs)
+
+        H = self.heading_history_length
+        rows = np.array([self._row_for(obj.track_id) for obj in eligible], dtype=np.intp)
+        heads = self._heads[rows]
+        counts = self._counts[rows]
+        has_previous = counts > 0
+        last_slots = (heads - 1) % H
+
+        # Average speed over history (path length is maintained by the tracker)
+        total_distances = np.array([obj.total_distance for obj in eligible], dtype=np.float64)
+        total_frames = np.array([max(1, obj.frame_span) for obj in eligible], dtype=np.float64)
+        average_speeds = total_distances / total_frames
 
         # Convert to km/h
-        speed_kmh = (average_speed * self.fps / self.pixels_per_meter) * 3.6
+        speeds_kmh = (average_speeds * self.fps / self.pixels_per_meter) * 3.6
 
         # Determine if moving
-        is_moving = current_speed >= self.stationary_threshold
+        is_moving = current_speeds >= self.stationary_threshold
 
         # Speed change
-        previous_speed = self._previous_speeds.get(track_id, current_speed)
-        speed_change = current_speed - previous_speed
-        self._previous_speeds[track_id] = current_speed
-
-        # === SPEED HISTORY FOR ACCELERATION ===
-        if track_id not in self._speed_histories:
-            self._speed_histories[track_id] = []
-        self._speed_histories[track_id].append(current_speed)
-
-        # Trim speed history
-        if len(self._speed_histories[track_id]) > self.heading_history_length:
-            self._speed_histories[track_id] = self._speed_histories[track_id][-self.heading_history_length :]
-
-        # === ACCELERATION CALCULATION (NEW) ===
-        acceleration = 0.0
-        speed_hist = self._speed_histories[track_id]
-        if len(speed_hist) >= self.acceleration_window:
-            # Calculate acceleration as speed change over window
-            old_speed = speed_hist[-self.acceleration_window]
-            new_speed = speed_hist[-1]
-            acceleration = (new_speed - old_speed) / self.acceleration_window
-
-        # === SMOOTHED SPEED (noise reduction) ===
-        smoothed_speed = moving_average(speed_hist, self.smooth_window)
+        previous_speeds = np.where(has_previous, self._speed_buf[rows, last_slots], current_speeds)
+        speed_changes = current_speeds - previous_speeds
 
         # === HEADING CALCULATION ===
-        # Only calculate heading if moving (avoid noise when stationary)
-        if current_speed >= self.stationary_threshold:
-            current_heading = self._calculate_heading(history[-2], history[-1])
-        else:
-            # Keep previous heading when stationary
-            current_heading = self._previous_headings.get(track_id, 0.0)
-
-        # Calculate heading change
-        previous_heading = self._previous_headings.get(track_id, current_heading)
-        heading_change = angle_difference(current_heading, previous_heading)
-        self._previous_headings[track_id] = current_heading
-
-        # Update heading history
-        if track_id not in self._heading_histories:
-            self._heading_histories[track_id] = []
-        self._heading_histories[track_id].append(current_heading)
-
-        # Trim history
-        if len(self._heading_histories[track_id]) > self.heading_history_length:
-            self._heading_histories[track_id] = self._heading_histories[track_id][-self.heading_history_length :]
-
-        # === SMOOTHED HEADING (noise reduction) ===
-        smoothed_heading = moving_average(self._heading_histories[track_id], self.smooth_window)
-
-        return SpeedInfo(
-            track_id=track_id,
-            current_speed=current_speed,
-            average_speed=average_speed,
-            speed_kmh=speed_kmh,
-            is_moving=is_moving,
-            speed_change=speed_change,
-            current_heading=current_heading,
-            heading_change=heading_change,
-            heading_history=self._heading_histories[track_id].copy(),
-            acceleration=acceleration,
-            smoothed_speed=smoothed_speed,
-            smoothed_heading=smoothed_heading,
+        # Only take the motion heading if moving (avoid noise when stationary);
+        # otherwise keep the previous heading
+        previous_headings = self._heading_buf[rows, last_slots]
+        kept_headings = np.where(has_previous, previous_headings, 0.0)
+        current_headings = np.where(is_moving, motion_headings, kept_headings)
+        heading_changes = np.where(
+            has_previous, normalize_angle_np(current_headings - previous_headings), 0.0
         )
 
-    def estimate_speeds(self, tracked_objects: List[TrackedObject]) -> Dict[int, SpeedInfo]:
-        """
-        Estimate speeds and headings for multiple tracked objects.
+        # === SMOOTHED SPEED/HEADING (noise reduction) ===
+        # Running sums: drop the entry leaving the window before it is overwritten
+        smooth_len = self._smooth_len
+        evicting = counts >= smooth_len
+        evict_slots = (heads - smooth_len) % H
+        speed_sums = (
+            self._speed_sums[rows] - np.where(evicting, self._speed_buf[rows, evict_slots], 0.0)
+        ) + current_speeds
+        heading_sums = (
+            self._heading_sums[rows] - np.where(evicting, self._heading_buf[rows, evict_slots], 0.0)
+        ) + current_headings
+        smooth_counts = np.minimum(counts + 1, smooth_len)
+        smoothed_speeds = speed_sums / smooth_counts
+        smoothed_headings = heading_sums / smooth_counts
+
+        # === APPEND TO HISTORIES ===
+        self._speed_buf[rows, heads] = current_speeds
+        self._heading_buf[rows, heads] = current_headings
+        heads = (heads + 1) % H
+        counts = np.minimum(counts + 1, H)
+        self._heads[rows] = heads
+        self._counts[rows] = counts
+        self._speed_sums[rows] = speed_sums
+        self._heading_sums[rows] = heading_sums
 
-        Args:
-            tracked_objects: List of TrackedObject
+        # === ACCELERATION CALCULATION (NEW) ===
+        # Speed change over the window: newest speed minus the speed
+        # acceleration_window entries back (counting the newest)
+        window = self.acceleration_window
+        window_start = self._speed_buf[rows, (heads - window) % H]
+        accelerations = np.where(counts >= window, (current_speeds - window_start) / window, 0.0)
+        self._accelerations[rows] = accelerations
+
+        # Heading history snapshots (oldest first), gathered for all rows at once
+        history_slots = ((heads - counts)[:, None] + np.arange(H)) % H
+        heading_rows = self._heading_buf[rows[:, None], history_slots].tolist()
 
-        Returns:
-            Dict mapping track_id to SpeedInfo
-        """
         speeds = {}
-        for obj in tracked_objects:
-            speed_info = self.estimate_speed(obj)
-            if speed_info is not None:
-                speeds[obj.track_id] = speed_info
+        for (
+            obj, count, history, current_speed, average_speed, speed_kmh, moving,
+            speed_change, current_heading, heading_change, acceleration,
+            smoothed_speed, smoothed_heading,
+        ) in zip(
+            eligible, counts.tolist(), heading_rows, current_speeds.tolist(),
+            average_speeds.tolist(), speeds_kmh.tolist(), is_moving.tolist(),
+            speed_changes.tolist(), current_headings.tolist(), heading_changes.tolist(),
+            accelerations.tolist(), smoothed_speeds.tolist(), smoothed_headings.tolist(),
+        ):
+            track_id = obj.track_id
+            self._heading_diff_cache.pop(track_id, None)
+            speeds[track_id] = SpeedInfo(
+                track_id=track_id,
+                current_speed=current_speed,
+                average_speed=average_speed,
+                speed_kmh=speed_kmh,
+                is_moving=moving,
+                speed_change=speed_change,
+                current_heading=current_heading,
+                heading_change=heading_change,
+                heading_history=tuple(history[:count]),
+                acceleration=acceleration,
+                smoothed_speed=smoothed_speed,
+                smoothed_heading=smoothed_heading,
+            )
 
         return speeds
 
@@ -273,23 +368,11 @@ class SpeedEstimator:
         Returns:
             Maximum absolute heading change in degrees
         """
-        if track_id not in self._heading_histories:
+        diffs = self._recent_heading_diffs(track_id, window)
+        if diffs is None:
             return 0.0
 
-        history = self._heading_histories[track_id]
-        if len(history) < 2:
-            return 0.0
-
-        # Get recent window
-        recent = history[-min(window, len(history)) :]
-
-        max_change = 0.0
-        for i in range(1, len(recent)):
-            change = abs(angle_difference(recent[i], recent[i - 1]))
-            if change > max_change:
-                max_change = change
-
-        return max_change
+        return float(np.max(np.abs(diffs)))
 
     def get_total_heading_change(self, track_id: int, window: int = 5) -> float:
         """
@@ -304,20 +387,37 @@ class SpeedEstimator:
         Returns:
             Total heading change in degrees (can be positive or negative)
         """
-        if track_id not in self._heading_histories:
+        diffs = self._recent_heading_diffs(track_id, window)
+        if diffs is None:
             return 0.0
 
-        history = self._heading_histories[track_id]
-        if len(history) < 2:
-            return 0.0
+        return float(np.sum(diffs))
 
-        recent = history[-min(window, len(history)) :]
+    def _recent_heading_diffs(self, track_id: int, window: int) -> Optional[np.ndarray]:
+        """
+        Frame-to-frame heading changes over the last `window` headings.
 
-        total_change = 0.0
-        for i in range(1, len(recent)):
-            total_change += angle_difference(recent[i], recent[i - 1])
+        Cached until the track's next heading update, so several consumers
+        asking within the same frame share one computation.
 
-        return total_change
+        Returns:
+            Wrapped differences in degrees, or None if fewer than 2 headings
+        """
+        row = self._rows.get(track_id)
+        if row is None:
+            return None
+
+        cache = self._heading_diff_cache.setdefault(track_id, {})
+        if window in cache:
+            return cache[window]
+
+        diffs = None
+        recent = self._heading_buf[row, self._ordered_slots(row, window)]
+        if len(recent) >= 2:
+            diffs = normalize_angle_np(np.diff(recent))
+
+        cache[window] = diffs
+        return diffs
 
     def update_fps(self, fps: float) -> None:
         """Update FPS for km/h conversion."""
@@ -326,33 +426,31 @@ class SpeedEstimator:
 
     def cleanup_stale_tracks(self, active_track_ids: set) -> None:
         """Remove data for tracks no longer active."""
-        stale_ids = [tid for tid in self._previous_speeds if tid not in active_track_ids]
+        stale_ids = [tid for tid in self._rows if tid not in active_track_ids]
         for tid in stale_ids:
-            if tid in self._previous_speeds:
-                del self._previous_speeds[tid]
-            if tid in self._previous_headings:
-                del self._previous_headings[tid]
-            if tid in self._heading_histories:
-                del self._heading_histories[tid]
-            if tid in self._speed_histories:
-                del self._speed_histories[tid]
+            # Reset the row so the next track to claim it starts empty
+            row = self._rows.pop(tid)
+            self._heads[row] = 0
+            self._counts[row] = 0
+            self._speed_sums[row] = 0.0
+            self._heading_sums[row] = 0.0
+            self._accelerations[row] = 0.0
+            self._free_rows.append(row)
+            self._heading_diff_cache.pop(tid, None)
 
     def get_acceleration(self, track_id: int) -> float:
-        """Get current acceleration for a track."""
-        if track_id not in self._speed_histories:
-            return 0.0
-
-        speed_hist = self._speed_histories[track_id]
-        if len(speed_hist) < self.acceleration_window:
+        """Get current acceleration for a track (as computed by the last estimate)."""
+        row = self._rows.get(track_id)
+        if row is None:
             return 0.0
-
-        old_speed = speed_hist[-self.acceleration_window]
-        new_speed = speed_hist[-1]
-        return (new_speed - old_speed) / self.acceleration_window
+        return float(self._accelerations[row])
 
     def get_speed_history(self, track_id: int) -> List[float]:
         """Get speed history for a track."""
-        return self._speed_histories.get(track_id, []).copy()
+        row = self._rows.get(track_id)
+        if row is None:
+            return []
+        return self._speed_buf[row, self._ordered_slots(row)].tolist()
 
     def is_decelerating(self, track_id: int, threshold: float = -0.5) -> bool:
         """Check if a vehicle is decelerating significantly."""
@@ -0,0 +1,80 @@
+"""Tests for geometry utility functions."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.geometry import (
+    boxes_overlap,
+    boxes_overlap_matrix,
+    calculate_distance,
+    calculate_distance_array,
+    calculate_iou,
+    calculate_iou_matrix,
+    calculate_iou_pairs,
+)
+
+
+BOXES = [
+    (0, 0, 10, 10),
+    (5, 5, 15, 15),
+    (20, 20, 30, 30),
+    (0, 0, 10, 10),
+    (3, 3, 3, 8),  # zero area
+]
+
+
+def test_iou_matrix_matches_scalar():
+    """Test the all-pairs IOU matches calculate_iou for every pair."""
+    matrix = calculate_iou_matrix(np.array(BOXES))
+
+    assert matrix.shape == (len(BOXES), len(BOXES))
+    for i, box1 in enumerate(BOXES):
+        for j, box2 in enumerate(BOXES):
+            assert matrix[i, j] == pytest.approx(calculate_iou(box1, box2))
+
+    np.testing.assert_allclose(matrix, matrix.T)
+
+
+def test_iou_pairs_asymmetric():
+    """Test IOU between two different box sets."""
+    pairs = calculate_iou_pairs(np.array(BOXES[:2]), np.array(BOXES[1:4]))
+
+    assert pairs.shape == (2, 3)
+    assert pairs[0, 0] == pytest.approx(25 / 175)
+    assert pairs[0, 2] == pytest.approx(1.0)
+    assert pairs[1, 1] == 0.0
+
+
+def test_iou_matrix_empty():
+    """Test an empty box list gives an empty matrix."""
+    assert calculate_iou_matrix(np.zeros((0, 4))).shape == (0, 0)
+
+
+def test_distance_scalar_and_array():
+    """Test scalar distance and its broadcasting array form."""
+    assert calculate_distance((0, 0), (3, 4)) == pytest.approx(5.0)
+    assert isinstance(calculate_distance((0, 0), (3, 4)), float)
+
+    points = np.array([(0.0, 0.0), (3.0, 4.0), (6.0, 8.0)])
+    pairwise = calculate_distance_array(points[:, None, :], points[None, :, :])
+    np.testing.assert_allclose(pairwise, [[0, 5, 10], [5, 0, 5], [10, 5, 0]])
+    np.testing.assert_allclose(calculate_distance_array(points, (0.0, 0.0)), [0, 5, 10])
+
+
+def test_boxes_overlap_matrix_matches_scalar():
+    """Test the all-pairs overlap check matches boxes_overlap, touching edges included."""
+    boxes = BOXES + [(10, 0, 20, 10), (11, 0, 20, 10)]
+    matrix = boxes_overlap_matrix(np.array(boxes))
+
+    for i, box1 in enumerate(boxes):
+        for j, box2 in enumerate(boxes):
+            assert matrix[i, j] == boxes_overlap(box1, box2)
+
+    assert boxes_overlap(boxes[0], boxes[-2]) is True
+    assert boxes_overlap(boxes[0], boxes[-1]) is False
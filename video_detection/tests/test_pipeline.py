@@ -4,10 +4,14 @@ import pytest
 import sys
 from pathlib import Path
 
+import numpy as np
+
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from pipeline.inference_pipeline import PipelineConfig
+from pipeline import inference_pipeline
+from pipeline.inference_pipeline import InferencePipeline, PipelineConfig
+from tracker.bytetrack_tracker import TrackedObject
 
 
 def test_pipeline_config_defaults():
@@ -83,3 +87,32 @@ def test_pipeline_config_speed_estimation():
     assert config.speed_history_length == 25
     assert config.acceleration_window == 6
     assert config.smooth_window == 4
+
+
+class _StubTracker:
+    """ByteTrackTracker stand-in that loads no model."""
+
+    def __init__(self, **kwargs):
+        pass
+
+
+def test_annotate_frame_scale(monkeypatch):
+    """Test annotate_scale downsizes the annotated copy and scales drawn boxes."""
+    monkeypatch.setattr(inference_pipeline, "ByteTrackTracker", _StubTracker)
+    pipeline = InferencePipeline(PipelineConfig(annotate_scale=0.5))
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    car = TrackedObject(
+        track_id=1, bbox=(200, 60, 300, 140), class_id=2, class_name="car",
+        confidence=0.9, centroid=(250.0, 100.0), frame_id=0,
+    )
+
+    annotated = pipeline._annotate_frame(frame, [car], {}, [])
+
+    assert annotated.shape == (100, 200, 3)
+    assert not frame.any()  # the input frame is left untouched
+    green = [0, 255, 0]
+    # Box edges land at the halved coordinates (100, 30)-(150, 70)
+    assert annotated[50, 100].tolist() == green
+    assert annotated[50, 150].tolist() == green
+    assert annotated[70, 125].tolist() == green
+    assert annotated[50, 125].tolist() != green
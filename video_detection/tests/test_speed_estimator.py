@@ -0,0 +1,208 @@
+"""Tests for speed, heading and acceleration estimation."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tracker.bytetrack_tracker import TrackedObject
+import numpy as np
+
+from speed_estimation.speed_estimator import SpeedEstimator, normalize_angle, normalize_angle_np
+
+
+def make_track(track_id, start, start_frame=0):
+    """Build a TrackedObject whose history starts at `start`."""
+    return TrackedObject(
+        track_id=track_id,
+        bbox=(0, 0, 10, 10),
+        class_id=0,
+        class_name="car",
+        confidence=0.9,
+        centroid=start,
+        frame_id=start_frame,
+    )
+
+
+def advance(obj, point, max_history=30):
+    """Move a track to `point` on the next frame."""
+    obj.centroid = point
+    obj.frame_id += 1
+    obj.update_history(max_history)
+
+
+def test_straight_line_speed_and_heading():
+    """Test constant motion to the right at 3 px/frame."""
+    estimator = SpeedEstimator(fps=30.0)
+    obj = make_track(1, (0.0, 0.0))
+    info = None
+    for i in range(1, 6):
+        advance(obj, (3.0 * i, 0.0))
+        info = estimator.estimate_speed(obj)
+
+    assert info.current_speed == pytest.approx(3.0)
+    assert info.average_speed == pytest.approx(3.0)
+    assert info.current_heading == pytest.approx(0.0)
+    assert info.is_moving is True
+    assert info.acceleration == pytest.approx(0.0)
+
+
+def test_heading_down_and_left():
+    """Test heading convention: 90 = down (+y), 180 = left (-x)."""
+    estimator = SpeedEstimator()
+    down = make_track(1, (0.0, 0.0))
+    advance(down, (0.0, 5.0))
+    left = make_track(2, (0.0, 0.0))
+    advance(left, (-5.0, 0.0))
+
+    infos = estimator.estimate_speeds([down, left])
+    assert infos[1].current_heading == pytest.approx(90.0)
+    assert abs(infos[2].current_heading) == pytest.approx(180.0)
+
+
+def test_single_point_track_is_skipped():
+    """Test tracks without enough history produce no SpeedInfo."""
+    estimator = SpeedEstimator()
+    obj = make_track(1, (0.0, 0.0))
+    assert estimator.estimate_speed(obj) is None
+    assert estimator.estimate_speeds([obj]) == {}
+
+
+def test_average_speed_follows_history_window():
+    """Test average speed only covers the tracker's history window."""
+    estimator = SpeedEstimator()
+    obj = make_track(1, (0.0, 0.0))
+    x = 0.0
+    for i in range(1, 30):
+        x += 10.0 if i <= 10 else 2.0
+        advance(obj, (x, 0.0), max_history=5)
+        info = estimator.estimate_speed(obj)
+
+    assert info.average_speed == pytest.approx(2.0)
+
+
+def test_acceleration_when_braking():
+    """Test decreasing speed gives negative acceleration."""
+    estimator = SpeedEstimator(acceleration_window=3)
+    obj = make_track(1, (0.0, 0.0))
+    x = 0.0
+    for step in (10.0, 8.0, 6.0, 4.0):
+        x += step
+        advance(obj, (x, 0.0))
+        info = estimator.estimate_speed(obj)
+
+    assert info.acceleration < 0
+    assert estimator.is_decelerating(1, threshold=-0.5)
+    assert estimator.get_acceleration(1) == info.acceleration
+    assert estimator.get_acceleration(99) == 0.0
+
+
+def test_tracked_object_distance_cache():
+    """Test update_history keeps the path length of the history window."""
+    obj = make_track(1, (0.0, 0.0))
+    for point in ((3.0, 4.0), (3.0, 10.0), (3.0, 11.0)):
+        advance(obj, point, max_history=3)
+
+    # Window is (3,4) -> (3,10) -> (3,11); the first 5 px segment was evicted
+    assert obj.last_segment_distance == pytest.approx(1.0)
+    assert obj.total_distance == pytest.approx(7.0)
+    assert obj.frame_span == 2
+
+
+def test_tracked_object_history_ring():
+    """Test the ring buffer keeps the newest positions in order."""
+    obj = make_track(1, (0.0, 0.0))
+    assert obj.history_count == 1
+    for i in range(1, 6):
+        advance(obj, (float(i), 2.0 * i), max_history=4)
+
+    assert obj.history_count == 4
+    np.testing.assert_allclose(obj.centroid_history, [(2, 4), (3, 6), (4, 8), (5, 10)])
+    np.testing.assert_array_equal(obj.frame_history, [2, 3, 4, 5])
+    assert obj.last_segment == (4.0, 8.0, 5.0, 10.0)
+    assert obj.last_segment_delta == (1.0, 2.0)
+    assert obj.last_frame_gap == 1
+
+    # Shrinking the window keeps the newest entries and their path length
+    advance(obj, (6.0, 12.0), max_history=2)
+    np.testing.assert_allclose(obj.centroid_history, [(5, 10), (6, 12)])
+    assert obj.total_distance == pytest.approx(np.hypot(1.0, 2.0))
+
+    with pytest.raises(ValueError):
+        obj.update_history(1)
+
+
+def test_normalize_angle():
+    """Test angles wrap into [-180, 180] for scalars and arrays."""
+    assert normalize_angle(190.0) == pytest.approx(-170.0)
+    assert normalize_angle(-190.0) == pytest.approx(170.0)
+    assert normalize_angle(1090.0) == pytest.approx(10.0)
+
+    wrapped = normalize_angle_np(np.array([190.0, -190.0, 45.0, 720.0]))
+    np.testing.assert_allclose(wrapped, [-170.0, 170.0, 45.0, 0.0])
+
+
+def test_normalize_angle_endpoints():
+    """Test +/-180 keep their sign, as with the original subtract/add-360 loops."""
+    angles = [180.0, -180.0, 540.0, -540.0]
+    expected = [180.0, -180.0, 180.0, -180.0]
+    assert [normalize_angle(a) for a in angles] == expected
+    np.testing.assert_array_equal(normalize_angle_np(np.array(angles)), expected)
+
+
+def test_heading_change_window():
+    """Test max/total heading change over the recent window, across the wrap."""
+    estimator = SpeedEstimator()
+    obj = make_track(1, (0.0, 0.0))
+    # Headings 0, 90, 180 (wraps to -180), 90
+    for point in ((10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 20.0)):
+        advance(obj, point)
+        estimator.estimate_speed(obj)
+
+    assert estimator.get_max_heading_change(1, window=4) == pytest.approx(90.0)
+    assert estimator.get_total_heading_change(1, window=2) == pytest.approx(-90.0)
+    assert estimator.get_max_heading_change(99) == 0.0
+    assert estimator.get_total_heading_change(99) == 0.0
+    assert 99 not in estimator._heading_diff_cache  # unknown ids leave no cache entry
+
+    advance(obj, (10.0, 20.0))
+    estimator.estimate_speed(obj)
+    assert estimator.get_total_heading_change(1, window=2) == pytest.approx(-90.0)
+    assert estimator.get_total_heading_change(1, window=3) == pytest.approx(-180.0)
+
+
+def test_smoothed_speed_uses_recent_window():
+    """Test smoothed speed averages only the last smooth_window speeds."""
+    estimator = SpeedEstimator(smooth_window=3)
+    obj = make_track(1, (0.0, 0.0))
+    x = 0.0
+    for step in (1.0, 2.0, 3.0, 4.0, 5.0):
+        x += step
+        advance(obj, (x, 0.0))
+        info = estimator.estimate_speed(obj)
+
+    assert info.smoothed_speed == pytest.approx(4.0)
+    assert info.smoothed_heading == pytest.approx(0.0)
+
+
+def test_track_rows_grow_and_are_reused():
+    """Test buffers grow past max_tracks and cleaned-up rows start empty."""
+    estimator = SpeedEstimator(fps=30.0, max_tracks=1)
+    tracks = [make_track(tid, (0.0, 0.0)) for tid in (1, 2, 3)]
+    for obj in tracks:
+        advance(obj, (3.0, 0.0))
+    assert len(estimator.estimate_speeds(tracks)) == 3
+    assert estimator.get_speed_history(3) == [pytest.approx(3.0)]
+
+    estimator.cleanup_stale_tracks({1, 2})
+    assert estimator.get_speed_history(3) == []
+
+    fresh = make_track(4, (0.0, 0.0))
+    advance(fresh, (0.0, 4.0))
+    info = estimator.estimate_speed(fresh)
+    assert info.heading_history == (pytest.approx(90.0),)
+    assert info.speed_change == 0.0
+    assert estimator.get_speed_history(4) == [pytest.approx(4.0)]
@@ -0,0 +1,235 @@
+"""Tests for VideoReader frame iteration."""
+
+import os
+import queue
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from video_io.video_reader import VideoReader
+from video_io import shared_memory_reader
+from video_io.shared_memory_reader import SharedMemoryVideoReader
+from video_io.preprocess import preprocess_frame
+
+
+@pytest.fixture
+def sample_video(tmp_path):
+    """Write a short 10-frame MJPG clip and return its path."""
+    path = tmp_path / "sample.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (64, 48))
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def test_frames_batched_sizes(sample_video):
+    """Test batches are full except for the last one."""
+    reader = VideoReader(sample_video)
+    batches = list(reader.frames_batched(4))
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert [f.frame_id for b in batches for f in b] == list(range(10))
+
+
+def test_frames_batched_matches_frames(sample_video):
+    """Test batched iteration yields the same frames as frames()."""
+    single = [f.frame_id for f in VideoReader(sample_video, target_fps=5.0).frames()]
+    batched = [f.frame_id for b in VideoReader(sample_video, target_fps=5.0).frames_batched(3) for f in b]
+    assert batched == single == [0, 2, 4, 6, 8]
+
+
+def test_frames_batched_invalid_size(sample_video):
+    """Test batch_size must be positive."""
+    with pytest.raises(ValueError):
+        next(VideoReader(sample_video).frames_batched(0))
+
+
+def test_shared_memory_reader_matches_video_reader(sample_video):
+    """Test frames handed over through shared memory match direct decoding."""
+    expected = [(f.frame_id, f.frame.copy()) for f in VideoReader(sample_video, 32, 24).frames()]
+
+    reader = SharedMemoryVideoReader(sample_video, 32, 24, prefetch=3)
+    received = [(f.frame_id, f.frame.copy()) for b in reader.frames_batched(2) for f in b]
+
+    assert [fid for fid, _ in received] == [fid for fid, _ in expected]
+    for (_, got), (_, want) in zip(received, expected):
+        np.testing.assert_array_equal(got, want)
+    assert reader.resolution == (64, 48)
+
+
+def test_shared_memory_reader_process_exits(sample_video):
+    """Test a process that used the reader exits instead of hanging at shutdown."""
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(Path(__file__).parent.parent)!r})
+        from video_io.shared_memory_reader import SharedMemoryVideoReader
+        reader = SharedMemoryVideoReader({sample_video!r}, 32, 24, prefetch=3)
+        print(sum(len(b) for b in reader.frames_batched(2)))
+    """)
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "10"
+    assert "resource_tracker" not in result.stderr
+
+
+def test_decode_worker_reports_mid_stream_failure(sample_video, monkeypatch):
+    """Test a decoder that fails mid-stream sends an error instead of leaving the consumer waiting."""
+
+    class FailingReader(VideoReader):
+        def frames(self):
+            for frame_info in super().frames():
+                if frame_info.frame_id == 2:
+                    raise OSError("stream dropped")
+                yield frame_info
+
+    monkeypatch.setattr(shared_memory_reader, "VideoReader", FailingReader)
+    block = shared_memory_reader.shared_memory.SharedMemory(create=True, size=32 * 24 * 3)
+    try:
+        free_slots, ready_slots = queue.Queue(), queue.Queue()
+        for slot in (0, 0, 0):
+            free_slots.put(slot)
+        shared_memory_reader._decode_worker(sample_video, 32, 24, None, [block.name], free_slots, ready_slots)
+    finally:
+        block.close()
+        block.unlink()
+
+    messages = [ready_slots.get_nowait() for _ in range(ready_slots.qsize())]
+    assert messages[0][0] == "meta"
+    assert [m[1] for m in messages[1:-1]] == [0, 1]
+    assert messages[-1] == ("error", "OSError: stream dropped")
+
+
+def test_shared_memory_reader_decoder_death(sample_video):
+    """Test the consumer raises instead of blocking forever when the decoder process dies."""
+    reader = SharedMemoryVideoReader(sample_video, 32, 24, prefetch=2)
+    batches = reader.frames_batched(1)
+    next(batches)
+    reader._process.kill()
+    reader._process.join()
+    # Frames already published may still arrive before the error
+    with pytest.raises(RuntimeError, match="Decoder process exited"):
+        for _ in batches:
+            pass
+    assert reader._process is None
+
+
+def test_shared_memory_reader_batch_exceeds_prefetch(sample_video):
+    """Test a batch cannot pin more slots than the ring holds."""
+    reader = SharedMemoryVideoReader(sample_video, 32, 24, prefetch=2)
+    with pytest.raises(ValueError):
+        next(reader.frames_batched(3))
+
+
+def test_resize_interpolation_chosen_at_open(sample_video):
+    """Test large downscales use INTER_AREA and the frames match cv2.resize."""
+    reader = VideoReader(sample_video, 16, 12)
+    assert reader.open()
+    assert reader._interpolation == cv2.INTER_AREA
+    reader.close()
+
+    raw = next(VideoReader(sample_video).frames()).frame
+    frame = next(VideoReader(sample_video, 16, 12).frames()).frame
+    np.testing.assert_array_equal(frame, cv2.resize(raw, (16, 12), interpolation=cv2.INTER_AREA))
+
+    reader = VideoReader(sample_video, 40, 30)
+    assert reader.open()
+    assert reader._interpolation == cv2.INTER_LINEAR
+    reader.close()
+
+
+def test_preprocess_frame_matches_numpy():
+    """Test the fused preprocessing equals swap + scale + transpose in NumPy."""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(7, 5, 3), dtype=np.uint8)
+    out = np.empty((3, 7, 5), dtype=np.float32)
+
+    assert preprocess_frame(frame, out) is out
+    expected = (frame[:, :, ::-1].astype(np.float32) / 255.0).transpose(2, 0, 1)
+    np.testing.assert_allclose(out, expected, rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        preprocess_frame(frame, np.empty((3, 5, 7), dtype=np.float32))
+
+
+def test_f32chw_output_reuses_buffer(sample_video):
+    """Test output_dtype='f32chw' fills FrameInfo.tensor from one reused buffer."""
+    reader = VideoReader(sample_video, 32, 24, output_dtype="f32chw")
+    tensors = [(f.tensor, f.tensor.copy(), f.frame.copy()) for f in reader.frames()]
+
+    assert len(tensors) == 10
+    assert all(t is tensors[0][0] for t, _, _ in tensors)
+    tensor, snapshot, frame = tensors[-1]
+    assert snapshot.shape == (3, 24, 32)
+    np.testing.assert_allclose(snapshot[0], frame[:, :, 2] / 255.0, rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        VideoReader(sample_video, output_dtype="f16")
+
+
+def test_resize_reuses_buffer_per_batch_slot(sample_video):
+    """Test resized frames reuse preallocated buffers, one per batch slot."""
+    single = [f.frame for f in VideoReader(sample_video, 32, 24).frames()]
+    assert all(f is single[0] for f in single)
+
+    reader = VideoReader(sample_video, 32, 24)
+    expected = [f.frame.copy() for f in VideoReader(sample_video, 32, 24).frames()]
+    for batch in reader.frames_batched(4):
+        assert len({id(f.frame) for f in batch}) == len(batch)
+        for f in batch:
+            np.testing.assert_array_equal(f.frame, expected[f.frame_id])
+
+
+def test_skipped_frames_keep_content_in_sync(sample_video):
+    """Test grabbing skipped frames still yields the right kept frames."""
+    frames = [(f.frame_id, f.frame) for f in VideoReader(sample_video, target_fps=5.0).frames()]
+    assert [frame_id for frame_id, _ in frames] == [0, 2, 4, 6, 8]
+    for frame_id, frame in frames:
+        assert abs(float(frame.mean()) - frame_id * 20) < 3
+
+
+def test_frame_info_reused_between_reads(sample_video):
+    """Test read_frame/frames reuse one FrameInfo while batches get their own."""
+    reader = VideoReader(sample_video)
+    assert reader.open()
+    first = reader.read_frame()
+    assert first.frame_id == 0
+    second = reader.read_frame()
+    assert second is first and second.frame_id == 1
+    reader.close()
+
+    infos = [f for b in VideoReader(sample_video).frames_batched(4) for f in b]
+    assert len({id(f) for f in infos}) == 10
+
+
+def test_stream_grabber_buffers_frames(sample_video, monkeypatch):
+    """Test the background decoder used for streams delivers frames in order."""
+    monkeypatch.setattr(VideoReader, "_is_stream", lambda self: True)
+    # The sample is a file: skip the stream demuxer options (nobuffer drops its last frame)
+    monkeypatch.setenv("OPENCV_FFMPEG_CAPTURE_OPTIONS", "")
+
+    reader = VideoReader(sample_video, stream_buffer_size=16)
+    ids = [f.frame_id for f in reader.frames()]
+    assert ids == list(range(10))
+    assert reader._grabber is None
+
+    # A one-frame buffer may drop frames but keeps order and the newest frame
+    ids = [f.frame_id for f in VideoReader(sample_video, stream_buffer_size=1).frames()]
+    assert ids == sorted(set(ids)) and ids[-1] == 9
+
+
+def test_stream_capture_options_scoped_to_open(sample_video, monkeypatch):
+    """Test the stream demuxer options don't leak into later captures."""
+    monkeypatch.delenv("OPENCV_FFMPEG_CAPTURE_OPTIONS", raising=False)
+    monkeypatch.setattr(VideoReader, "_is_stream", lambda self: True)
+    VideoReader(sample_video)._open_capture(sample_video).release()
+    assert "OPENCV_FFMPEG_CAPTURE_OPTIONS" not in os.environ
@@ -7,6 +7,7 @@ Provides:
 """
 
 import logging
+import math
 from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
@@ -31,19 +32,141 @@ class TrackedObject:
     centroid: Tuple[float, float]
     frame_id: int
     
-    # History for speed calculation
-    centroid_history: List[Tuple[float, float]] = field(default_factory=list)
-    frame_history: List[int] = field(default_factory=list)
+    # Number of positions kept for speed calculation
+    history_length: int = 30
+    
+    # History as struct-of-arrays ring buffers: slot _head - 1 holds the newest
+    # entry and, once full, each append overwrites the oldest one.
+    # segment_lengths[i] is the distance from the previous position to slot i.
+    centroid_xs: np.ndarray = field(init=False, repr=False, compare=False)
+    centroid_ys: np.ndarray = field(init=False, repr=False, compare=False)
+    frame_ids: np.ndarray = field(init=False, repr=False, compare=False)
+    segment_lengths: np.ndarray = field(init=False, repr=False, compare=False)
+    _head: int = field(init=False, default=0, repr=False)
+    _count: int = field(init=False, default=0, repr=False)
+    
+    # Newest segment (dx, dy) and path length, cached as centroids are appended (pixels)
+    last_segment_delta: Tuple[float, float] = field(init=False, default=(0.0, 0.0))
+    last_segment_distance: float = field(init=False, default=0.0)
+    total_distance: float = field(init=False, default=0.0)
+    
+    def __post_init__(self) -> None:
+        """Allocate the history ring and record the initial position."""
+        if self.history_length < 2:
+            raise ValueError(f"history_length must be >= 2, got {self.history_length}")
+        self._allocate(self.history_length)
+        self.update_history(self.history_length)
+    
+    def _allocate(self, capacity: int) -> None:
+        """Create empty ring buffers of the given capacity."""
+        self.history_length = capacity
+        self.centroid_xs = np.zeros(capacity, dtype=np.float64)
+        self.centroid_ys = np.zeros(capacity, dtype=np.float64)
+        self.frame_ids = np.zeros(capacity, dtype=np.int64)
+        self.segment_lengths = np.zeros(capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+    
+    def _ordered_slots(self) -> np.ndarray:
+        """Ring indices of the stored entries, oldest first."""
+        return (self._head - self._count + np.arange(self._count)) % self.history_length
+    
+    def _resize(self, capacity: int) -> None:
+        """Reallocate the ring, keeping the newest entries that fit."""
+        if capacity < 2:
+            raise ValueError(f"history_length must be >= 2, got {capacity}")
+        
+        slots = self._ordered_slots()[-capacity:]
+        xs, ys = self.centroid_xs[slots], self.centroid_ys[slots]
+        frames, segments = self.frame_ids[slots], self.segment_lengths[slots]
+        
+        self._allocate(capacity)
+        keep = len(slots)
+        self.centroid_xs[:keep] = xs
+        self.centroid_ys[:keep] = ys
+        self.frame_ids[:keep] = frames
+        self.segment_lengths[:keep] = segments
+        self._head = keep % capacity
+        self._count = keep
+        self.total_distance = float(segments[1:].sum())
     
     def update_history(self, max_history: int = 30) -> None:
-        """Add current position to history and trim if needed."""
-        self.centroid_history.append(self.centroid)
-        self.frame_history.append(self.frame_id)
-        
-        # Keep only recent history
-        if len(self.centroid_history) > max_history:
-            self.centroid_history = self.centroid_history[-max_history:]
-            self.frame_history = self.frame_history[-max_history:]
+        """
+        Add current position to history, keeping at most max_history entries.
+        
+        Also updates last_segment_delta, last_segment_distance and the
+        running total_distance over the history window, so readers never
+        walk the centroids.
+        """
+        if max_history != self.history_length:
+            self._resize(max_history)
+        
+        capacity = self.history_length
+        head = self._head
+        x, y = self.centroid
+        
+        dx = dy = 0.0
+        if self._count:
+            prev = (head - 1) % capacity
+            dx = x - float(self.centroid_xs[prev])
+            dy = y - float(self.centroid_ys[prev])
+        segment = math.hypot(dx, dy)
+        
+        if self._count == capacity:
+            # The entry after the evicted one becomes the oldest, so the
+            # segment leading into it leaves the window
+            self.total_distance -= float(self.segment_lengths[(head + 1) % capacity])
+        else:
+            self._count += 1
+        
+        self.centroid_xs[head] = x
+        self.centroid_ys[head] = y
+        self.frame_ids[head] = self.frame_id
+        self.segment_lengths[head] = segment
+        self._head = (head + 1) % capacity
+        
+        self.last_segment_delta = (dx, dy)
+        self.last_segment_distance = segment
+        self.total_distance += segment
+    
+    @property
+    def history_count(self) -> int:
+        """Number of positions currently held in the history."""
+        return self._count
+    
+    @property
+    def centroid_history(self) -> np.ndarray:
+        """Historical centroids as an (n, 2) array, oldest first."""
+        slots = self._ordered_slots()
+        return np.column_stack((self.centroid_xs[slots], self.centroid_ys[slots]))
+    
+    @property
+    def frame_history(self) -> np.ndarray:
+        """Frame IDs matching centroid_history, oldest first."""
+        return self.frame_ids[self._ordered_slots()]
+    
+    @property
+    def last_segment(self) -> Tuple[float, float, float, float]:
+        """Newest history segment as (x1, y1, x2, y2); needs history_count >= 2."""
+        newest = (self._head - 1) % self.history_length
+        prev = (self._head - 2) % self.history_length
+        return (
+            self.centroid_xs[prev], self.centroid_ys[prev],
+            self.centroid_xs[newest], self.centroid_ys[newest],
+        )
+    
+    @property
+    def last_frame_gap(self) -> int:
+        """Frames between the two newest history entries; needs history_count >= 2."""
+        return int(self.frame_ids[(self._head - 1) % self.history_length]
+                   - self.frame_ids[(self._head - 2) % self.history_length])
+    
+    @property
+    def frame_span(self) -> int:
+        """Frames between the oldest and newest history entries."""
+        newest = (self._head - 1) % self.history_length
+        oldest = (self._head - self._count) % self.history_length
+        return int(self.frame_ids[newest] - self.frame_ids[oldest])
 
 
 class ByteTrackTracker:
@@ -203,8 +326,7 @@ class ByteTrackTracker:
                         confidence=confidence,
                         centroid=centroid,
                         frame_id=frame_id,
-                        centroid_history=[centroid],
-                        frame_history=[frame_id]
+                        history_length=self.history_length,
                     )
                     self._track_histories[track_id] = tracked_obj
                 
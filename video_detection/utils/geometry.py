@@ -2,12 +2,14 @@
 Geometry utility functions for video detection.
 
 Provides:
-- IOU (Intersection over Union) calculation
-- Euclidean distance calculation
-- Bounding box operations
+- IOU (Intersection over Union) calculation, single pair or all pairs
+- Euclidean distance calculation, scalar or vectorized
+- Bounding box operations, including all-pairs overlap checks
 """
 
 from typing import Tuple, List
+import math
+
 import numpy as np
 
 
@@ -50,6 +52,53 @@ def calculate_iou(box1: Tuple[int, int, int, int],
     return intersection_area / union_area
 
 
+def calculate_iou_pairs(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Calculate IOU between every box of `boxes_a` and every box of `boxes_b`.
+    
+    Vectorized counterpart of calculate_iou using broadcasting.
+    
+    Args:
+        boxes_a: (N, 4) array of boxes (x1, y1, x2, y2)
+        boxes_b: (M, 4) array of boxes (x1, y1, x2, y2)
+        
+    Returns:
+        (N, M) IOU matrix (0 where the union is empty)
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    
+    # Intersection of every pair
+    x1_inter = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1_inter = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2_inter = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2_inter = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection_area = np.clip(x2_inter - x1_inter, 0, None) * np.clip(y2_inter - y1_inter, 0, None)
+    
+    # Union of every pair
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union_area = area_a[:, None] + area_b[None, :] - intersection_area
+    
+    # Avoid division by zero
+    iou = np.zeros_like(intersection_area)
+    np.divide(intersection_area, union_area, out=iou, where=union_area != 0)
+    return iou
+
+
+def calculate_iou_matrix(boxes: np.ndarray) -> np.ndarray:
+    """
+    Calculate pairwise IOU of all boxes.
+    
+    Args:
+        boxes: (N, 4) array of boxes (x1, y1, x2, y2)
+        
+    Returns:
+        Symmetric (N, N) IOU matrix
+    """
+    return calculate_iou_pairs(boxes, boxes)
+
+
 def calculate_distance(point1: Tuple[float, float], 
                        point2: Tuple[float, float]) -> float:
     """
@@ -62,7 +111,26 @@ def calculate_distance(point1: Tuple[float, float],
     Returns:
         Euclidean distance
     """
-    return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+    return math.hypot(point1[0] - point2[0], point1[1] - point2[1])
+
+
+def calculate_distance_array(points1: np.ndarray, points2: np.ndarray) -> np.ndarray:
+    """
+    Calculate Euclidean distances between arrays of points.
+    
+    Vectorized counterpart of calculate_distance; inputs broadcast, so
+    `points[:, None]` against `points[None, :]` gives all pairwise distances.
+    
+    Args:
+        points1: Array of points with shape (..., 2)
+        points2: Array of points with shape (..., 2)
+        
+    Returns:
+        Array of distances with the broadcast shape minus the last axis
+    """
+    points1 = np.asarray(points1, dtype=np.float64)
+    points2 = np.asarray(points2, dtype=np.float64)
+    return np.hypot(points1[..., 0] - points2[..., 0], points1[..., 1] - points2[..., 1])
 
 
 def get_centroid(box: Tuple[int, int, int, int]) -> Tuple[float, float]:
@@ -108,10 +176,29 @@ def boxes_overlap(box1: Tuple[int, int, int, int],
     x1_1, y1_1, x2_1, y2_1 = box1
     x1_2, y1_2, x2_2, y2_2 = box2
     
-    # Check if boxes don't overlap
-    if x2_1 < x1_2 or x2_2 < x1_1:
-        return False
-    if y2_1 < y1_2 or y2_2 < y1_1:
-        return False
+    # Separated along either axis (evaluated without short-circuiting)
+    return not ((x2_1 < x1_2) | (x2_2 < x1_1) | (y2_1 < y1_2) | (y2_2 < y1_1))
+
+
+def boxes_overlap_matrix(boxes: np.ndarray) -> np.ndarray:
+    """
+    Check pairwise overlap of all boxes.
+    
+    Vectorized counterpart of boxes_overlap.
+    
+    Args:
+        boxes: (N, 4) array of boxes (x1, y1, x2, y2)
+        
+    Returns:
+        Symmetric (N, N) boolean matrix, True where boxes overlap
+    """
+    boxes = np.asarray(boxes).reshape(-1, 4)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
     
-    return True
+    separated = (
+        (x2[:, None] < x1[None, :])
+        | (x2[None, :] < x1[:, None])
+        | (y2[:, None] < y1[None, :])
+        | (y2[None, :] < y1[:, None])
+    )
+    return ~separated
@@ -0,0 +1,59 @@
+"""
+Frame preprocessing module.
+
+Provides:
+- preprocess_frame: BGR uint8 HWC frame -> RGB float32 CHW tensor in [0, 1]
+
+The color swap, scaling and transpose are fused into a single pass over the
+frame. With Numba installed the kernel is compiled at import and runs its
+rows in parallel; otherwise the same result is produced with NumPy.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:  # Numba is optional; preprocessing then runs as plain NumPy
+    _HAS_NUMBA = False
+
+
+_INV_255 = np.float32(1.0 / 255.0)
+
+
+if _HAS_NUMBA:
+    @njit(
+        "void(uint8[:, :, ::1], float32[:, :, ::1])",
+        parallel=True, fastmath=True, boundscheck=False, cache=True,
+    )
+    def _preprocess_kernel(frame, out):
+        """Write frame[y, x, 2 - c] / 255 to out[c, y, x]."""
+        height, width = frame.shape[0], frame.shape[1]
+        inv = np.float32(1.0 / 255.0)
+        for y in prange(height):
+            for x in range(width):
+                out[0, y, x] = frame[y, x, 2] * inv
+                out[1, y, x] = frame[y, x, 1] * inv
+                out[2, y, x] = frame[y, x, 0] * inv
+
+
+def preprocess_frame(frame: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Convert a BGR frame to a normalized RGB CHW tensor.
+
+    Args:
+        frame: (H, W, 3) uint8 BGR image
+        out: (3, H, W) float32 C-contiguous destination, overwritten
+
+    Returns:
+        `out`
+    """
+    height, width = frame.shape[:2]
+    if out.shape != (3, height, width) or out.dtype != np.float32:
+        raise ValueError(f"out must be float32 of shape {(3, height, width)}, got {out.dtype} {out.shape}")
+
+    if _HAS_NUMBA:
+        _preprocess_kernel(np.ascontiguousarray(frame), out)
+    else:
+        np.multiply(frame[:, :, ::-1].transpose(2, 0, 1), _INV_255, out=out)
+    return out
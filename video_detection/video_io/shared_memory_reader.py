@@ -0,0 +1,362 @@
+"""
+Shared-memory video reader module.
+
+Provides:
+- SharedMemoryVideoReader: Decodes frames in a separate process and hands them
+  to the consumer through a ring of multiprocessing SharedMemory blocks
+- Same iteration interface as VideoReader (frames / frames_batched)
+
+Only slot indices and frame metadata cross the process boundary; the pixel
+data is written once by the decoder and read in place by the consumer, so
+frames are never pickled.
+"""
+
+import logging
+import multiprocessing as mp
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple, Generator, List
+
+import numpy as np
+
+from video_io.video_reader import VideoReader, FrameInfo
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the decoder process to report video properties
+_OPEN_TIMEOUT = 30.0
+# Seconds between decoder liveness checks while waiting for a frame
+_POLL_INTERVAL = 0.5
+
+# The decoder is always spawned: a forked child inherits the parent's OpenCV /
+# threading state and its queue feeder threads, and never exits
+_MP_CONTEXT = mp.get_context("spawn")
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a block owned by the parent; only the parent unlinks it.
+
+    A spawned child shares the parent's resource tracker, which records each
+    block once, so before Python 3.13 (no track=False) attaching plainly
+    leaves a single registration for the parent's unlink to clear.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _decode_worker(
+    source: str,
+    resize_width: int,
+    resize_height: int,
+    target_fps: Optional[float],
+    shm_names: List[str],
+    free_slots: "mp.Queue",
+    ready_slots: "mp.Queue",
+) -> None:
+    """
+    Decoder process entry point.
+
+    Reads frames with a VideoReader, copies each into a free shared-memory
+    slot and announces it on `ready_slots`. Sends None when the video ends,
+    or ("error", message) if decoding fails; stops early when it receives
+    None on `free_slots`.
+    """
+    shape = (resize_height, resize_width, 3)
+    blocks = [_attach_shared_memory(name) for name in shm_names]
+    views = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf) for shm in blocks]
+
+    reader = VideoReader(source, resize_width, resize_height, target_fps)
+    try:
+        if not reader.open():
+            ready_slots.put(("error",))
+            return
+
+        ready_slots.put(("meta", reader.fps, reader.total_frames, reader.resolution))
+
+        for frame_info in reader.frames():
+            slot = free_slots.get()
+            if slot is None:
+                break
+            views[slot][:] = frame_info.frame
+            ready_slots.put((slot, frame_info.frame_id, frame_info.timestamp, frame_info.fps))
+
+        ready_slots.put(None)
+    except Exception as e:
+        # The consumer is blocked on ready_slots: tell it instead of just exiting
+        logger.exception(f"Decoder failed: {source}")
+        ready_slots.put(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        reader.close()
+        del views
+        for shm in blocks:
+            shm.close()
+
+
+class SharedMemoryVideoReader:
+    """
+    Video reader that decodes in a child process.
+
+    Features:
+    - Decode + resize overlap with inference on another CPU core
+    - `prefetch` SharedMemory blocks of resize_width * resize_height * 3 bytes
+    - Zero-copy handoff: yielded frames are views into shared memory
+
+    A yielded frame is only valid until the next frame (or batch) is
+    requested; its slot is then returned to the decoder, and close()
+    unmaps every slot. Copy a frame if it must outlive the iteration.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        resize_width: int,
+        resize_height: int,
+        target_fps: Optional[float] = None,
+        prefetch: int = 4,
+    ):
+        """
+        Initialize SharedMemoryVideoReader.
+
+        Args:
+            source: Path to video file or RTSP/HTTP URL
+            resize_width: Target width (required - sizes the shared blocks)
+            resize_height: Target height (required - sizes the shared blocks)
+            target_fps: Target FPS for frame sampling (None = use source FPS)
+            prefetch: Number of frames the decoder may run ahead
+        """
+        if not resize_width or not resize_height:
+            raise ValueError("SharedMemoryVideoReader requires resize_width and resize_height")
+        if prefetch < 1:
+            raise ValueError(f"prefetch must be >= 1, got {prefetch}")
+
+        self.source = source
+        self.resize_width = resize_width
+        self.resize_height = resize_height
+        self.target_fps = target_fps
+        self.prefetch = prefetch
+
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._views: List[np.ndarray] = []
+        self._free_slots: Optional[mp.Queue] = None
+        self._ready_slots: Optional[mp.Queue] = None
+        self._process: Optional[mp.Process] = None
+
+        self._frame_count = 0
+        self._source_fps = 0.0
+        self._total_frames = 0
+        self._width = 0
+        self._height = 0
+
+    def open(self) -> bool:
+        """
+        Allocate the shared ring and start the decoder process.
+
+        Returns:
+            True if the decoder opened the source, False otherwise
+        """
+        shape = (self.resize_height, self.resize_width, 3)
+        nbytes = self.resize_width * self.resize_height * 3
+
+        self._blocks = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(self.prefetch)]
+        self._views = [np.ndarray(shape, dtype=np.uint8, buffer=shm.buf) for shm in self._blocks]
+
+        self._free_slots = _MP_CONTEXT.Queue()
+        self._ready_slots = _MP_CONTEXT.Queue()
+        for slot in range(self.prefetch):
+            self._free_slots.put(slot)
+
+        self._process = _MP_CONTEXT.Process(
+            target=_decode_worker,
+            args=(
+                self.source,
+                self.resize_width,
+                self.resize_height,
+                self.target_fps,
+                [shm.name for shm in self._blocks],
+                self._free_slots,
+                self._ready_slots,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+
+        try:
+            msg = self._ready_slots.get(timeout=_OPEN_TIMEOUT)
+        except queue.Empty:
+            msg = ("error",)
+
+        if msg[0] != "meta":
+            logger.error(f"Failed to open video source: {self.source}")
+            self.close()
+            return False
+
+        _, self._source_fps, self._total_frames, (self._width, self._height) = msg
+
+        logger.info(f"Opened video (shared-memory decoder): {self.source}")
+        logger.info(f"  Resolution: {self._width}x{self._height}")
+        logger.info(f"  FPS: {self._source_fps:.2f}")
+        logger.info(f"  Total frames: {self._total_frames}")
+        logger.info(f"  Prefetch slots: {self.prefetch}")
+
+        return True
+
+    def close(self) -> None:
+        """Stop the decoder process and release shared memory."""
+        if self._process is not None:
+            self._free_slots.put(None)
+            # Drain what the decoder already published, so its queue feeder
+            # thread can flush and the process can exit
+            self._drain_ready_slots(timeout=5.0)
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+            logger.info("Video source closed")
+
+        for q in (self._free_slots, self._ready_slots):
+            if q is not None:
+                q.close()
+                q.cancel_join_thread()
+        self._free_slots = None
+        self._ready_slots = None
+
+        self._views = []
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def _drain_ready_slots(self, timeout: float) -> None:
+        """Discard published frames until the decoder process exits (or `timeout` seconds pass)."""
+        deadline = time.monotonic() + timeout
+        while self._process.is_alive() and time.monotonic() < deadline:
+            try:
+                self._ready_slots.get(timeout=0.1)
+            except queue.Empty:
+                pass
+            except (EOFError, OSError):
+                break
+
+    def _next_frame(self) -> Optional[Tuple[FrameInfo, int]]:
+        """
+        Block until the decoder publishes a frame; returns (frame_info, slot) or None at end.
+
+        Raises:
+            RuntimeError: If the decoder failed or its process died
+        """
+        while True:
+            try:
+                item = self._ready_slots.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if self._process.is_alive():
+                    continue
+            # Dead decoder: take anything it flushed before exiting, else give up
+            try:
+                item = self._ready_slots.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                raise RuntimeError(
+                    f"Decoder process exited (code {self._process.exitcode}): {self.source}"
+                ) from None
+
+        if item is None:
+            return None
+        if item[0] == "error":
+            raise RuntimeError(f"Decoder failed: {item[1]}")
+
+        slot, frame_id, timestamp, fps = item
+        self._frame_count = frame_id + 1
+        return FrameInfo(frame=self._views[slot], frame_id=frame_id, timestamp=timestamp, fps=fps), slot
+
+    def frames(self) -> Generator[FrameInfo, None, None]:
+        """
+        Generator that yields frames decoded by the child process.
+
+        Yields:
+            FrameInfo whose frame is a view into shared memory
+        """
+        for batch in self.frames_batched(1):
+            yield batch[0]
+
+    def frames_batched(self, batch_size: int) -> Generator[List[FrameInfo], None, None]:
+        """
+        Generator that yields lists of up to `batch_size` frames.
+
+        All frames of a batch stay pinned in their slots until the next
+        batch is requested, so `batch_size` may not exceed `prefetch`.
+
+        Args:
+            batch_size: Maximum number of frames per batch
+
+        Yields:
+            List of FrameInfo whose frames are views into shared memory
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if batch_size > self.prefetch:
+            raise ValueError(f"batch_size ({batch_size}) must not exceed prefetch ({self.prefetch})")
+
+        if self._process is None:
+            if not self.open():
+                return
+
+        held: List[int] = []
+        done = False
+        try:
+            while not done:
+                # Hand slots of the previous batch back to the decoder
+                for slot in held:
+                    self._free_slots.put(slot)
+                held = []
+
+                batch: List[FrameInfo] = []
+                while len(batch) < batch_size:
+                    item = self._next_frame()
+                    if item is None:
+                        done = True
+                        break
+                    frame_info, slot = item
+                    batch.append(frame_info)
+                    held.append(slot)
+
+                if batch:
+                    yield batch
+        finally:
+            self.close()
+
+    @property
+    def fps(self) -> float:
+        """Get source FPS."""
+        return self._source_fps
+
+    @property
+    def frame_count(self) -> int:
+        """Get current frame count."""
+        return self._frame_count
+
+    @property
+    def total_frames(self) -> int:
+        """Get total frames in video (0 for streams)."""
+        return self._total_frames
+
+    @property
+    def resolution(self) -> Tuple[int, int]:
+        """Get video resolution (width, height)."""
+        return (self._width, self._height)
+
+    def __enter__(self):
+        """Context manager entry."""
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+        return False
@@ -8,12 +8,26 @@ Provides:
 
 import cv2
 import logging
-from typing import Optional, Tuple, Generator
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Generator, List
 from dataclasses import dataclass
 
+import numpy as np
+
+from video_io.preprocess import preprocess_frame
+
 
 logger = logging.getLogger(__name__)
 
+# Sources decoded on a background thread (live network streams)
+STREAM_PREFIXES = ("rtsp://", "rtmp://", "http://", "https://")
+
+# FFmpeg demuxer options for streams: TCP transport (no UDP packet loss) and no
+# input buffering. Only used if OPENCV_FFMPEG_CAPTURE_OPTIONS isn't already set.
+STREAM_CAPTURE_OPTIONS = "rtsp_transport;tcp|fflags;nobuffer"
+
 
 @dataclass
 class FrameInfo:
@@ -22,6 +36,7 @@ class FrameInfo:
     frame_id: int
     timestamp: float  # in seconds
     fps: float
+    tensor: Optional[np.ndarray] = None  # RGB float32 CHW in [0, 1] (output_dtype="f32chw")
 
 
 class VideoReader:
@@ -30,9 +45,14 @@ class VideoReader:
     
     Features:
     - Read from video file or RTSP/HTTP stream
-    - Optional frame resizing
+    - Optional frame resizing (interpolation chosen once per source) into
+      preallocated buffers, so FrameInfo.frame is valid until the next read
+      (or, for frames_batched, until the next batch)
     - Frame skipping for FPS control
     - Generator-based iteration
+    - Optional normalized RGB CHW tensor per frame (output_dtype="f32chw")
+    - Network streams decoded on a background thread into a small buffer
+      that drops the oldest frames, so inference never waits on the network
     """
     
     def __init__(
@@ -40,7 +60,9 @@ class VideoReader:
         source: str,
         resize_width: Optional[int] = None,
         resize_height: Optional[int] = None,
-        target_fps: Optional[float] = None
+        target_fps: Optional[float] = None,
+        output_dtype: Optional[str] = None,
+        stream_buffer_size: int = 4
     ):
         """
         Initialize VideoReader.
@@ -50,18 +72,39 @@ class VideoReader:
             resize_width: Target width for resizing (None = no resize)
             resize_height: Target height for resizing (None = no resize)
             target_fps: Target FPS for frame sampling (None = use source FPS)
+            output_dtype: "f32chw" to also fill FrameInfo.tensor; the tensor is
+                a reused buffer, valid until the next frame is read
+            stream_buffer_size: Decoded frames kept ahead of the consumer for
+                network streams; older frames are dropped when it is full
         """
+        if output_dtype not in (None, "f32chw"):
+            raise ValueError(f"Unsupported output_dtype: {output_dtype!r}")
+        
         self.source = source
         self.resize_width = resize_width
         self.resize_height = resize_height
         self.target_fps = target_fps
+        self.output_dtype = output_dtype
+        self.stream_buffer_size = stream_buffer_size
         
         self._cap: Optional[cv2.VideoCapture] = None
         self._frame_count = 0
         self._source_fps = 0.0
+        self._inv_fps = 0.0  # 1 / source FPS, for per-frame timestamps
         self._total_frames = 0
         self._width = 0
         self._height = 0
+        self._interpolation = cv2.INTER_LINEAR
+        self._buf_slot = 0  # which per-frame buffer read_frame writes into
+        self._frame_info = FrameInfo(frame=None, frame_id=0, timestamp=0.0, fps=0.0)
+        self._resize_bufs: List[np.ndarray] = []
+        self._tensor_bufs: Dict[int, np.ndarray] = {}
+        
+        # Background decoding for network streams: (capture index, frame) pairs
+        self._grabber: Optional[threading.Thread] = None
+        self._stream_frames: Deque[Tuple[int, np.ndarray]] = deque()
+        self._stream_cond = threading.Condition()
+        self._stream_done = False
         
     def open(self) -> bool:
         """
@@ -76,7 +119,7 @@ class VideoReader:
         except ValueError:
             source = self.source
             
-        self._cap = cv2.VideoCapture(source)
+        self._cap = self._open_capture(source)
         
         if not self._cap.isOpened():
             logger.error(f"Failed to open video source: {self.source}")
@@ -84,19 +127,27 @@ class VideoReader:
         
         # Get video properties
         self._source_fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._inv_fps = 1.0 / self._source_fps if self._source_fps > 0 else 0.0
         self._total_frames = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
         self._width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         self._height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self._interpolation = self._resize_interpolation()
+        self._resize_bufs = []
+        self._reserve_buffers(1)
         
         logger.info(f"Opened video: {self.source}")
         logger.info(f"  Resolution: {self._width}x{self._height}")
         logger.info(f"  FPS: {self._source_fps:.2f}")
         logger.info(f"  Total frames: {self._total_frames}")
         
+        if self._is_stream():
+            self._start_grabber()
+        
         return True
     
     def close(self) -> None:
         """Release video capture resources."""
+        self._stop_grabber()
         if self._cap is not None:
             self._cap.release()
             self._cap = None
@@ -106,29 +157,73 @@ class VideoReader:
         """
         Read a single frame.
         
+        The returned FrameInfo is one instance reused for every read, and
+        when resizing its frame is a preallocated buffer; both are
+        overwritten by the next read, so copy what you need to keep.
+        
         Returns:
             FrameInfo if successful, None if end of video or error
         """
-        if self._cap is None or not self._cap.isOpened():
+        return self._read_into(self._frame_info)
+    
+    def _read_into(self, frame_info: Optional[FrameInfo]) -> Optional[FrameInfo]:
+        """
+        Read the next frame into `frame_info`.
+        
+        Args:
+            frame_info: Instance to overwrite, or None to allocate a new one
+            
+        Returns:
+            The filled FrameInfo, None if end of video or error
+        """
+        if self._cap is None:
+            return None
+        # With a grabber running, the capture belongs to its thread (cv2.VideoCapture
+        # isn't thread-safe); _next_frame learns the stream ended from _stream_done
+        if self._grabber is None and not self._cap.isOpened():
             return None
         
-        ret, frame = self._cap.read()
-        if not ret:
+        frame = self._next_frame()
+        if frame is None:
             return None
         
-        # Resize if needed
-        if self.resize_width and self.resize_height:
-            frame = cv2.resize(frame, (self.resize_width, self.resize_height))
+        slot = self._buf_slot
+        
+        # Resize if needed, into this slot's preallocated buffer
+        if self._resize_bufs:
+            frame = cv2.resize(
+                frame,
+                (self.resize_width, self.resize_height),
+                dst=self._resize_bufs[slot],
+                interpolation=self._interpolation,
+            )
+        
+        # Normalized model input, written into a buffer reused across frames
+        tensor = None
+        if self.output_dtype == "f32chw":
+            shape = (3,) + frame.shape[:2]
+            tensor = self._tensor_bufs.get(slot)
+            if tensor is None or tensor.shape != shape:
+                tensor = self._tensor_bufs[slot] = np.empty(shape, dtype=np.float32)
+            preprocess_frame(frame, tensor)
         
         # Calculate timestamp
-        timestamp = self._frame_count / self._source_fps if self._source_fps > 0 else 0
+        timestamp = self._frame_count * self._inv_fps
         
-        frame_info = FrameInfo(
-            frame=frame,
-            frame_id=self._frame_count,
-            timestamp=timestamp,
-            fps=self._source_fps
-        )
+        if frame_info is None:
+            frame_info = FrameInfo(
+                frame=frame,
+                frame_id=self._frame_count,
+                timestamp=timestamp,
+                fps=self._source_fps,
+                tensor=tensor
+            )
+        else:
+            frame_info.frame = frame
+            frame_info.frame_id = self._frame_count
+            frame_info.timestamp = timestamp
+            frame_info.fps = self._source_fps
+            frame_info.tensor = tensor
         
         self._frame_count += 1
         return frame_info
@@ -137,7 +232,9 @@ class VideoReader:
         """
         Generator that yields frames from the video.
         
-        Handles frame skipping if target_fps is set.
+        Handles frame skipping if target_fps is set; skipped frames are
+        only grabbed, never decoded into an image.
+        Like read_frame(), the same FrameInfo instance is yielded each time.
         
         Yields:
             FrameInfo for each frame
@@ -146,25 +243,225 @@ class VideoReader:
             if not self.open():
                 return
         
-        # Calculate frame skip interval if target FPS is set
-        skip_interval = 1
-        if self.target_fps and self._source_fps > 0:
-            skip_interval = max(1, int(self._source_fps / self.target_fps))
+        skip_interval = self._skip_interval()
         
-        frame_counter = 0
+        # Frames left to skip before the next kept one
+        countdown = 0
         while True:
-            frame_info = self.read_frame()
-            if frame_info is None:
+            if countdown == 0:
+                frame_info = self.read_frame()
+                if frame_info is None:
+                    break
+                yield frame_info
+                countdown = skip_interval
+            elif not self._skip_frame():
                 break
             
-            # Skip frames if needed
-            if frame_counter % skip_interval == 0:
-                yield frame_info
+            countdown -= 1
+        
+        self.close()
+    
+    def frames_batched(self, batch_size: int) -> Generator[List[FrameInfo], None, None]:
+        """
+        Generator that yields lists of up to `batch_size` frames.
+        
+        Same frame skipping as frames(), but the consumer's per-iteration
+        overhead scales with N / batch_size instead of N. The last batch
+        may be shorter than `batch_size`. Each FrameInfo in a batch is its
+        own instance; resized frame buffers are reused by the next batch.
+        
+        Args:
+            batch_size: Maximum number of frames per batch
             
-            frame_counter += 1
+        Yields:
+            List of FrameInfo
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        
+        if self._cap is None:
+            if not self.open():
+                return
         
+        skip_interval = self._skip_interval()
+        read_into = self._read_into
+        skip_frame = self._skip_frame
+        self._reserve_buffers(batch_size)
+        
+        batch: List[FrameInfo] = []
+        countdown = 0
+        while True:
+            if countdown == 0:
+                # Each frame held in the batch gets its own buffer slot
+                self._buf_slot = len(batch)
+                frame_info = read_into(None)
+                if frame_info is None:
+                    break
+                batch.append(frame_info)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+                countdown = skip_interval
+            elif not skip_frame():
+                break
+            
+            countdown -= 1
+        
+        if batch:
+            yield batch
+        
+        self._buf_slot = 0
         self.close()
     
+    def _skip_frame(self) -> bool:
+        """
+        Advance past one frame without decoding it.
+        
+        grab() only advances the capture; retrieve(), which converts the
+        decoded picture into a BGR ndarray, is skipped.
+        
+        Returns:
+            False if end of video or error
+        """
+        if self._grabber is not None:
+            if self._next_frame() is None:
+                return False
+        elif not self._cap.grab():
+            return False
+        self._frame_count += 1
+        return True
+    
+    def _open_capture(self, source) -> cv2.VideoCapture:
+        """
+        Create the capture for `source`.
+        
+        Files and streams are opened with the FFmpeg backend explicitly (no
+        runtime backend probing) and ask for hardware decoding when available,
+        which falls back to software otherwise. Webcam indices keep the
+        platform's default backend.
+        """
+        if isinstance(source, int):
+            return cv2.VideoCapture(source)
+        
+        # The options are read when the capture opens; they're removed again
+        # afterwards so later file captures don't inherit nobuffer (which
+        # drops a file's last frame)
+        set_options = self._is_stream() and "OPENCV_FFMPEG_CAPTURE_OPTIONS" not in os.environ
+        if set_options:
+            os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = STREAM_CAPTURE_OPTIONS
+        try:
+            cap = cv2.VideoCapture(
+                source, cv2.CAP_FFMPEG, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            )
+        finally:
+            if set_options:
+                del os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"]
+        if not cap.isOpened():
+            # OpenCV built without FFmpeg: let it pick a backend
+            cap.release()
+            cap = cv2.VideoCapture(source)
+        
+        if self._is_stream():
+            # Keep at most one frame queued inside the backend
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+    
+    def _is_stream(self) -> bool:
+        """Whether the source is a live network stream."""
+        return isinstance(self.source, str) and self.source.lower().startswith(STREAM_PREFIXES)
+    
+    def _next_frame(self) -> Optional[np.ndarray]:
+        """
+        Decode the next frame, or take it from the stream buffer.
+        
+        For buffered streams, _frame_count is set to the frame's capture
+        index, so frames dropped by the buffer show up as gaps in frame_id.
+        """
+        if self._grabber is None:
+            ret, frame = self._cap.read()
+            return frame if ret else None
+        
+        with self._stream_cond:
+            while not self._stream_frames and not self._stream_done:
+                self._stream_cond.wait()
+            if not self._stream_frames:
+                return None
+            self._frame_count, frame = self._stream_frames.popleft()
+        return frame
+    
+    def _start_grabber(self) -> None:
+        """Start decoding the stream on a background thread."""
+        self._stream_frames = deque(maxlen=max(1, self.stream_buffer_size))
+        self._stream_done = False
+        self._grabber = threading.Thread(target=self._grab_loop, name="VideoReaderGrabber", daemon=True)
+        self._grabber.start()
+    
+    def _stop_grabber(self) -> None:
+        """Stop the background decoder, if running."""
+        if self._grabber is None:
+            return
+        with self._stream_cond:
+            self._stream_done = True
+            self._stream_cond.notify_all()
+        self._grabber.join(timeout=5.0)
+        if self._grabber.is_alive():
+            logger.warning("Stream decoder thread did not stop within 5s")
+        self._grabber = None
+        self._stream_frames.clear()
+    
+    def _grab_loop(self) -> None:
+        """
+        Decode frames until the stream ends or close() is called.
+        
+        Only this thread touches the capture while it runs. However it
+        exits, it sets _stream_done under the condition, so a waiting
+        consumer always wakes up.
+        """
+        cap = self._cap
+        index = 0
+        try:
+            while not self._stream_done:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                with self._stream_cond:
+                    # deque(maxlen) drops the oldest frame when full
+                    self._stream_frames.append((index, frame))
+                    index += 1
+                    self._stream_cond.notify()
+        finally:
+            with self._stream_cond:
+                self._stream_done = True
+                self._stream_cond.notify_all()
+    
+    def _reserve_buffers(self, count: int) -> None:
+        """Preallocate resize destinations for `count` frames held at once."""
+        if not (self.resize_width and self.resize_height):
+            return
+        shape = (self.resize_height, self.resize_width, 3)
+        while len(self._resize_bufs) < count:
+            self._resize_bufs.append(np.empty(shape, dtype=np.uint8))
+    
+    def _resize_interpolation(self) -> int:
+        """
+        Pick the resize interpolation for this source once, at open().
+        
+        Downscales by more than 2x on both axes use INTER_AREA, which
+        averages every source pixel (no aliasing) and has dedicated SIMD
+        paths for integer ratios; everything else uses INTER_LINEAR.
+        """
+        if not (self.resize_width and self.resize_height):
+            return cv2.INTER_LINEAR
+        if self._width > 2 * self.resize_width and self._height > 2 * self.resize_height:
+            return cv2.INTER_AREA
+        return cv2.INTER_LINEAR
+    
+    def _skip_interval(self) -> int:
+        """Calculate frame skip interval if target FPS is set."""
+        if self.target_fps and self._source_fps > 0:
+            return max(1, int(self._source_fps / self.target_fps))
+        return 1
+    
     @property
     def fps(self) -> float:
         """Get source FPS."""